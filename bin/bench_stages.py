@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+"""Benchmark the stages verify_path, _validate, etl, and JSON write on a seeded synthetic corpus.
+
+Usage: bin/bench_stages.py [-q QUESTIONS] [-a ANSWERS] [-o OVERRIDES] [-r RANGE] [-s SEED] [-n REPEAT]
+                           [--results PATH] [--baseline PATH] [--tolerance FACTOR]
+
+Every stage is timed (best and median of REPEAT runs) and its peak memory measured in a separate traced run.
+The peak resident set size of publishing the model in a fresh process is measured without the parsed model cache
+(compact model built on the event stream) and when filling the cache (parsed model held as a whole).
+The results are written as JSON (default etc/benchmark-stages.json) including the commit and the parameters.
+With a baseline of the same parameters the run fails (exit code 1) if a stage is slower than tolerance times before.
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from visailu import VERSION
+from visailu.corpus import dump, fresh_copies, synthesize
+from visailu.publish import etl
+from visailu.validate import _validate
+from visailu.verify import verify_path
+from visailu.writer import write_quiz
+
+ENCODING = 'utf-8'
+RESULTS_PATH = pathlib.Path('etc', 'benchmark-stages.json')
+RSS_PROBE = """
+import sys
+from visailu.publish import publish_path
+code, message, _ = publish_path(sys.argv[1], {'cache': sys.argv[2] == 'cache', 'collect': False})
+with open('/proc/self/status', encoding='ascii') as status:  # VmHWM (unlike ru_maxrss) is not inherited on fork
+    print(next(line.split()[1] for line in status if line.startswith('VmHWM:')) if code == 0 else -1)
+"""
+
+
+def commit() -> str:
+    """Identify the commit measured (empty outside of a git work tree)."""
+    try:
+        run = subprocess.run(  # nosec B603 B607
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+    return run.stdout.strip()
+
+
+def measure(work: Callable[[Any], Any], inputs: list[Any]) -> dict[str, float]:
+    """Time the work per input and trace the peak memory of one extra run."""
+    timings = []
+    for item in inputs[:-1]:
+        start = time.perf_counter()
+        work(item)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        work(inputs[-1])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'best_ms': min(timings) * 1e3,
+        'median_ms': statistics.median(timings) * 1e3,
+        'peak_kib': peak / 1024,
+    }
+
+
+def peak_rss(model_path: str, folder: str) -> dict[str, float]:
+    """Measure the peak resident set size (KiB, Linux) of publishing the model in a fresh process per mode."""
+    peaks = {}
+    for name, mode in (('publish', 'no-cache'), ('publish_cached', 'cache')):
+        run = subprocess.run(  # nosec B603
+            [sys.executable, '-c', RSS_PROBE, model_path, mode], capture_output=True, text=True, check=True, cwd=folder
+        )
+        peaks[name] = float(run.stdout.strip())
+    return peaks
+
+
+def run_stages(parameters: dict[str, Any], repeat: int) -> tuple[dict[str, dict[str, float]], dict[str, float]]:
+    """Measure every stage on inputs prepared by the previous stage outside of the timed region and the peak RSS."""
+    model = synthesize(**parameters)
+    stages = {}
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = str(dump(model, pathlib.Path(folder) / 'model.yml'))
+        stages['verify_path'] = measure(verify_path, [model_path] * (repeat + 1))
+        stages['_validate'] = measure(_validate, fresh_copies(model, repeat + 1))
+        valid = _validate(fresh_copies(model, 1)[0])[2]
+        stages['etl'] = measure(lambda data: list(etl(data, 'bank')), [valid] * (repeat + 1))
+        quiz = list(etl(valid, 'bank'))
+        target = pathlib.Path(folder) / 'quiz.json'
+        stages['write_json'] = measure(lambda questions: write_quiz(questions, target), [quiz] * (repeat + 1))
+        rss = peak_rss(model_path, folder)
+    return stages, rss
+
+
+def compare(stages: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """List the stages slower than tolerance times the baseline (best of runs)."""
+    slower = []
+    for name, stats in stages.items():
+        before = baseline.get('stages', {}).get(name, {}).get('best_ms')
+        if before and stats['best_ms'] > before * tolerance:
+            slower.append(f'{name} {stats["best_ms"]:.3f} ms > {tolerance} * {before:.3f} ms')
+    return slower
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark, store the results, and compare with the baseline (if any)."""
+    parser = argparse.ArgumentParser(prog='bench_stages', description='Benchmark the visailu processing stages.')
+    parser.add_argument('-q', '--questions', type=int, default=2000)
+    parser.add_argument('-a', '--answers', type=int, default=4)
+    parser.add_argument('-o', '--overrides', type=float, default=0.1, help='share of questions with nested meta')
+    parser.add_argument('-r', '--range', dest='scale_range', default='binary', choices=('binary', 'percentage'))
+    parser.add_argument('-s', '--seed', type=int, default=42)
+    parser.add_argument('-n', '--repeat', type=int, default=7)
+    parser.add_argument('--results', default=str(RESULTS_PATH))
+    parser.add_argument('--baseline', default='')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    parameters = {
+        'questions': args.questions,
+        'answers': args.answers,
+        'overrides': args.overrides,
+        'scale_range': args.scale_range,
+        'seed': args.seed,
+    }
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text(encoding=ENCODING))
+        if baseline.get('parameters') != parameters:
+            print(f'baseline {args.baseline} was measured with other parameters - not comparable')
+            return 2
+
+    stages, rss = run_stages(parameters, max(1, args.repeat))
+    for name, stats in stages.items():
+        print(
+            f'{name:12s} best={stats["best_ms"]:9.3f} ms median={stats["median_ms"]:9.3f} ms'
+            f' peak={stats["peak_kib"]:10.1f} KiB'
+        )
+    for name, kib in rss.items():
+        print(f'{name:14s} peak_rss={kib:10.1f} KiB')
+    results = {
+        'commit': commit(),
+        'version': VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'repeat': args.repeat,
+        'stages': stages,
+        'peak_rss_kib': rss,
+    }
+    pathlib.Path(args.results).write_text(json.dumps(results, indent=2) + '\n', encoding=ENCODING)
+
+    slower = compare(stages, baseline, args.tolerance)
+    for line in slower:
+        print(f'regression: {line}')
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
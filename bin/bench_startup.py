@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+"""Measure the start up cost of visailu (cumulative import times and command wall clock) against a budget.
+
+Usage: bin/bench_startup.py [BUDGET_PATH [REPEAT]]
+
+Exits with 1 if any measurement exceeds its budget (milliseconds per key in etc/startup-budget.json).
+"""
+
+import json
+import pathlib
+import subprocess  # nosec B404
+import sys
+import time
+
+BUDGET_PATH = pathlib.Path('etc') / 'startup-budget.json'
+IMPORTS = ('visailu', 'visailu.cli', 'visailu.validate', 'visailu.publish')
+COMMANDS = {
+    'command_version': ['version'],
+    'command_validate': ['validate', 'test/fixtures/basic/use/ten.yml'],
+}
+
+
+def import_time_ms(module: str) -> float:
+    """Return the cumulative import time of the module in a fresh interpreter as reported by -X importtime."""
+    run = subprocess.run(  # nosec B603
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True
+    )
+    for line in reversed(run.stderr.splitlines()):
+        _, cumulative, name = line.split('|')
+        if name.strip() == module:
+            return int(cumulative) / 1e3
+    raise RuntimeError(f'no import time reported for {module}')
+
+
+def command_ms(args: list[str], repeat: int) -> float:
+    """Return the best wall clock time of running python -m visailu with args in a fresh interpreter."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'visailu', *args], capture_output=True, check=False)  # nosec B603
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e3
+
+
+def main(argv: list[str]) -> int:
+    """Measure the best of some runs per import and command and compare with the budget."""
+    budget_path = pathlib.Path(argv[0]) if argv else BUDGET_PATH
+    repeat = int(argv[1]) if len(argv) > 1 else 5
+    budget = json.loads(budget_path.read_text(encoding='utf-8'))
+    measured = {f'import_{module}': min(import_time_ms(module) for _ in range(repeat)) for module in IMPORTS}
+    measured.update({key: command_ms(args, repeat) for key, args in COMMANDS.items()})
+    exceeded = 0
+    for key, millis in measured.items():
+        limit = budget.get(key)
+        verdict = 'ok' if limit is None or millis <= limit else 'OVER'
+        exceeded += verdict == 'OVER'
+        print(f'{key:32s} {millis:8.1f} ms (budget {limit} ms) {verdict}')
+    return 1 if exceeded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,36 @@
+#! /usr/bin/env python3
+"""Benchmark the model validation on synthetic quizzes (a tenth of the questions with nested meta).
+
+Usage: bin/bench_validate.py [QUESTIONS [ANSWERS [REPEAT]]]
+"""
+
+import sys
+import time
+
+from visailu.corpus import fresh_copies, synthesize
+from visailu.validate import _validate
+
+
+def main(argv: list[str]) -> int:
+    """Time the best of some validation runs on fresh copies of the synthetic model."""
+    questions = int(argv[0]) if argv else 5000
+    answers = int(argv[1]) if len(argv) > 1 else 4
+    repeat = int(argv[2]) if len(argv) > 2 else 7
+    model = synthesize(questions, answers)
+    copies = fresh_copies(model, repeat)
+    timings = []
+    for data in copies:
+        start = time.perf_counter()
+        code, message, _ = _validate(data)
+        timings.append(time.perf_counter() - start)
+        if code != 0:
+            print(f'unexpected validation failure: {message}')
+            return 1
+    best = min(timings)
+    print(f'_validate questions={questions} answers={answers} best={best * 1e3:.3f} ms of {repeat} runs')
+    print(f'per answer {best / (questions * answers) * 1e9:.1f} ns')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
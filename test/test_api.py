@@ -0,0 +1,85 @@
+import io
+import json
+import pathlib
+
+import yaml
+
+from visailu import INVALID_YAML_RESOURCE, MODEL_VALUES_MISSING
+from visailu.api import publish, validate, verify
+from visailu.publish import BUILD_FOLDER, publish_path
+from visailu.sample import SamplePlan
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+TEN_MODEL_PATH = pathlib.Path(USE_PREFIX, 'ten.yml')
+TEN_EXPORT_PATH = pathlib.Path(USE_PREFIX, 'ten.json')
+
+
+def _text():
+    return TEN_MODEL_PATH.read_text(encoding='utf-8')
+
+
+def test_verify_text_bytes_and_handles():
+    expected = yaml.safe_load(_text())
+    for source in (_text(), _text().encode('utf-8'), io.StringIO(_text()), io.BytesIO(_text().encode('utf-8'))):
+        assert verify(source) == (0, '', expected)
+
+
+def test_verify_dict_passes():
+    model = {'id': 'x'}
+    assert verify(model) == (0, '', model)
+
+
+def test_verify_invalid_yaml_labeled():
+    code, message, data = verify('a: b: c', label='<request>')
+    assert code == 1
+    assert message.startswith('path<request> is not a valid YAML file. Details:')
+    assert data == {}
+
+
+def test_validate_invalid_yaml():
+    assert validate(b'a: b: c') == (1, INVALID_YAML_RESOURCE, {})
+
+
+def test_validate_violation():
+    assert validate({'id': 'x'})[:2] == (1, MODEL_VALUES_MISSING)
+
+
+def test_publish_matches_published_file_without_writing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    text = (pathlib.Path(__file__).parent.parent / TEN_MODEL_PATH).read_text(encoding='utf-8')
+    code, message, quiz = publish(text)
+    assert (code, message) == (0, '')
+    assert not pathlib.Path(BUILD_FOLDER).exists()
+    expected = json.loads((pathlib.Path(__file__).parent.parent / TEN_EXPORT_PATH).read_text(encoding='utf-8'))
+    assert quiz == expected
+
+
+def test_publish_same_as_publish_path():
+    assert publish(_text())[2] == publish_path(str(TEN_MODEL_PATH), options={'collect': True})[2]
+
+
+def test_publish_target_profile():
+    text = pathlib.Path(USE_PREFIX, 'eleven.yml').read_text(encoding='utf-8')
+    assert len(publish(text)[2]) == 10
+    assert len(publish(text, options={'target': 'bank'})[2]) == 11
+
+
+def test_publish_sampled():
+    text = pathlib.Path(USE_PREFIX, 'eleven.yml').read_text(encoding='utf-8')
+    code, _, quiz = publish(text, options={'sample': SamplePlan(5, 2, seed=3)})
+    assert code == 0 and len(quiz) == 5 and all(len(entry['options']) == 2 for entry in quiz)
+    assert quiz == publish(text, options={'sample': SamplePlan(5, 2, seed=3)})[2]
+    code, _, quizzes = publish(text, options={'sample': SamplePlan(5, 2, seed=3, variants=2), 'target': 'bank'})
+    assert code == 0 and [len(quiz) for quiz in quizzes] == [5, 5]
+
+
+def test_publish_invalid():
+    assert publish({'id': 'x'})[:2] == (1, MODEL_VALUES_MISSING)
+
+
+def test_untrusted_sources_never_raise():
+    for source in ('- a\nb: c\n', '!!python/object:os.system x\n', 'a: 1\n---\nb: 2\n', 'a: *unknown\n', b'a: \x80\n'):
+        code, message, _ = verify(source)
+        assert code == 1 and 'is not a valid YAML file' in message
+        for function in (validate, publish):
+            assert function(source)[:2] == (1, INVALID_YAML_RESOURCE)
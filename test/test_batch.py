@@ -0,0 +1,65 @@
+import pathlib
+
+from visailu import batch
+from visailu.batch import expand, run, summary_code
+
+TEST_PREFIX = pathlib.Path('test', 'fixtures', 'basic')
+USE_PREFIX = pathlib.Path(TEST_PREFIX, 'use')
+INVALID_YAML_PATH = pathlib.Path(TEST_PREFIX, 'abuse', 'invalid-yaml.yml')
+MINIMAL_MODEL_PATH = pathlib.Path(USE_PREFIX, 'minimal.yml')
+
+
+def test_expand_folder_sorted_yaml_only():
+    entries = expand([str(USE_PREFIX)])
+    paths = [path for path, _, _ in entries]
+    assert paths == sorted(str(path) for path in USE_PREFIX.glob('*.yml'))
+    assert all(code == 0 for _, code, _ in entries)
+
+
+def test_expand_keeps_input_order_and_problems():
+    entries = expand([str(MINIMAL_MODEL_PATH), 'file-does-not-exist', str(TEST_PREFIX / 'no-such-*.yml')])
+    assert [code for _, code, _ in entries] == [0, 2, 2]
+    assert entries[1][2] == 'requested model file path at (file-does-not-exist) does not exist'
+
+
+def test_expand_pattern():
+    entries = expand([str(USE_PREFIX / 't*.yml')])
+    assert [pathlib.Path(path).name for path, _, _ in entries] == ['ten.yml']
+
+
+def test_run_serial_and_parallel_agree():
+    entries = expand([str(INVALID_YAML_PATH), str(USE_PREFIX)])
+    serial = run('validate', entries, jobs=1)
+    parallel = run('validate', entries, jobs=2)
+    assert serial == parallel
+    assert [path for path, _, _ in serial] == [path for path, _, _ in entries]
+    assert serial[0][1] == 1
+    assert all(code == 0 for _, code, _ in serial[1:])
+    assert summary_code(serial) == 1
+
+
+def test_summary_code_empty():
+    assert summary_code([]) == 0
+
+
+def test_parser_errors_keep_results_per_file(tmp_path):
+    broken = tmp_path / 'broken.yml'
+    broken.write_text('a: [1, 2\nb: c\n', encoding='utf-8')
+    several = tmp_path / 'several.yml'
+    several.write_text('---\na: 1\n---\nb: 2\n', encoding='utf-8')
+    entries = expand([str(broken), str(several), str(MINIMAL_MODEL_PATH)])
+    for action in ('verify', 'validate', 'diagnose'):
+        for jobs in (1, 2):
+            results = run(action, entries, jobs=jobs)
+            assert [(path, code) for path, code, _ in results][:2] == [(str(broken), 1), (str(several), 1)]
+            assert results[2][0] == str(MINIMAL_MODEL_PATH)
+
+
+def test_unexpected_failures_stay_per_file(monkeypatch):
+    def explode(path, options=None):
+        raise KeyError('boom')
+
+    monkeypatch.setitem(batch.ACTIONS, 'verify', explode)
+    results = run('verify', expand([str(MINIMAL_MODEL_PATH), str(MINIMAL_MODEL_PATH)]))
+    assert [code for _, code, _ in results] == [1, 1]
+    assert results[0][2].endswith("failed: KeyError: 'boom'")
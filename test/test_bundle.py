@@ -0,0 +1,104 @@
+import json
+import pathlib
+
+import pytest
+import yaml
+
+from visailu import bundle
+from visailu.batch import expand
+from visailu.bundle import Bundle, BundleWriter, publish_bundle, record_of
+from visailu.publish import publish_path
+from visailu.sample import SamplePlan
+from visailu.writer import atomic_target
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+USE_PATHS = sorted(str(path.resolve()) for path in USE_PREFIX.glob('*.yml'))
+
+
+def _write(path, quizzes):
+    with atomic_target(path) as handle:
+        writer = BundleWriter(handle)
+        for quiz_id, quiz in quizzes.items():
+            writer.add(quiz_id, record_of(quiz_id, quiz))
+        writer.close()
+
+
+def test_roundtrip_by_id(tmp_path):
+    quizzes = {f'quiz-{number}': [{'id': 1, 'question': f'Q{number}?', 'options': []}] for number in range(500)}
+    quizzes['ünïcode "quoted"'] = []
+    path = tmp_path / 'many.bundle'
+    _write(path, quizzes)
+    with Bundle(path) as reader:
+        assert len(reader) == 501
+        assert list(reader) == list(quizzes)
+        for quiz_id in ('quiz-0', 'quiz-250', 'quiz-499', 'ünïcode "quoted"'):
+            assert reader[quiz_id] == quizzes[quiz_id]
+        assert reader.get('quiz-500') is None
+        assert 'quiz-1' in reader and 'quiz-500' not in reader and 42 not in reader
+        with pytest.raises(KeyError):
+            reader['missing']
+
+
+def test_colliding_keys(tmp_path, monkeypatch):
+    monkeypatch.setattr(bundle, 'key_of', lambda quiz_id: 7)
+    path = tmp_path / 'collide.bundle'
+    _write(path, {'a': [1], 'b': [2], 'c': [3]})
+    with Bundle(path) as reader:
+        assert [reader['a'], reader['b'], reader['c']] == [[1], [2], [3]]
+        assert reader.get('d') is None
+
+
+def test_empty_and_foreign(tmp_path):
+    path = tmp_path / 'empty.bundle'
+    _write(path, {})
+    with Bundle(path) as reader:
+        assert len(reader) == 0 and list(reader) == [] and reader.get('x') is None
+    foreign = tmp_path / 'foreign.bundle'
+    foreign.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match='not a quiz bundle'):
+        Bundle(foreign)
+
+
+def test_duplicate_ids_keep_first(tmp_path):
+    with (tmp_path / 'dup.bundle').open('wb') as handle:
+        writer = BundleWriter(handle)
+        assert writer.add('x', record_of('x', [1]))
+        assert not writer.add('x', record_of('x', [2]))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_publish_bundle_matches_files(tmp_path, monkeypatch, jobs):
+    monkeypatch.chdir(tmp_path)
+    target = tmp_path / 'all.bundle'
+    results = publish_bundle(expand([*USE_PATHS, 'missing.yml']), target, jobs=jobs)
+    assert [code for _, code, _ in results] == [0] * len(USE_PATHS) + [2]
+    with Bundle(target) as reader:
+        assert len(reader) == len(USE_PATHS)
+        for path in USE_PATHS:
+            quiz_id = str(yaml.safe_load(pathlib.Path(path).read_text(encoding='utf-8'))['id'])
+            assert reader[quiz_id] == publish_path(path)[2]
+
+
+def test_publish_bundle_duplicate_and_invalid(tmp_path):
+    minimal = str(USE_PREFIX / 'minimal.yml')
+    invalid = str(pathlib.Path('test', 'fixtures', 'basic', 'abuse', 'model-missing-id.yml'))
+    results = publish_bundle(expand([minimal, minimal, invalid]), tmp_path / 'dup.bundle')
+    assert [code for _, code, _ in results] == [0, 1, 1]
+    assert 'duplicate quiz id (some-id-minimal)' in results[1][2]
+
+
+def test_publish_bundle_variants(tmp_path):
+    target = tmp_path / 'variants.bundle'
+    options = {'sample': SamplePlan(3, 2, seed=1, variants=2), 'target': 'bank'}
+    publish_bundle(expand([str(USE_PREFIX / 'eleven.yml')]), target, options=options)
+    with Bundle(target) as reader:
+        assert list(reader) == ['some-id-eleven-v1', 'some-id-eleven-v2']
+        assert len(reader['some-id-eleven-v1']) == 3
+
+
+def test_records_are_json_lines(tmp_path):
+    target = tmp_path / 'lines.bundle'
+    _write(target, {'a': [1], 'b': [2]})
+    with Bundle(target) as reader:
+        lines = bytes(reader.map[bundle.HEADER.size : reader.index_offset]).splitlines()
+    assert [json.loads(line) for line in lines] == [{'id': 'a', 'quiz': [1]}, {'id': 'b', 'quiz': [2]}]
@@ -0,0 +1,103 @@
+import os
+import pathlib
+
+from visailu import cache
+from visailu.verify import verify_path
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+TEN_MODEL_PATH = pathlib.Path(USE_PREFIX, 'ten.yml')
+
+
+def _model(tmp_path, text='id: a\n'):
+    path = tmp_path / 'model.yml'
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_cached_round_trip(tmp_path):
+    folder = tmp_path / 'cache'
+    parsed = []
+
+    def parse():
+        parsed.append(1)
+        return verify_path(str(TEN_MODEL_PATH))
+
+    first = cache.cached(TEN_MODEL_PATH, parse, folder)
+    second = cache.cached(TEN_MODEL_PATH, parse, folder)
+    assert first == second
+    assert first[0] == 0
+    assert len(parsed) == 1
+    assert cache.stats(folder)['entries'] == 1
+
+
+def test_changed_content_misses(tmp_path):
+    folder = tmp_path / 'cache'
+    path = _model(tmp_path)
+    assert cache.cached(path, lambda: verify_path(str(path)), folder)[2] == {'id': 'a'}
+    path.write_text('id: b\n', encoding='utf-8')
+    assert cache.cached(path, lambda: verify_path(str(path)), folder)[2] == {'id': 'b'}
+    assert cache.stats(folder)['entries'] == 1
+
+
+def test_failed_parse_not_cached(tmp_path):
+    folder = tmp_path / 'cache'
+    path = _model(tmp_path, 'a: b: c\n')
+    assert cache.cached(path, lambda: verify_path(str(path)), folder)[0] == 1
+    assert cache.stats(folder)['entries'] == 0
+
+
+def test_unserializable_not_cached(tmp_path):
+    folder = tmp_path / 'cache'
+    path = _model(tmp_path, 'when: 2023-08-25\n')
+    assert cache.cached(path, lambda: verify_path(str(path)), folder)[0] == 0
+    assert cache.stats(folder)['entries'] == 0
+
+
+def test_lru_eviction(tmp_path):
+    folder = tmp_path / 'cache'
+    stamps = [(f'/model-{slot}.yml', 1, 1, 'x') for slot in range(3)]
+    for slot, stamp in enumerate(stamps):
+        assert cache.store(stamp, {'slot': slot}, folder)
+        os.utime(cache.entry_path(stamp, folder), ns=(slot, slot))
+    assert cache.lookup(stamps[0], folder) == (True, {'slot': 0})  # Now the most recently used
+    size = cache.entry_path(stamps[0], folder).stat().st_size
+    assert cache.evict(folder, 2 * size) == 1
+    assert cache.lookup(stamps[1], folder) == (False, None)
+    assert cache.lookup(stamps[0], folder)[0]
+    assert cache.lookup(stamps[2], folder)[0]
+
+
+def test_clear(tmp_path):
+    folder = tmp_path / 'cache'
+    cache.store(('/m.yml', 1, 1, 'x'), {}, folder)
+    assert cache.clear(folder) == 1
+    assert cache.stats(folder)['entries'] == 0
+
+
+def test_verify_path_cache_option(tmp_path, monkeypatch):
+    model = TEN_MODEL_PATH.resolve()
+    monkeypatch.chdir(tmp_path)
+    assert verify_path(str(model), options={'cache': True}) == verify_path(str(model))
+    assert cache.stats()['entries'] == 1
+    assert verify_path(str(model), options={'cache': True}) == verify_path(str(model))
+
+
+def test_store_scans_the_folder_only_when_evicting(tmp_path, monkeypatch):
+    folder = tmp_path / 'cache'
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda folder: scans.append(1) or entries(folder))
+    size = len(cache.marshal.dumps((cache.FORMAT, ('/model-00.yml', 1, 1, 'x'), {'slot': 0})))
+    for slot in range(40):
+        cache.store((f'/model-{slot:02d}.yml', 1, 1, 'x'), {'slot': 0}, folder, max_bytes=20 * size)
+    assert len(scans) < 10
+    assert cache.stats(folder)['bytes'] <= 20 * size
+
+
+def test_cached_documents_keep_the_limits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = _model(tmp_path, 'id: a\nitems: [[[1]]]\n')
+    assert verify_path(str(path), options={'cache': True})[0] == 0
+    code, message, _ = verify_path(str(path), options={'cache': True, 'limits': {'depth': 2}})
+    assert code == 1 and 'depth' in message
+    assert cache.stats()['entries'] == 1
@@ -1,6 +1,9 @@
+import gzip
 import json
+import logging
 import pathlib
 
+import yaml
 from typer.testing import CliRunner
 
 import visailu
@@ -316,3 +319,225 @@ def test_help():
         result = runner.invoke(app, options)
         assert result.exit_code == 0
         assert 'Quiz (Finnish: visailu) data operations.' in result.stdout
+
+
+def test_validate_yaml_loader_python():
+    result = runner.invoke(app, ['validate', '--yaml-loader', 'python', str(ROCOCO_MODEL_PATH)])
+    assert result.exit_code == 0
+
+
+def test_validate_yaml_loader_c():
+    result = runner.invoke(app, ['validate', '--yaml-loader', 'c', str(ROCOCO_MODEL_PATH)])
+    assert result.exit_code == 0
+
+
+def test_validate_batch_folder_and_file():
+    result = runner.invoke(app, ['validate', '--jobs', '2', str(INVALID_YAML_PATH), str(TEST_PREFIX / 'use')])
+    assert result.exit_code == 1
+    lines = result.stdout.splitlines()
+    assert lines[0] == f'1 {INVALID_YAML_PATH}'
+    assert f'0 {MINIMAL_MODEL_PATH}' in lines
+
+
+def test_verify_batch_pattern():
+    result = runner.invoke(app, ['verify', str(TEST_PREFIX / 'use' / '*.yml')])
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 5
+
+
+def test_publish_batch_with_missing_file():
+    result = runner.invoke(app, ['publish', str(MINIMAL_MODEL_PATH), 'file-does-not-exist'])
+    assert result.exit_code == 2
+    assert result.stdout.splitlines() == [f'0 {MINIMAL_MODEL_PATH}', '2 file-does-not-exist']
+
+
+def test_publish_incremental(caplog):
+    caplog.set_level(logging.INFO)
+    for expected in ('published quiz data', 'skipped unchanged quiz data'):
+        caplog.clear()
+        result = runner.invoke(app, ['publish', '--incremental', str(MINIMAL_MODEL_PATH)])
+        assert result.exit_code == 0
+        assert expected in caplog.text
+
+
+def test_validate_stream():
+    stream_path = pathlib.Path(TEST_PREFIX, 'stream', 'mixed.yml')
+    result = runner.invoke(app, ['validate', '--stream', str(stream_path)])
+    assert result.exit_code == 1
+    assert result.stdout.splitlines() == [f'0 {stream_path}#1', f'1 {stream_path}#2', f'0 {stream_path}#3']
+
+
+def test_validate_all_errors():
+    many_errors_path = pathlib.Path(TEST_PREFIX, 'abuse', 'model-many-errors.yml')
+    result = runner.invoke(app, ['validate', '--all-errors', str(many_errors_path), str(MINIMAL_MODEL_PATH)])
+    assert result.exit_code == 1
+    diagnostics = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(diagnostics) == 4
+    assert diagnostics[0] == {
+        'path': str(many_errors_path),
+        'code': 1,
+        'constant': 'MODEL_QUESTION_INVALID_RANGE',
+        'message': visailu.MODEL_QUESTION_INVALID_RANGE,
+        'question': 1,
+        'answer': 1,
+        'line': 13,
+        'column': 5,
+    }
+
+
+def test_validate_all_errors_null_questions(tmp_path):
+    model = tmp_path / 'model.yml'
+    model.write_text('id: x\ntitle: y\nquestions:\n', encoding='utf-8')
+    result = runner.invoke(app, ['validate', '--all-errors', str(model)])
+    assert result.exit_code == 1
+    assert [json.loads(line)['constant'] for line in result.stdout.splitlines()] == ['MODEL_VALUES_MISSING']
+
+
+def test_publish_compact_gzip():
+    result = runner.invoke(app, ['publish', '--compact', '--gzip', str(EXACT_MODEL_PATH)])
+    assert result.exit_code == 0
+    with gzip.open(pathlib.Path('build', 'ten.json.gz'), 'rt', encoding='utf-8') as handle:
+        generated = json.load(handle)
+    with EXACT_QUIZ_PATH.open('rt', encoding='utf-8') as handle:
+        assert generated == json.load(handle)
+
+
+def test_publish_bank_target():
+    result = runner.invoke(app, ['publish', '--target', 'bank', str(ONE_MORE_MODEL_PATH)])
+    assert result.exit_code == 0
+    with (pathlib.Path('build') / ONE_MORE_QUIZ_PATH.name).open('rt', encoding='utf-8') as handle:
+        assert len(json.load(handle)) == 11
+
+
+def test_publish_unknown_target():
+    result = runner.invoke(app, ['publish', '--target', 'no-such-profile', str(ONE_MORE_MODEL_PATH)])
+    assert result.exit_code == 2
+
+
+def test_validate_timings_json():
+    result = runner.invoke(
+        app, ['validate', '--no-cache', '--timings', '--timings-format', 'json', str(MINIMAL_MODEL_PATH)]
+    )
+    assert result.exit_code == 0
+    stages = json.loads(result.output.strip().splitlines()[-1])['stages']
+    assert list(stages) == ['verify', 'validate']
+    assert stages['validate']['questions'] == 1
+
+
+def test_verify_timings_unknown_format():
+    result = runner.invoke(app, ['verify', '--timings', '--timings-format', 'xml', str(MINIMAL_MODEL_PATH)])
+    assert result.exit_code == 2
+
+
+def test_validate_no_cache_and_cache_stats(tmp_path, monkeypatch):
+    model = MINIMAL_MODEL_PATH.resolve()
+    monkeypatch.chdir(tmp_path)
+    assert runner.invoke(app, ['validate', '--no-cache', str(model)]).exit_code == 0
+    assert json.loads(runner.invoke(app, ['cache-stats']).output)['entries'] == 0
+    assert runner.invoke(app, ['validate', str(model)]).exit_code == 0
+    assert json.loads(runner.invoke(app, ['cache-stats', '--clear']).output)['entries'] == 1
+    assert json.loads(runner.invoke(app, ['cache-stats']).output)['entries'] == 0
+
+
+def test_dedupe_reports_duplicates(tmp_path, monkeypatch):
+    folder = pathlib.Path(TEST_PREFIX, 'use').resolve()
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ['dedupe', str(folder / 'ten.yml'), str(folder / 'eleven.yml')])
+    assert result.exit_code == 1
+    assert result.stdout.count('exact: ') == 10
+    assert pathlib.Path('build', '.dedupe', 'index.marshal').is_file()
+    assert runner.invoke(app, ['dedupe', str(folder / 'minimal.yml')]).exit_code == 0
+
+
+def test_dedupe_without_cache(tmp_path, monkeypatch):
+    folder = pathlib.Path(TEST_PREFIX, 'use').resolve()
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ['dedupe', '--no-cache', str(folder / 'ten.yml'), str(folder / 'eleven.yml')])
+    assert result.exit_code == 1
+    assert result.stdout.count('exact: ') == 10
+    assert not pathlib.Path('build', '.cache').exists()
+
+
+def test_publish_sampled_variants(tmp_path, monkeypatch):
+    pool = tmp_path / 'pool.yml'
+    questions = [
+        {'question': f'Q{number}?', 'answers': [{'answer': f'A{slot}', 'rating': slot == 5} for slot in range(1, 7)]}
+        for number in range(1, 31)
+    ]
+    meta = {'scale': {'domain': 'text', 'range': 'binary'}, 'defaults': {'rating': False}}
+    model = {'id': 'pool', 'title': 'Pool', 'meta': meta}
+    pool.write_text(yaml.safe_dump({**model, 'questions': questions}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ['publish', str(pool), '--variants', '3', '--seed', '9'])
+    assert result.exit_code == 0
+    drawn = [json.loads(pathlib.Path('build', f'pool-v{number}.json').read_text()) for number in (1, 2, 3)]
+    assert all(len(quiz) == 10 and all(len(entry['options']) == 4 for entry in quiz) for quiz in drawn)
+    again = runner.invoke(app, ['publish', str(pool), '--variants', '3', '--seed', '9'])
+    assert again.exit_code == 0
+    assert json.loads(pathlib.Path('build', 'pool-v1.json').read_text()) == drawn[0]
+    assert runner.invoke(app, ['publish', str(pool), '--questions', '0']).exit_code == 2
+    assert runner.invoke(app, ['publish', str(pool), '--variants', '2', '-i']).exit_code == 2
+
+
+def test_log_format_unknown():
+    result = runner.invoke(app, ['--log-format', 'xml', 'verify', MINIMAL_MODEL_PATH])
+    assert result.exit_code == 2
+
+
+def test_publish_bundle(tmp_path, monkeypatch):
+    folder = pathlib.Path(TEST_PREFIX, 'use').resolve()
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ['publish', str(folder), '--bundle', 'quizzes.bundle'])
+    assert result.exit_code == 0
+    assert not list(pathlib.Path().glob('build/*.json'))
+    from visailu.bundle import Bundle
+
+    with Bundle('quizzes.bundle') as reader:
+        assert len(reader) == len(list(folder.glob('*.yml')))
+    assert runner.invoke(app, ['publish', str(folder), '--bundle', 'x.bundle', '--gzip']).exit_code == 2
+
+
+def test_validate_incremental(tmp_path, monkeypatch):
+    model = pathlib.Path(TEST_PREFIX, 'use', 'ten.yml').resolve()
+    monkeypatch.chdir(tmp_path)
+    for _ in range(2):
+        assert runner.invoke(app, ['validate', '-i', '--check-incremental', str(model)]).exit_code == 0
+    assert list(pathlib.Path('build', '.questions').glob('*.marshal'))
+    assert runner.invoke(app, ['validate', '-i', '--stream', str(model)]).exit_code == 2
+
+
+def test_validate_events_engine():
+    folder = pathlib.Path(TEST_PREFIX)
+    assert runner.invoke(app, ['validate', '--engine', 'events', str(folder / 'use')]).exit_code == 0
+    broken = str(folder / 'abuse' / 'model-many-errors.yml')
+    assert runner.invoke(app, ['validate', '--engine', 'events', '--fail-fast', broken]).exit_code == 1
+    assert runner.invoke(app, ['validate', '--engine', 'tree', broken]).exit_code == 2
+    assert runner.invoke(app, ['validate', '--fail-fast', broken]).exit_code == 2
+    assert runner.invoke(app, ['validate', '--engine', 'events', '--all-errors', broken]).exit_code == 2
+
+
+def test_profile_per_model_and_command(tmp_path, monkeypatch):
+    folder = pathlib.Path(TEST_PREFIX, 'use').resolve()
+    monkeypatch.chdir(tmp_path)
+    assert (
+        runner.invoke(app, ['publish', str(folder / 'ten.yml'), str(folder / 'minimal.yml'), '--profile']).exit_code
+        == 0
+    )
+    assert runner.invoke(app, ['cache-stats', '--profile']).exit_code == 0
+    names = sorted(path.name for path in pathlib.Path('build', 'profile').iterdir())
+    for label in ('_ten.yml', '_minimal.yml', 'cache-stats'):
+        assert [name.split(label, 1)[1] for name in names if label in name] == [
+            '.collapsed.txt',
+            '.memory.txt',
+            '.pstats',
+        ]
+
+
+def test_publish_hashed(tmp_path, monkeypatch):
+    folder = pathlib.Path(TEST_PREFIX, 'use').resolve()
+    monkeypatch.chdir(tmp_path)
+    assert runner.invoke(app, ['publish', str(folder), '--hashed']).exit_code == 0
+    manifest = json.loads(pathlib.Path('build', 'manifest.json').read_text())
+    assert len(manifest['quizzes']) == len(list(folder.glob('*.yml')))
+    assert not list(pathlib.Path('build').glob('ten.json'))
+    assert runner.invoke(app, ['publish', str(folder), '--hashed', '--gzip']).exit_code == 2
@@ -0,0 +1,59 @@
+import logging
+
+from visailu.collector import COLLECTORS, WarningCollector, collecting, warn
+
+
+def test_counts_and_capped_samples():
+    collector = WarningCollector('model.yml', limit=2)
+    for number in range(1, 6):
+        collector.warning('too few answers at question %d', number)
+    collector.warning('too many questions %d', 11)
+    assert len(collector) == 6
+    assert collector.counts() == {'too few answers at question %d': 5, 'too many questions %d': 1}
+    assert list(collector.lines()) == [
+        'too few answers at question 1',
+        'too few answers at question 2',
+        '3 more warnings like "too few answers at question 1" for model.yml',
+        'too many questions 11',
+    ]
+
+
+def test_formatting_is_lazy():
+    class Loud:
+        def __str__(self):
+            raise AssertionError('formatted')
+
+    collector = WarningCollector(limit=1)
+    collector.warning('value %s', Loud())
+    collector.warning('value %s', Loud())
+    assert len(collector) == 2
+
+
+def test_collecting_reports_aggregated(caplog):
+    caplog.set_level(logging.WARNING)
+    with collecting('model.yml', limit=1) as collector:
+        warn('question %d', 1)
+        warn('question %d', 2)
+        assert COLLECTORS == [collector]
+        assert not caplog.records
+    assert not COLLECTORS
+    assert [record.getMessage() for record in caplog.records] == [
+        'question 1',
+        '1 more warnings like "question 1" for model.yml',
+    ]
+    assert all(record.source == 'model.yml' for record in caplog.records)
+
+
+def test_warn_without_collector_logs(caplog):
+    caplog.set_level(logging.WARNING)
+    warn('question %d', 3)
+    assert caplog.records[0].getMessage() == 'question 3'
+
+
+def test_summary_without_samples(caplog):
+    caplog.set_level(logging.WARNING)
+    with collecting('model.yml', limit=0) as collector:
+        warn('question %d', 1)
+        warn('question %d', 2)
+    assert list(collector.lines()) == ['2 more warnings like "question %d" for model.yml']
+    assert [record.getMessage() for record in caplog.records] == ['2 more warnings like "question %d" for model.yml']
@@ -0,0 +1,45 @@
+import pytest
+
+from visailu.corpus import dump, fresh_copies, synthesize
+from visailu.validate import _validate, validate_path
+
+
+def test_synthesize_is_seeded():
+    assert synthesize(50, 4, seed=7) == synthesize(50, 4, seed=7)
+    assert synthesize(50, 4, seed=7) != synthesize(50, 4, seed=8)
+
+
+@pytest.mark.parametrize('scale_range', ['binary', 'percentage'])
+def test_synthesize_valid(scale_range):
+    model = synthesize(200, 5, overrides=0.25, scale_range=scale_range)
+    assert len(model['questions']) == 200
+    assert all(len(entry['answers']) == 5 for entry in model['questions'])
+    assert sum('meta' in entry for entry in model['questions']) == 50
+    assert _validate(model)[0] == 0
+
+
+def test_synthesize_overrides_use_other_range():
+    model = synthesize(20, 2, overrides=1)
+    assert {entry['meta']['scale']['range'] for entry in model['questions']} == {'percentage'}
+    assert _validate(model)[0] == 0
+
+
+def test_synthesize_unknown_range():
+    with pytest.raises(ValueError, match='unknown scale range'):
+        synthesize(1, 1, scale_range='stars')
+
+
+def test_fresh_copies_independent():
+    model = synthesize(3, 2)
+    first, second = fresh_copies(model, 2)
+    _validate(first)
+    assert first != model
+    assert second == model
+
+
+def test_dump_round_trip(tmp_path):
+    model = synthesize(30, 3, overrides=0.5)
+    path = dump(model, tmp_path / 'model.yml')
+    code, _, data = validate_path(str(path))
+    assert code == 0
+    assert data['questions'][0]['question'] == model['questions'][0]['question']
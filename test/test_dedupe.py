@@ -0,0 +1,89 @@
+import pathlib
+
+import yaml
+
+from visailu import dedupe
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+
+
+def _write(folder, name, questions):
+    model = {
+        'id': name,
+        'title': name,
+        'meta': {'scale': {'domain': 'text', 'range': 'binary'}, 'defaults': {'rating': False}},
+        'questions': [
+            {'question': text, 'answers': [{'answer': answer} for answer in answers]} for text, answers in questions
+        ],
+    }
+    path = folder / f'{name}.yml'
+    path.write_text(yaml.safe_dump(model), encoding='utf-8')
+    return str(path)
+
+
+def test_normalize_reuses_slugify():
+    assert dedupe.normalize('  What\n is   THIS? ') == 'what is this?'
+
+
+def test_exact_key_ignores_answer_order_and_whitespace():
+    assert dedupe.exact_key('q', ['a', 'b']) == dedupe.exact_key('q', ['b', 'a'])
+    assert dedupe.exact_key('q', ['a']) != dedupe.exact_key('q', ['a', 'b'])
+
+
+def test_signature_similarity():
+    text = 'which planet is known as the red planet mars venus jupiter saturn'
+    assert dedupe.similarity(dedupe.signature(text), dedupe.signature(text)) == 1
+    typo = dedupe.signature(text.replace('known', 'knwon'))
+    assert dedupe.similarity(dedupe.signature(text), typo) >= 0.7
+    other = dedupe.signature('who wrote the novel war and peace tolstoy dostoevsky gogol chekhov')
+    assert dedupe.similarity(dedupe.signature(text), other) < 0.2
+
+
+def test_exact_and_near_duplicates_across_files(tmp_path):
+    red = 'Which planet is known as the red planet?'
+    planets = ['Mars', 'Venus', 'Jupiter', 'Saturn']
+    first = _write(tmp_path, 'first', [(red, planets), ('Who wrote War and Peace?', ['Tolstoy', 'Gogol'])])
+    second = _write(tmp_path, 'second', [('Capital of Finland?', ['Helsinki', 'Turku']), (red, planets[::-1])])
+    third = _write(
+        tmp_path, 'third', [(' which  planet is KNWON as the red planet? ', ['mars', 'venus', 'jupiter', 'saturn'])]
+    )
+    index = {'format': dedupe.FORMAT, 'files': {}}
+    assert dedupe.update(index, [first, second, third]) == {'reused': 0, 'indexed': 3, 'failed': 0, 'dropped': 0}
+    exact, near = dedupe.duplicates(index)
+    assert exact == [[(first, 1), (second, 2)]]
+    assert [(pair[1], pair[2]) for pair in near] == [((first, 1), (third, 1))]
+
+
+def test_index_persisted_and_incremental(tmp_path):
+    questions = [('Capital of Finland?', ['Helsinki', 'Turku'])]
+    first = _write(tmp_path, 'first', questions)
+    second = _write(tmp_path, 'second', questions)
+    index_path = tmp_path / 'index' / 'index.marshal'
+    index = dedupe.load_index(index_path)
+    dedupe.update(index, [first, second])
+    dedupe.save_index(index, index_path)
+
+    index = dedupe.load_index(index_path)
+    assert dedupe.update(index, [first, second])['reused'] == 2
+    pathlib.Path(second).unlink()
+    third = _write(tmp_path, 'third', [('Capital of Sweden?', ['Stockholm', 'Oslo'])])
+    assert dedupe.update(index, [first, third]) == {'reused': 1, 'indexed': 1, 'failed': 0, 'dropped': 1}
+    assert dedupe.duplicates(index) == ([], [])
+
+
+def test_broken_index_and_models(tmp_path):
+    index_path = tmp_path / 'index.marshal'
+    index_path.write_bytes(b'not marshal')
+    index = dedupe.load_index(index_path)
+    assert index == {'format': dedupe.FORMAT, 'files': {}}
+    broken = tmp_path / 'broken.yml'
+    broken.write_text('a: b: c\n', encoding='utf-8')
+    assert dedupe.update(index, [str(broken)])['failed'] == 1
+
+
+def test_fixtures_share_questions():
+    index = {'format': dedupe.FORMAT, 'files': {}}
+    paths = [str(USE_PREFIX / 'ten.yml'), str(USE_PREFIX / 'eleven.yml')]
+    dedupe.update(index, paths)
+    exact, _ = dedupe.duplicates(index, paths)
+    assert len(exact) == 10
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import json
+import logging
+import pathlib
+
+from visailu import etags
+from visailu.corpus import dump, synthesize
+from visailu.publish import publish_path
+from visailu.sample import SamplePlan
+from visailu.writer import write_hashed
+
+
+def _publish(path, **options):
+    code, message, _ = publish_path(str(path), options={'hashed': True, 'target': 'bank', **options})
+    assert code == 0, message
+    return etags.aggregate('build')
+
+
+def _manifest():
+    return json.loads(pathlib.Path('build', etags.MANIFEST_NAME).read_text(encoding='utf-8'))
+
+
+def test_write_hashed_names_by_content(tmp_path):
+    questions = [{'id': 1, 'question': 'Q', 'options': []}]
+    plain, packed = write_hashed(questions, tmp_path / 'quiz')
+    content = plain.path.read_bytes()
+    assert plain.digest == hashlib.sha256(content).hexdigest()
+    assert plain.path.name == f'quiz.{plain.digest[:16]}.json'
+    assert packed.path.name == plain.path.name + '.gz'
+    assert gzip.decompress(packed.path.read_bytes()) == content
+    again, again_packed = write_hashed(questions, tmp_path / 'quiz')
+    assert (again, again_packed) == (plain, packed)  # Deterministic sidecar (fixed level and mtime)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [plain.path.name, packed.path.name]
+
+
+def test_manifest_tracks_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = synthesize(5, 3)
+    dump(model, 'bank.yml')
+    dump(synthesize(4, 3, seed=7), 'other.yml')
+    _publish('bank.yml')
+    assert _publish('other.yml')[1] == 2
+    first = _manifest()['quizzes']['synthetic-42']
+    assert first['size'] == pathlib.Path('build', first['file']).stat().st_size
+    assert first['etag'] == f'"{hashlib.sha256(pathlib.Path("build", first["file"]).read_bytes()).hexdigest()[:32]}"'
+    assert first['gzip']['size'] == pathlib.Path('build', first['gzip']['file']).stat().st_size
+
+    _publish('bank.yml')
+    assert _manifest()['quizzes']['synthetic-42'] == first
+
+    model['questions'][0]['question'] += ' changed'
+    dump(model, 'bank.yml')
+    _publish('bank.yml')
+    changed = _manifest()['quizzes']['synthetic-42']
+    assert changed['file'] != first['file'] and changed['etag'] != first['etag']
+    assert not pathlib.Path('build', first['file']).exists()
+    assert not pathlib.Path('build', first['gzip']['file']).exists()
+
+    pathlib.Path('other.yml').unlink()
+    assert etags.aggregate('build')[1] == 1
+    assert list(_manifest()['quizzes']) == ['synthetic-42']
+    assert sorted(path.name for path in pathlib.Path('build').glob('*.json*')) == sorted(
+        [changed['file'], changed['gzip']['file'], etags.MANIFEST_NAME]
+    )
+
+
+def test_variants_and_duplicate_ids(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    dump(synthesize(12, 4), 'pool.yml')
+    _publish('pool.yml', sample=SamplePlan(3, 2, variants=2))
+    assert sorted(_manifest()['quizzes']) == ['synthetic-42-v1', 'synthetic-42-v2']
+    dump(synthesize(12, 4), 'twin.yml')
+    caplog.set_level(logging.WARNING)
+    publish_path('twin.yml', options={'hashed': True, 'target': 'bank', 'sample': SamplePlan(3, 2, variants=2)})
+    etags.aggregate('build')
+    assert 'quiz id synthetic-42-v1 of model at' in caplog.text
+    assert etags.aggregate('build')[1] == 2
+
+
+def test_incremental_skips_keep_manifest_entries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dump(synthesize(5, 3), 'bank.yml')
+    _publish('bank.yml', incremental=True)
+    code, message, _ = publish_path('bank.yml', options={'hashed': True, 'target': 'bank', 'incremental': True})
+    assert message.startswith('skipped unchanged')
+    assert list(etags.aggregate('build')[0].parent.glob('bank.*.json.gz'))
+    assert list(_manifest()['quizzes']) == ['synthetic-42']
+
+
+def test_same_stem_sources_share_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = synthesize(5, 3)
+    for folder in ('a', 'b'):
+        pathlib.Path(folder).mkdir()
+        dump(model, pathlib.Path(folder, 'bank.yml'))
+        _publish(str(pathlib.Path(folder, 'bank.yml')))
+    shared = _manifest()['quizzes']['synthetic-42']
+    model['questions'][0]['question'] += ' changed'
+    dump(model, pathlib.Path('a', 'bank.yml'))
+    _publish(str(pathlib.Path('a', 'bank.yml')))
+    assert pathlib.Path('build', shared['file']).is_file()
+    assert pathlib.Path('build', shared['gzip']['file']).is_file()
+    pathlib.Path('a', 'bank.yml').unlink()
+    etags.aggregate('build')
+    assert _manifest()['quizzes']['synthetic-42'] == shared
+    assert pathlib.Path('build', shared['file']).is_file()
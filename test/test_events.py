@@ -0,0 +1,180 @@
+import pathlib
+import random
+import tracemalloc
+
+import pytest
+
+from visailu.corpus import dump, synthesize
+from visailu.events import model_events_path, validate_events_path
+from visailu.model import from_validated
+from visailu.publish import etl, publish_path
+from visailu.validate import validate_path
+
+FIXTURES = sorted(str(path) for path in pathlib.Path('test', 'fixtures', 'basic').glob('*/*.yml'))
+
+
+def _outcome(path, options):
+    try:
+        return validate_path(path, options=options)[:2]
+    except Exception as err:  # noqa - multiple documents raise like the object based path
+        return type(err).__name__, str(err)
+
+
+def _assert_same(path, **options):
+    objects = _outcome(path, {'cache': False, **options, 'engine': 'objects'})
+    assert _outcome(path, {**options, 'engine': 'events'}) == objects
+    return objects
+
+
+@pytest.mark.parametrize('yaml_loader', ['python', 'c'])
+@pytest.mark.parametrize('path', FIXTURES)
+def test_fixtures_match_objects(path, yaml_loader):
+    _assert_same(path, yaml_loader=yaml_loader)
+
+
+def _mutate(model, rng, kind):
+    questions = model['questions']
+    slot = rng.randrange(len(questions))
+    if kind == 0:
+        questions[slot]['answers'][0]['rating'] = 'broken'
+    elif kind == 1:
+        del questions[slot]['answers']
+    elif kind == 2:
+        questions[slot]['answers'] = [{'answer': 'only', 'rating': True}]
+    elif kind == 3:
+        questions[slot]['meta'] = {'scale': {'domain': 'text', 'range': 'unknown'}}
+    elif kind == 4:
+        questions[slot] = 'no mapping'
+    elif kind == 5:
+        del model['meta']['defaults']
+    elif kind == 6:
+        model['title'] = ''
+    elif kind == 7:
+        questions[slot]['answers'][1]['rating'] = 42
+    elif kind == 8:
+        for option in questions[slot]['answers']:
+            option['rating'] = False
+    else:
+        model['questions'] = []
+
+
+@pytest.mark.parametrize('kind', range(10))
+def test_mutated_corpora_match_objects(tmp_path, kind):
+    rng = random.Random(kind)
+    for seed in range(3):
+        model = synthesize(25, 4, overrides=0.3, seed=seed)
+        _mutate(model, rng, kind)
+        _assert_same(str(dump(model, tmp_path / f'model-{seed}.yml')))
+
+
+def test_questions_before_header(tmp_path):
+    model = synthesize(5, 3)
+    reordered = {'questions': model['questions'], 'meta': model['meta'], 'title': model['title'], 'id': model['id']}
+    path = str(dump(reordered, tmp_path / 'reordered.yml'))
+    assert _assert_same(path) == (0, '')
+    reordered['meta'] = {'scale': {'domain': 'text', 'range': 'binary'}, 'defaults': {'rating': 7}}
+    assert _assert_same(str(dump(reordered, tmp_path / 'reordered.yml')))[0] == 1
+
+
+def test_anchors_aliases_and_duplicate_keys(tmp_path):
+    path = tmp_path / 'aliased.yml'
+    path.write_text(
+        'id: aliased\n'
+        'title: Aliased\n'
+        'meta: &scale\n'
+        '  scale: {domain: text, range: binary}\n'
+        '  defaults: {rating: false}\n'
+        'questions:\n'
+        '  - question: &text Which one?\n'
+        '    meta: *scale\n'
+        '    answers: &pair\n'
+        '      - {answer: this, rating: true}\n'
+        '      - {answer: that}\n'
+        '  - {question: *text, answers: *pair}\n',
+        encoding='utf-8',
+    )
+    assert _assert_same(str(path)) == (0, '')
+    path.write_text(path.read_text(encoding='utf-8') + 'title: Twice\n', encoding='utf-8')
+    _assert_same(str(path))
+
+
+def test_fail_fast_stops_at_first_violation(tmp_path):
+    model = synthesize(20, 4)
+    model['questions'][2]['answers'][0]['rating'] = 'broken'
+    path = dump(model, tmp_path / 'broken.yml')
+    path.write_text(path.read_text(encoding='utf-8') + 'extra: `tick\n', encoding='utf-8')
+    assert (
+        validate_path(str(path), options={'engine': 'events'})[1] == 'is invalid yaml or the resource is inaccessible'
+    )
+    code, message, data = validate_events_path(str(path), options={'fail_fast': True})
+    assert (code, message, data) == (1, 'contains an invalid range value for the scale', None)
+
+
+def _peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_is_bounded_by_one_question(tmp_path):
+    small = str(dump(synthesize(200, 4), tmp_path / 'small.yml'))
+    large = str(dump(synthesize(4000, 4), tmp_path / 'large.yml'))
+    options = {'cache': False, 'engine': 'events'}
+    assert validate_path(large, options=options) == (0, '', None)
+    events_small = _peak(lambda: validate_path(small, options=options))
+    events_large = _peak(lambda: validate_path(large, options=options))
+    objects_large = _peak(lambda: validate_path(large, options={'cache': False}))
+    assert events_large < 2 * events_small
+    assert events_large * 10 < objects_large
+
+
+def _assert_same_model(path):
+    code, message, data = validate_path(path, options={'cache': False})
+    outcome = model_events_path(path, {})
+    assert outcome[:2] == (code, message)
+    if code != 0:
+        assert outcome[2] is None
+        return
+    quiz, expected = outcome[2], from_validated(data)
+    assert (quiz.id, quiz.title, quiz.scale) == (expected.id, expected.title, expected.scale)
+    assert [question.scale for question in quiz] == [question.scale for question in expected]
+    assert list(etl(quiz, 'bank')) == list(etl(expected, 'bank'))
+
+
+@pytest.mark.parametrize('path', [path for path in FIXTURES if 'stream' not in path])
+def test_model_matches_objects(path):
+    _assert_same_model(path)
+
+
+def test_model_of_reordered_and_aliased_models(tmp_path):
+    model = synthesize(30, 4, overrides=0.3, scale_range='percentage')
+    reordered = {'questions': model['questions'], 'meta': model['meta'], 'title': model['title'], 'id': model['id']}
+    _assert_same_model(str(dump(reordered, tmp_path / 'reordered.yml')))
+    path = tmp_path / 'aliased.yml'
+    path.write_text(
+        'id: aliased\n'
+        'title: Aliased\n'
+        'questions:\n'
+        '  - question: Which one?\n'
+        '    answers: &pair\n'
+        '      - {answer: this, rating: true}\n'
+        '      - {answer: that}\n'
+        '  - {question: Which other?, answers: *pair}\n'
+        'meta: {scale: {domain: text, range: binary}, defaults: {rating: false}}\n',
+        encoding='utf-8',
+    )
+    _assert_same_model(str(path))
+
+
+def test_publish_without_cache_does_not_hold_the_parsed_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(dump(synthesize(4000, 4), tmp_path / 'large.yml'))
+    options = {'collect': False}
+    events = _peak(lambda: publish_path(path, {**options, 'cache': False}))
+    events_json = (tmp_path / 'build' / 'large.json').read_bytes()
+    objects = _peak(lambda: publish_path(path, {**options, 'cache': True}))
+    assert (tmp_path / 'build' / 'large.json').read_bytes() == events_json
+    assert events * 3 < objects
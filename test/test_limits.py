@@ -0,0 +1,143 @@
+import io
+
+import pytest
+import yaml
+
+from visailu import (
+    LIMIT_ALIASES_EXCEEDED,
+    LIMIT_BYTES_EXCEEDED,
+    LIMIT_DEPTH_EXCEEDED,
+    LIMIT_DOCUMENTS_EXCEEDED,
+    LIMIT_NODES_EXCEEDED,
+    LIMIT_SECONDS_EXCEEDED,
+)
+from visailu.api import validate
+from visailu.limits import (
+    GUARDED,
+    TRUSTED,
+    LimitExceeded,
+    Limits,
+    configured,
+    guarded_loader,
+    limits_of,
+    nesting_bound,
+)
+from visailu.validate import MESSAGE_CONSTANTS, diagnose_path, validate_path, validate_stream
+from visailu.verify import HAS_LIBYAML, load, verify_path
+
+LEVELS = 'abcdefghi'
+LAUGHS = (
+    'a: &a ['
+    + ', '.join(['"lol"'] * 10)
+    + ']\n'
+    + ''.join(
+        f'{name}: &{name} [' + ', '.join([f'*{LEVELS[level - 1]}'] * 10) + ']\n'
+        for level, name in enumerate(LEVELS)
+        if level
+    )
+)
+
+
+def _write(tmp_path, text, name='model.yml'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('yaml_loader', ['python', 'c'])
+def test_deep_nesting_is_rejected_before_composing(tmp_path, yaml_loader):
+    path = _write(tmp_path, '[' * 100_000 + ']' * 100_000)
+    code, message, _ = validate_path(path, options={'yaml_loader': yaml_loader})
+    assert (code, message) == (1, LIMIT_DEPTH_EXCEEDED)
+    code, message, _ = verify_path(path, options={'yaml_loader': yaml_loader})
+    assert code == 1 and 'at line 1, column 65' in message
+
+
+@pytest.mark.parametrize('yaml_loader', ['python', 'c'])
+def test_billion_laughs_stop_at_alias_limit(tmp_path, yaml_loader):
+    path = _write(tmp_path, LAUGHS)
+    untrusted = {'untrusted': True, 'yaml_loader': yaml_loader}
+    assert validate_path(path, options=untrusted)[:2] == (1, LIMIT_ALIASES_EXCEEDED)
+    assert validate_path(path, options={**untrusted, 'engine': 'events'})[1] == LIMIT_ALIASES_EXCEEDED
+    assert validate_path(path, options={**untrusted, 'limits': {'aliases': 0}})[1] != (LIMIT_ALIASES_EXCEEDED)
+
+
+def test_each_limit_has_its_message(tmp_path):
+    model = _write(tmp_path, 'id: x\ntitle: y\nquestions: [[1, 2], [3, 4]]\n')
+    cases = {
+        'bytes': LIMIT_BYTES_EXCEEDED,
+        'depth': LIMIT_DEPTH_EXCEEDED,
+        'nodes': LIMIT_NODES_EXCEEDED,
+        'seconds': LIMIT_SECONDS_EXCEEDED,
+    }
+    tight = {'bytes': 10, 'depth': 2, 'nodes': 5, 'seconds': 1e-9}
+    for limit, message in cases.items():
+        code, text, _ = validate_path(model, options={'limits': {limit: tight[limit]}})
+        assert (code, text) == (1, message)
+        assert MESSAGE_CONSTANTS[message] == f'LIMIT_{limit.upper()}_EXCEEDED'
+    assert len(set(cases.values()) | {LIMIT_ALIASES_EXCEEDED, LIMIT_DOCUMENTS_EXCEEDED}) == 6
+
+
+def test_documents_limit_applies_to_streams(tmp_path):
+    path = _write(tmp_path, '---\na: 1\n---\na: 2\n---\na: 3\n')
+    results = list(validate_stream(path, options={'limits': {'documents': 2}}))
+    assert [message for _, _, message, _ in results][-1] == LIMIT_DOCUMENTS_EXCEEDED
+    assert len(results) == 3
+
+
+def test_diagnostics_and_api_report_limits(tmp_path):
+    path = _write(tmp_path, LAUGHS)
+    code, diagnostics, _ = diagnose_path(path, options={'untrusted': True})
+    assert code == 1
+    assert diagnostics[0].constant == 'LIMIT_ALIASES_EXCEEDED'
+    assert diagnostics[0].line is not None
+    assert validate('[[[1]]]', options={'limits': {'depth': 2}})[:2] == (1, LIMIT_DEPTH_EXCEEDED)
+    assert validate(LAUGHS)[:2] == (1, LIMIT_ALIASES_EXCEEDED)
+
+
+def test_aliases_count_the_expanded_nodes():
+    text = 'base: &b {x: 1}\nitems: [*b, *b, *b]\n'  # Three aliases of three nodes each
+    assert load(text, options={'limits': {'aliases': 9}})['items'][2] == {'x': 1}
+    with pytest.raises(LimitExceeded):
+        load(text, options={'limits': {'aliases': 8}})
+
+
+def test_limits_of_options():
+    assert limits_of({'untrusted': True}) == Limits()
+    assert limits_of({'untrusted': True, 'limits': {'depth': 3}}) == Limits(depth=3)
+    assert limits_of({'limits': {'depth': 3}}).depth == 3
+    assert limits_of({'limits': Limits(bytes=1)}).bytes == 1
+
+
+def test_trusted_sources_are_only_limited_in_depth(monkeypatch):
+    assert limits_of() == TRUSTED == Limits(bytes=0, documents=0, nodes=0, aliases=0, seconds=0)
+    assert limits_of({'limits': {'nodes': 5}}).bytes == 0
+    assert not configured('nodes')
+    monkeypatch.setenv('VISAILU_LIMIT_NODES', '5')
+    assert configured('nodes')
+
+
+def test_nesting_bound():
+    assert nesting_bound('a:\n  b:\n  - [1, {c: 2}]\n') == 2 + 2 * 16 + 2
+    assert nesting_bound(b'- ' * 20 + b'x') == 2 * 256 + 2
+    assert nesting_bound('\r' + ' ' * 256 + 'x') is None
+    assert nesting_bound('[' * 2000 + ']' * 2000) is None
+    handle = io.StringIO('a:\n  b: 1\n')
+    handle.read(2)
+    assert nesting_bound(handle) == 34 and handle.tell() == 0
+
+
+@pytest.mark.skipif(not HAS_LIBYAML, reason='needs libyaml')
+def test_trusted_sources_compose_with_libyaml(tmp_path):
+    text = 'a: 1\n'
+    assert type(guarded_loader(yaml.CSafeLoader, text, TRUSTED)) is not GUARDED[yaml.CSafeLoader]
+    assert type(guarded_loader(yaml.CSafeLoader, text, Limits())) is GUARDED[yaml.CSafeLoader]
+    assert type(guarded_loader(yaml.CSafeLoader, text, TRUSTED, events=True)) is GUARDED[yaml.CSafeLoader]
+    assert type(guarded_loader(yaml.CSafeLoader, '[' * 5000, TRUSTED)) is GUARDED[yaml.CSafeLoader]
+    deep = ('- ' * 70 + 'x\n', 'a:\n  b: ' + '[' * 70 + ']' * 70 + '\n')
+    shared = 'a: &a [' + '[' * 40 + ']' * 40 + ']\nb:\n' + '  ' * 30 + '- *a\n'  # Aliases are not nested again
+    for text in (*deep, shared):
+        path = _write(tmp_path, text)
+        messages = {verify_path(path, options={'yaml_loader': loader})[1] for loader in ('c', 'python')}
+        assert len(messages) == 1
+        assert ('exceeds the nesting depth limit' in messages.pop()) is (text in deep)
@@ -0,0 +1,139 @@
+import contextlib
+import io
+import json
+import logging
+import logging.handlers
+import pathlib
+import threading
+import time
+
+import visailu
+from visailu import logs
+from visailu.batch import expand, run
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+
+
+def _record(**extra):
+    record = logging.LogRecord('VISAILU', logging.WARNING, __file__, 1, 'question %d', (3,), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_format():
+    entry = json.loads(logs.formatter_of('json').format(_record(source='model.yml')))
+    assert entry['level'] == 'WARNING'
+    assert entry['logger'] == 'VISAILU'
+    assert entry['message'] == 'question 3'
+    assert entry['source'] == 'model.yml'
+    assert 'source' not in json.loads(logs.formatter_of('json').format(_record()))
+
+
+def test_text_format():
+    assert logs.formatter_of('text').format(_record()).endswith('WARNING [VISAILU]: question 3')
+
+
+def test_unknown_format():
+    try:
+        logs.formatter_of('xml')
+    except ValueError as err:
+        assert 'unknown log format (xml)' in str(err)
+    else:
+        raise AssertionError('expected ValueError')
+
+
+def test_worker_records_reach_parent(caplog, tmp_path, monkeypatch):
+    caplog.set_level(logging.WARNING)
+    paths = [str((USE_PREFIX / name).resolve()) for name in ('minimal.yml', 'rococo.yml', 'eleven.yml')]
+    monkeypatch.chdir(tmp_path)
+    results = run('publish', expand(paths), jobs=2)
+    assert [code for _, code, _ in results] == [0, 0, 0]
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages.count('model with too few questions 1 instead of 10') == 2
+    assert 'model with too many questions 11 instead of 10' in messages
+    assert {record.source for record in caplog.records} == set(paths)
+
+
+def test_first_use_from_many_threads(monkeypatch):
+    lazy = visailu._LazyLogger()
+    monkeypatch.setattr(visailu, 'log', lazy)
+    calls = []
+    monkeypatch.setattr(visailu, 'init_logger', _counting(visailu.init_logger, calls))
+    barrier = threading.Barrier(8)
+    failures = []
+
+    def first_use():
+        barrier.wait()
+        try:
+            lazy.debug('first use')
+        except Exception as err:  # pragma: no cover
+            failures.append(err)
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+    assert len(calls) == 1
+
+
+@contextlib.contextmanager
+def _bare_root(monkeypatch):
+    """Provide the root logger without handlers (those of pytest are added per test phase and kept)."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    root.handlers.clear()
+    logs._stop()
+    monkeypatch.setattr(logs, '_handler', None)
+    try:
+        yield root
+    finally:
+        logs._stop()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+
+def test_configured_root_is_left_alone(monkeypatch):
+    host = logging.StreamHandler(io.StringIO())
+    with _bare_root(monkeypatch) as root:
+        logging.basicConfig(level=logging.ERROR, handlers=[host])
+        logs.start(logging.INFO)
+        assert root.handlers == [host]
+        assert root.level == logging.ERROR
+        assert logs._listener is None
+        logging.getLogger(visailu.APP_ENV).warning('below the level of the host')
+        logging.getLogger(visailu.APP_ENV).error('reported once')
+    assert host.stream.getvalue() == 'ERROR:VISAILU:reported once\n'
+
+
+def test_restarts_from_many_threads(monkeypatch):
+    barrier = threading.Barrier(8)
+    failures = []
+
+    def restart():
+        barrier.wait()
+        try:
+            logs.start(logging.WARNING)
+        except Exception as err:  # pragma: no cover
+            failures.append(err)
+
+    threads = [threading.Thread(target=restart) for _ in range(8)]
+    with _bare_root(monkeypatch) as root:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert failures == []
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0], logging.handlers.QueueHandler)
+        assert root.level == logging.WARNING
+
+
+def _counting(function, calls):
+    def counted(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.01)  # Widen the window for racing threads
+        return function(*args, **kwargs)
+
+    return counted
@@ -0,0 +1,90 @@
+import pathlib
+import shutil
+
+import pytest
+
+from visailu import manifest
+from visailu.corpus import dump, synthesize
+from visailu.publish import publish_path
+from visailu.sample import SamplePlan
+
+MINIMAL_MODEL_PATH = pathlib.Path('test', 'fixtures', 'basic', 'use', 'minimal.yml')
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'models' / 'quiz.yml'
+    source.parent.mkdir()
+    shutil.copy(pathlib.Path(__file__).parent.parent / MINIMAL_MODEL_PATH, source)
+    return source
+
+
+def test_incremental_publish_skips_unchanged(workspace):
+    options = {'incremental': True}
+    code, message, data = publish_path(str(workspace), options=options)
+    assert code == 0
+    assert message.startswith('published')
+    code, message, data = publish_path(str(workspace), options=options)
+    assert code == 0
+    assert message.startswith('skipped unchanged')
+    assert data is None
+
+
+def test_incremental_publish_detects_changes(workspace):
+    options = {'incremental': True}
+    publish_path(str(workspace), options=options)
+    workspace.write_text(workspace.read_text(encoding='utf-8').replace('Alphabet', 'Alphabetic'), encoding='utf-8')
+    code, message, data = publish_path(str(workspace), options=options)
+    assert message.startswith('published')
+    assert data[0]['options'][0]['answer'] == 'Alphabetic'
+
+
+def test_incremental_publish_invalid_forgets_entry(workspace):
+    options = {'incremental': True}
+    publish_path(str(workspace), options=options)
+    workspace.write_text('id: broken\n', encoding='utf-8')
+    code, _, _ = publish_path(str(workspace), options=options)
+    assert code == 1
+    assert manifest.load_entry('build', workspace) == {}
+
+
+def test_prune_removed_sources(workspace):
+    publish_path(str(workspace), options={'incremental': True})
+    target = pathlib.Path('build', 'quiz.json')
+    assert target.is_file()
+    assert manifest.prune('build') == []
+    workspace.unlink()
+    assert manifest.prune('build') == [str(target.resolve())]
+    assert not target.exists()
+    assert manifest.load_entry('build', workspace) == {}
+
+
+def test_same_stem_sources_do_not_share_targets(workspace):
+    other = workspace.parent.parent / 'others' / 'quiz.yml'
+    other.parent.mkdir()
+    other.write_text(workspace.read_text(encoding='utf-8').replace('Alphabet', 'Alphabetic'), encoding='utf-8')
+    options = {'incremental': True}
+    target = pathlib.Path('build', 'quiz.json')
+    publish_path(str(workspace), options=options)
+    publish_path(str(other), options=options)
+    assert 'Alphabetic' in target.read_text(encoding='utf-8')
+    code, message, _ = publish_path(str(workspace), options=options)
+    assert message.startswith('published')
+    assert 'Alphabetic' not in target.read_text(encoding='utf-8')
+    other.unlink()
+    assert manifest.prune('build') == []
+    assert target.is_file()
+
+
+def test_every_variant_is_recorded(workspace):
+    dump(synthesize(12, 4), workspace)
+    options = {'incremental': True, 'sample': SamplePlan(3, 2, variants=3)}
+    publish_path(str(workspace), options=options)
+    targets = [pathlib.Path('build', f'quiz-v{number}.json') for number in (1, 2, 3)]
+    recorded = manifest.load_entry('build', workspace)['targets']
+    assert [target['path'] for target in recorded] == [str(target.resolve()) for target in targets]
+    targets[2].unlink()
+    assert publish_path(str(workspace), options=options)[1].startswith('published')
+    workspace.unlink()
+    assert manifest.prune('build') == [str(target.resolve()) for target in targets]
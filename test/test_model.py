@@ -0,0 +1,93 @@
+import array
+import copy
+import gc
+import pathlib
+import tracemalloc
+import weakref
+
+import pytest
+import yaml
+
+from visailu.corpus import synthesize
+from visailu.model import Answer, Quiz, Scale, from_validated
+from visailu.publish import etl
+from visailu.validate import _validate
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+
+
+def _validated(path):
+    with path.open('rt', encoding='utf-8') as handle:
+        return _validate(yaml.safe_load(handle))[2]
+
+
+@pytest.mark.parametrize('name', ['minimal', 'rococo', 'ten', 'eleven', 'questions-answers-counts-differing'])
+def test_export_identical(name):
+    data = _validated(pathlib.Path(USE_PREFIX, f'{name}.yml'))
+    expected = list(etl(copy.deepcopy(data), 'bank'))
+    assert list(etl(from_validated(data), 'bank')) == expected
+
+
+@pytest.mark.parametrize('scale_range', ['binary', 'percentage'])
+def test_export_identical_synthetic(scale_range):
+    data = _validate(synthesize(300, 5, overrides=0.3, scale_range=scale_range))[2]
+    expected = list(etl(copy.deepcopy(data), 'bank'))
+    assert list(etl(from_validated(data, release=True), 'bank')) == expected
+
+
+def test_compact_ratings_and_interned_scales():
+    quiz = from_validated(_validate(synthesize(50, 4, overrides=0.2))[2])
+    assert isinstance(quiz, Quiz)
+    binary = [question for question in quiz if question.scale is quiz.scale]
+    percentage = [question for question in quiz if question.scale is not quiz.scale]
+    assert len(binary) == 40 and len(percentage) == 10
+    assert all(isinstance(question.ratings, array.array) for question in binary)
+    assert all(isinstance(question.ratings, tuple) for question in percentage)
+    assert len({id(question.scale) for question in percentage}) == 1
+    assert quiz.scale is Scale.intern(bool, [False, True], False)
+
+
+def test_scales_are_interned_only_while_used():
+    quiz = from_validated(_validate(synthesize(20, 4, scale_range='percentage'))[2])
+    used = weakref.ref(quiz.scale)
+    assert used() in Scale._interned.values()
+    del quiz
+    gc.collect()
+    assert used() is None
+    assert all(scale.maps_to != (0, 100) for scale in Scale._interned.values())
+
+
+def test_read_access_by_model_keys():
+    quiz = from_validated(_validated(pathlib.Path(USE_PREFIX, 'minimal.yml')))
+    question = quiz['questions'][0]
+    assert question['question'] == 'ABC stands for ...?'
+    assert question['answers'][2] == Answer('A Bogus Car', True)
+    assert question['answers'][0]['rating'] is False
+    assert len(question) == 4
+    with pytest.raises(KeyError):
+        question['meta']
+
+
+def test_release_drops_parsed_questions():
+    data = _validate(synthesize(5, 2))[2]
+    quiz = from_validated(data, release=True)
+    assert len(quiz) == 5
+    assert data['questions'] == [None] * 5
+
+
+def test_model_retains_less_memory():
+    data = _validate(synthesize(2000, 4))[2]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        parsed = copy.deepcopy(data)
+        gc.collect()
+        parsed_size, _ = tracemalloc.get_traced_memory()
+        quiz = from_validated(parsed, release=True)
+        del parsed
+        gc.collect()
+        model_size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(quiz) == 2000
+    assert model_size < parsed_size / 2
@@ -0,0 +1,88 @@
+import contextlib
+import pathlib
+import pstats
+import threading
+import tracemalloc
+
+from visailu.batch import process
+from visailu.profiling import Session, StackSampler, label_of, profiled
+
+TEST_PREFIX = pathlib.Path('test', 'fixtures', 'basic')
+
+
+def _busy():
+    return sum(len(str(number)) for number in range(200_000))
+
+
+def test_session_writes_the_three_reports(tmp_path):
+    with Session('some/model.yml', tmp_path) as session:
+        _busy()
+    assert session.label == 'some_model.yml'
+    stats = pstats.Stats(str(tmp_path / 'some_model.yml.pstats'))
+    assert any(name == '_busy' for _, _, name in stats.stats)
+    memory = (tmp_path / 'some_model.yml.memory.txt').read_text(encoding='utf-8').splitlines()
+    assert memory[0].startswith('peak ') and memory[1].startswith('top ')
+    for line in (tmp_path / 'some_model.yml.collapsed.txt').read_text(encoding='utf-8').splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack and int(count) > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_sampler_collects_collapsed_stacks():
+    sampler = StackSampler(interval=0.0005)
+    sampler.start()
+    _busy()
+    sampler.stop()
+    assert sampler.counts
+    assert any('_busy (test_profiling.py:' in stack for stack in sampler.counts)
+
+
+def test_one_session_at_a_time(tmp_path):
+    threads_before = threading.active_count()
+    with Session('first', tmp_path) as first:
+        skipped = []
+
+        def overlap():
+            with Session('second', tmp_path) as second:
+                skipped.append(not second.active and threading.active_count() == threads_before + 2)
+
+        thread = threading.Thread(target=overlap)
+        thread.start()
+        thread.join()
+        _busy()
+    assert first.active is False and skipped == [True]
+    assert [path.name for path in tmp_path.glob('*.pstats')] == ['first.pstats']
+    assert not tracemalloc.is_tracing()
+    with Session('third', tmp_path):
+        pass
+    assert (tmp_path / 'third.pstats').is_file()
+
+
+def test_session_skips_when_another_profiler_is_active(tmp_path, monkeypatch):
+    session = Session('busy', tmp_path)
+
+    def refuse():
+        raise ValueError('Another profiling tool is already active')
+
+    monkeypatch.setattr(session.profiler, 'enable', refuse)
+    with session:
+        _busy()
+    assert not session.active
+    assert not tracemalloc.is_tracing()
+    assert list(tmp_path.iterdir()) == []
+    with Session('after', tmp_path):
+        pass
+    assert (tmp_path / 'after.pstats').is_file()
+
+
+def test_batch_process_profiles_per_model(tmp_path):
+    paths = [str(path) for path in sorted((TEST_PREFIX / 'use').glob('*.yml'))[:2]]
+    for path in paths:
+        assert process('validate', path, {'profile': str(tmp_path)})[0][1] == 0
+    assert sorted(path.name for path in tmp_path.glob('*.pstats')) == sorted(f'{label_of(p)}.pstats' for p in paths)
+
+
+def test_profiled_without_option_does_nothing():
+    assert isinstance(profiled({}, 'x'), contextlib.nullcontext)
+    assert isinstance(profiled({'profile': True}, 'x'), Session)
+    assert label_of('../a b/c.yml') == 'a_b_c.yml'
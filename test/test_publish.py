@@ -0,0 +1,62 @@
+import inspect
+import json
+import pathlib
+
+import pytest
+import yaml
+
+from visailu.publish import PROFILES, TargetProfile, etl, publish_path, register_profile
+from visailu.validate import _validate
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+ONE_MORE_MODEL_PATH = pathlib.Path(USE_PREFIX, 'eleven.yml')
+
+
+def _model(path):
+    with path.open('rt', encoding='utf-8') as handle:
+        return _validate(yaml.safe_load(handle))[2]
+
+
+def test_etl_is_lazy():
+    questions = etl(_model(ONE_MORE_MODEL_PATH))
+    assert inspect.isgenerator(questions)
+    assert next(questions)['id'] == 1
+
+
+def test_etl_naive_profile_limits(caplog):
+    assert len(list(etl(_model(ONE_MORE_MODEL_PATH)))) == 10
+    assert 'model with too many questions 11 instead of 10' in caplog.text
+
+
+def test_etl_bank_profile_unbounded(caplog):
+    assert [question['id'] for question in etl(_model(ONE_MORE_MODEL_PATH), 'bank')] == list(range(1, 12))
+    assert not caplog.records
+
+
+def test_etl_registered_profile():
+    def question_only(id_export, entry):
+        return {'q': entry['question']}
+
+    register_profile(TargetProfile('questions-only', 2, None, question_only))
+    try:
+        assert list(etl(_model(ONE_MORE_MODEL_PATH), 'questions-only')) == [
+            {'q': 'ABC1 stands for ...?'},
+            {'q': 'ABC2 stands for ...?'},
+        ]
+    finally:
+        del PROFILES['questions-only']
+
+
+def test_etl_unknown_profile():
+    with pytest.raises(ValueError, match='unknown target profile'):
+        list(etl(_model(ONE_MORE_MODEL_PATH), 'no-such-profile'))
+
+
+def test_publish_path_without_collecting(tmp_path, monkeypatch):
+    source = (pathlib.Path.cwd() / ONE_MORE_MODEL_PATH).resolve()
+    monkeypatch.chdir(tmp_path)
+    code, _, quiz = publish_path(str(source), options={'collect': False, 'target': 'bank'})
+    assert code == 0
+    assert quiz is None
+    with (tmp_path / 'build' / 'eleven.json').open('rt', encoding='utf-8') as handle:
+        assert len(json.load(handle)) == 11
@@ -0,0 +1,107 @@
+import copy
+import logging
+import marshal
+import pathlib
+import random
+
+import pytest
+
+from visailu.corpus import dump, synthesize
+from visailu.publish import publish_path
+from visailu.revalidate import Revalidation, state_path
+from visailu.validate import validate_path
+
+
+def _drop_default_ratings(model):
+    for entry in model['questions'][::3]:
+        for option in entry['answers']:
+            if option.get('rating') in (False, 0):
+                del option['rating']
+    return model
+
+
+def _edit(model, rng, step):
+    questions = model['questions']
+    slot = rng.randrange(len(questions))
+    kind = step % 7
+    if kind == 0:
+        questions[slot]['question'] += ' edited'
+    elif kind == 1:
+        questions[slot]['answers'][0]['rating'] = 'broken'
+    elif kind == 2:
+        questions.insert(slot, copy.deepcopy(questions[-1]))
+    elif kind == 3:
+        del questions[slot]
+    elif kind == 4:
+        model['meta']['defaults']['rating'] = not model['meta']['defaults']['rating']
+    elif kind == 5:
+        questions[slot]['meta'] = copy.deepcopy(model['meta'])
+    else:
+        questions[slot]['answers'].append({'answer': 'extra'})
+
+
+def _assert_same_as_full(path, options):
+    incremental = validate_path(path, options={**options, 'incremental': True})
+    assert incremental == validate_path(path, options=options)
+    if incremental[0] != 0:
+        return
+    publish_path(path, options={**options, 'incremental': True, 'collect': False})
+    text = pathlib.Path('build', 'bank.json').read_bytes()
+    publish_path(path, options={**options, 'collect': False})
+    assert text == pathlib.Path('build', 'bank.json').read_bytes()
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_edits_match_full_runs(tmp_path, monkeypatch, compact):
+    monkeypatch.chdir(tmp_path)
+    rng = random.Random(5)
+    model = _drop_default_ratings(synthesize(60, 4, overrides=0.2))
+    options = {'cache': False, 'compact': compact, 'target': 'bank'}
+    for step in range(14):
+        dump(model, 'bank.yml')
+        _assert_same_as_full('bank.yml', options)
+        _edit(model, rng, step)
+        if step % 7 == 1:  # Keep the broken rating for one run only
+            model = _drop_default_ratings(synthesize(60, 4, overrides=0.2, seed=step))
+
+
+def test_unchanged_questions_are_reused(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    model = synthesize(30, 4)
+    dump(model, 'bank.yml')
+    validate_path('bank.yml', options={'incremental': True})
+    model['questions'][3]['question'] += ' edited'
+    dump(model, 'bank.yml')
+    revalidation = Revalidation('bank.yml')
+    assert len(revalidation.state['questions']) == 30
+    caplog.set_level(logging.DEBUG)
+    validate_path('bank.yml', options={'incremental': True})
+    assert 'revalidated 1 and reused 29 questions' in caplog.text
+
+
+def test_texts_reused_and_version_change_drops_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = synthesize(10, 4)
+    dump(model, 'bank.yml')
+    publish_path('bank.yml', options={'incremental': True, 'target': 'bank'})
+    state = Revalidation('bank.yml').state
+    assert len(state['texts']) == 10 and state['settings']['target'] == 'bank'
+    validate_path('bank.yml', options={'incremental': True})
+    assert Revalidation('bank.yml').state['texts'] == state['texts']  # Validation keeps the texts
+    monkeypatch.setattr('visailu.revalidate.VERSION', 'other')
+    assert Revalidation('bank.yml').state == {}
+
+
+def test_check_incremental_detects_stale_state(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    model = synthesize(10, 4)
+    dump(model, 'bank.yml')
+    validate_path('bank.yml', options={'incremental': True})
+    revalidation = Revalidation('bank.yml')
+    key = next(iter(revalidation.state['questions']))
+    revalidation.state['questions'][key] = ('tampered',) * 4
+    state_path('bank.yml').write_bytes(marshal.dumps(revalidation.state))
+    options = {'incremental': True, 'check_incremental': True}
+    assert validate_path('bank.yml', options=options) == validate_path('bank.yml', options={})
+    assert 'differs from the full run' in caplog.text
+    assert not state_path('bank.yml').exists()
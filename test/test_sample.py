@@ -0,0 +1,146 @@
+import random
+import tracemalloc
+
+import pytest
+
+from visailu.collector import collecting
+from visailu.corpus import dump, synthesize
+from visailu.events import sample_events_path
+from visailu.sample import SamplePlan, reservoirs, rngs_of, sample_answers, variants
+from visailu.validate import validate_path
+
+
+def _pool(questions=30, answers=6):
+    return {
+        'id': 'pool',
+        'title': 'Pool',
+        'questions': [
+            {
+                'question': f'Q{number}?',
+                'answers': [
+                    {'answer': f'A{number}.{slot}', 'rating': slot == answers} for slot in range(1, answers + 1)
+                ],
+            }
+            for number in range(1, questions + 1)
+        ],
+    }
+
+
+def test_reservoirs_single_pass_in_input_order():
+    drawn = reservoirs(iter(range(1000)), 10, rngs_of(SamplePlan(10, 4, seed=42, variants=3)))
+    assert len(drawn) == 3
+    for sample in drawn:
+        assert len(sample) == 10 == len(set(sample))
+        assert sample == sorted(sample)
+    assert drawn[0] != drawn[1]
+
+
+def test_reservoirs_reproducible_per_seed():
+    plan = SamplePlan(5, None, seed='topic')
+    assert reservoirs(range(100), 5, rngs_of(plan)) == reservoirs(range(100), 5, rngs_of(plan))
+    assert reservoirs(range(100), 5, rngs_of(plan)) != reservoirs(range(100), 5, rngs_of(plan._replace(seed=1)))
+
+
+def test_reservoirs_small_pool_and_all():
+    assert reservoirs(range(3), 5, [random.Random(0)]) == [[0, 1, 2]]
+    assert reservoirs(range(3), None, [random.Random(0)]) == [[0, 1, 2]]
+
+
+def test_reservoirs_uniform():
+    counts = [0] * 10
+    rng = random.Random(7)
+    for _ in range(2000):
+        for item in reservoirs(range(10), 3, [rng])[0]:
+            counts[item] += 1
+    assert all(500 < count < 700 for count in counts)
+
+
+def test_reservoirs_weighted():
+    weights = {0: 50.0, 1: 0, 2: -1}
+    rng = random.Random(3)
+    hits = [0] * 10
+    for _ in range(500):
+        for item in reservoirs(range(10), 2, [rng], weight=lambda item: weights.get(item, 1.0))[0]:
+            hits[item] += 1
+    assert hits[0] > 450
+    assert hits[1] == hits[2] == 0
+
+
+def test_sample_answers_keeps_a_correct_answer():
+    answers = _pool(1, 8)['questions'][0]['answers']
+    rng = random.Random(11)
+    for _ in range(100):
+        drawn = sample_answers(answers, 3, rng)
+        assert len(drawn) == 3
+        assert any(option['rating'] for option in drawn)
+        assert drawn == [option for option in answers if option in drawn]
+
+
+def test_variants_leave_data_unchanged():
+    data = _pool()
+    quizzes = variants(data, SamplePlan(10, 4, seed=1, variants=4))
+    assert len(data['questions']) == 30
+    assert all(len(entry['answers']) == 6 for entry in data['questions'])
+    assert [len(quiz['questions']) for quiz in quizzes] == [10] * 4
+    assert all(len(entry['answers']) == 4 for quiz in quizzes for entry in quiz['questions'])
+    assert len({tuple(entry['question'] for entry in quiz['questions']) for quiz in quizzes}) == 4
+
+
+def test_variants_weighted_by_question_key():
+    data = _pool()
+    data['questions'][6]['weight'] = 1000
+    data['questions'][7]['weight'] = 'heavy'
+    with collecting('pool.yml') as collector:
+        quizzes = variants(data, SamplePlan(5, 4, seed=2, variants=20, weighted=True))
+    assert collector.counts() == {'ignoring question with non-numeric %s (%r) for sampling': 1}
+    assert all('Q7?' in [entry['question'] for entry in quiz['questions']] for quiz in quizzes)
+    assert all('Q8?' not in [entry['question'] for entry in quiz['questions']] for quiz in quizzes)
+
+
+@pytest.mark.parametrize(
+    'plan',
+    [
+        SamplePlan(5, 3, seed=7),
+        SamplePlan(5, 2, seed='x', variants=3),
+        SamplePlan(None, None),
+        SamplePlan(8, 3, seed=1, variants=2, weighted=True),
+    ],
+)
+def test_event_stream_draws_like_the_parsed_pool(tmp_path, plan):
+    model = synthesize(40, 5, overrides=0.3)
+    for slot, entry in enumerate(model['questions']):
+        entry['weight'] = slot % 4
+    path = str(dump(model, tmp_path / 'pool.yml'))
+    expected = variants(validate_path(path)[2], plan)
+    assert sample_events_path(path, plan) == (0, '', expected)
+    reordered = {'questions': model['questions'], 'title': model['title'], 'meta': model['meta'], 'id': model['id']}
+    assert sample_events_path(str(dump(reordered, tmp_path / 'reordered.yml')), plan) == (0, '', expected)
+
+
+def test_event_stream_sampling_falls_back_and_rejects(tmp_path):
+    plan = SamplePlan(2, 2, seed=3)
+    anchored = tmp_path / 'anchored.yml'
+    text = dump(synthesize(12, 3), anchored).read_text(encoding='utf-8')
+    anchored.write_text(text.replace('questions:\n', 'questions: &all\n'), encoding='utf-8')  # Needs the objects
+    expected = variants(validate_path(str(anchored))[2], plan)
+    assert sample_events_path(str(anchored), plan) == (0, '', expected)
+    broken = tmp_path / 'broken.yml'
+    broken.write_text('id: b\nquestions:\n  - question: Q?\n    answers: []\n', encoding='utf-8')
+    assert sample_events_path(str(broken), plan) == (*validate_path(str(broken))[:2], None)
+
+
+def test_event_stream_sampling_keeps_only_the_sample(tmp_path):
+    path = str(dump(synthesize(600, 4), tmp_path / 'pool.yml'))
+    plan = SamplePlan(10, 3, seed=5)
+
+    def peak(function):
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    streamed = peak(lambda: sample_events_path(path, plan))
+    parsed = peak(lambda: variants(validate_path(path)[2], plan))
+    assert streamed * 5 < parsed
@@ -0,0 +1,97 @@
+import http.client
+import json
+import pathlib
+import threading
+import time
+
+import pytest
+
+from visailu import INVALID_YAML_RESOURCE, MODEL_VALUES_MISSING
+from visailu.serve import handle, make_server
+
+TEST_PREFIX = pathlib.Path('test', 'fixtures', 'basic')
+MINIMAL_MODEL_PATH = pathlib.Path(TEST_PREFIX, 'use', 'minimal.yml')
+MINIMAL_QUIZ_PATH = pathlib.Path(TEST_PREFIX, 'use', 'minimal.json')
+
+
+@pytest.fixture
+def server():
+    server = make_server(port=0, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    try:
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_handle_publish():
+    status, document = handle('publish', MINIMAL_MODEL_PATH.read_bytes())
+    with MINIMAL_QUIZ_PATH.open('rt', encoding='utf-8') as handle_:
+        assert (status, document) == (200, {'code': 0, 'message': '', 'data': json.load(handle_)})
+
+
+def test_handle_invalid():
+    assert handle('validate', b'id: only\n') == (422, {'code': 1, 'message': MODEL_VALUES_MISSING})
+    assert handle('validate', b'a: b: c') == (422, {'code': 1, 'message': INVALID_YAML_RESOURCE})
+    status, document = handle('verify', b'a: b: c')
+    assert (status, document['code']) == (422, 1)
+    assert 'is not a valid YAML file' in document['message']
+
+
+def test_serve_endpoints_and_metrics(server):
+    body = MINIMAL_MODEL_PATH.read_bytes()
+    assert _request(server, 'POST', '/verify', body) == (200, {'code': 0, 'message': ''})
+    assert _request(server, 'POST', '/validate?loader=python', body) == (200, {'code': 0, 'message': ''})
+    status, document = _request(server, 'POST', '/publish?target=bank', body)
+    assert (status, len(document['data'])) == (200, 1)
+    assert _request(server, 'POST', '/publish?target=nope', body)[0] == 400
+    assert _request(server, 'POST', '/nope', body)[0] == 404
+    status, metrics = _request(server, 'GET', '/metrics')
+    assert status == 200
+    assert metrics['endpoints']['/verify']['count'] == 1
+    assert metrics['endpoints']['/publish']['status'] == {'200': 1, '400': 1}
+    assert metrics['endpoints']['/validate']['latency_ms_mean'] > 0
+
+
+def test_serve_profiles_requests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    profiled_server = make_server(port=0, workers=1, profile=True)
+    thread = threading.Thread(target=profiled_server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = (pathlib.Path(__file__).parent / 'fixtures' / 'basic' / 'use' / 'minimal.yml').read_bytes()
+        assert _request(profiled_server, 'POST', '/validate', body)[0] == 200
+    finally:
+        profiled_server.shutdown()
+        profiled_server.server_close()
+        thread.join()
+    assert pathlib.Path('build', 'profile', 'validate-1.pstats').is_file()
+
+
+def test_idle_clients_do_not_hold_workers(server):
+    idle = []
+    for _ in range(server.workers):
+        connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+        connection.request('GET', '/health')
+        response = connection.getresponse()
+        response.read()
+        assert response.getheader('Connection') == 'close'
+        idle.append(connection)  # Left open by the client
+    try:
+        start = time.perf_counter()
+        assert _request(server, 'GET', '/health') == (200, {'status': 'ok'})
+        assert time.perf_counter() - start < 1
+    finally:
+        for connection in idle:
+            connection.close()
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+import visailu
+from visailu.__main__ import main
+
+PROBE = 'import sys, {module}; print(" ".join(sorted(m for m in {heavy!r} if m in sys.modules)))'
+
+
+def loaded_after_import(module, heavy):
+    run = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=heavy)], capture_output=True, text=True, check=True
+    )
+    return run.stdout.split()
+
+
+def test_package_import_defers_heavy_modules():
+    assert loaded_after_import('visailu', ('logging', 'typer', 'yaml')) == []
+
+
+def test_cli_import_defers_processing_modules():
+    heavy = ('concurrent.futures.process', 'http.server', 'visailu.batch', 'visailu.serve', 'visailu.watch', 'yaml')
+    assert loaded_after_import('visailu.cli', heavy) == []
+
+
+def test_main_version_fast_path(capsys):
+    assert main(['--version']) == 0
+    assert capsys.readouterr().out.strip() == f'{visailu.APP_NAME} version {visailu.__version__}'
+
+
+def test_main_version_fast_path_skips_typer():
+    probe = 'import sys; from visailu.__main__ import main; main(["version"]); print("typer" in sys.modules)'
+    run = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+    assert run.stdout.splitlines() == [f'{visailu.APP_NAME} version {visailu.__version__}', 'False']
@@ -0,0 +1,56 @@
+import json
+import pathlib
+
+from visailu import INVALID_YAML_RESOURCE, MODEL_VALUES_MISSING
+from visailu.publish import publish_stream
+from visailu.validate import validate_stream
+from visailu.verify import verify_path, verify_stream
+
+STREAM_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'stream')
+BROKEN_STREAM_PATH = pathlib.Path(STREAM_PREFIX, 'broken.yml')
+MIXED_STREAM_PATH = pathlib.Path(STREAM_PREFIX, 'mixed.yml')
+EMPTY_MODEL_PATH = pathlib.Path('test', 'fixtures', 'basic', 'abuse', 'empty.yml')
+MINIMAL_MODEL_PATH = pathlib.Path('test', 'fixtures', 'basic', 'use', 'minimal.yml')
+
+
+def test_verify_stream_yields_every_document():
+    results = list(verify_stream(str(MIXED_STREAM_PATH)))
+    assert [(index, code) for index, code, _, _ in results] == [(1, 0), (2, 0), (3, 0)]
+    assert [data['id'] for _, _, _, data in results] == ['some-id-minimal', 'some-id', 'some-id-rococo']
+
+
+def test_verify_stream_single_document_matches_verify_path():
+    (_, code, message, data), *rest = list(verify_stream(str(MINIMAL_MODEL_PATH)))
+    assert not rest
+    assert (code, message, data) == verify_path(str(MINIMAL_MODEL_PATH))
+
+
+def test_verify_stream_empty():
+    assert list(verify_stream(str(EMPTY_MODEL_PATH))) == [(1, 0, '', None)]
+
+
+def test_verify_stream_stops_at_invalid_yaml_with_identical_details():
+    for loader in ('c', 'python'):
+        results = list(verify_stream(str(BROKEN_STREAM_PATH), options={'yaml_loader': loader}))
+        assert [(index, code) for index, code, _, _ in results] == [(1, 0), (2, 1)]
+        assert 'is not a valid YAML file. Details: mapping values are not allowed here' in results[1][2]
+
+
+def test_validate_stream():
+    results = list(validate_stream(str(MIXED_STREAM_PATH)))
+    assert [(index, code, message) for index, code, message, _ in results] == [
+        (1, 0, ''),
+        (2, 1, MODEL_VALUES_MISSING),
+        (3, 0, ''),
+    ]
+    assert list(validate_stream(str(BROKEN_STREAM_PATH)))[-1][1:3] == (1, INVALID_YAML_RESOURCE)
+
+
+def test_publish_stream_one_target_per_document(tmp_path, monkeypatch):
+    source = (pathlib.Path.cwd() / MIXED_STREAM_PATH).resolve()
+    monkeypatch.chdir(tmp_path)
+    results = list(publish_stream(str(source)))
+    assert [code for _, code, _, _ in results] == [0, 1, 0]
+    assert sorted(path.name for path in (tmp_path / 'build').iterdir()) == ['mixed-1.json', 'mixed-3.json']
+    with (tmp_path / 'build' / 'mixed-3.json').open('rt', encoding='utf-8') as handle:
+        assert json.load(handle) == results[2][3]
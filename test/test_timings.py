@@ -0,0 +1,84 @@
+import json
+import pathlib
+
+from visailu import timings
+from visailu.api import publish
+from visailu.batch import expand, run
+from visailu.timings import OBSERVERS, Aggregate, StageRecord, observing, timed_iter
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+TEN_MODEL_PATH = pathlib.Path(USE_PREFIX, 'ten.yml')
+
+
+def test_no_observers_by_default():
+    assert OBSERVERS == []
+
+
+def test_stages_of_in_memory_publish():
+    records = []
+    with observing(records.append):
+        publish(TEN_MODEL_PATH.read_text(encoding='utf-8'))
+    assert [record.stage for record in records] == ['verify', 'validate', 'etl']
+    assert records[0].counters == {'documents': 1, 'bytes_read': TEN_MODEL_PATH.stat().st_size}
+    assert records[1].counters == {'questions': 10, 'answers': 40}
+    assert records[2].counters == {'questions': 10, 'answers': 40}
+    assert all(record.seconds >= 0 for record in records)
+    assert OBSERVERS == []
+
+
+def test_stages_of_publish_path(tmp_path, monkeypatch):
+    model = TEN_MODEL_PATH.resolve()
+    monkeypatch.chdir(tmp_path)
+    aggregate = Aggregate()
+    with observing(aggregate):
+        run('publish', expand([str(model)]), {'cache': True})
+    stages = aggregate.ordered()
+    assert list(stages) == ['cache', 'verify', 'validate', 'etl', 'write']
+    assert stages['write']['bytes_written'] == len(pathlib.Path('build', 'ten.json').read_bytes())
+
+
+def test_stages_of_publish_path_on_the_event_stream(tmp_path, monkeypatch):
+    model = TEN_MODEL_PATH.resolve()
+    monkeypatch.chdir(tmp_path)
+    aggregate = Aggregate()
+    with observing(aggregate):
+        run('publish', expand([str(model)]), {'cache': False})
+    stages = aggregate.ordered()
+    assert list(stages) == ['validate', 'etl', 'write']
+    assert stages['validate']['bytes_read'] == model.stat().st_size
+
+
+def test_parallel_workers_replay_records():
+    aggregate = Aggregate()
+    with observing(aggregate):
+        run('validate', expand([str(USE_PREFIX)]), jobs=2)
+    models = len(list(USE_PREFIX.glob('*.yml')))
+    assert aggregate.stages['verify']['calls'] == models
+    assert aggregate.stages['verify']['documents'] == models
+
+
+def test_timed_iter_emits_once_when_closed():
+    records = []
+    with observing(records.append):
+        items = timed_iter('etl', iter(range(5)), lambda item: {'items': 1}, {'extra': 2})
+        assert next(items) == 0
+        assert next(items) == 1
+        items.close()
+    assert records == [StageRecord('etl', records[0].seconds, {'extra': 2, 'items': 2})]
+
+
+def test_aggregate_reports():
+    aggregate = Aggregate()
+    aggregate(StageRecord('write', 0.002, {'bytes_written': 10}))
+    aggregate(StageRecord('verify', 0.001, {'documents': 1}))
+    aggregate(StageRecord('verify', 0.003, {'documents': 1}))
+    assert aggregate.report().splitlines() == [
+        'verify   calls=2 total=4.000 ms documents=2',
+        'write    calls=1 total=2.000 ms bytes_written=10',
+    ]
+    assert json.loads(aggregate.report('json'))['stages']['verify']['documents'] == 2
+
+
+def test_unregister_unknown_observer():
+    timings.unregister(print)
+    assert OBSERVERS == []
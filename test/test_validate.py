@@ -0,0 +1,104 @@
+import copy
+import pathlib
+
+import pytest
+import yaml
+
+from visailu import (
+    INVALID_YAML_RESOURCE,
+    MODEL_META_INVALID_DEFAULTS,
+    MODEL_META_INVALID_RANGE_VALUE,
+    MODEL_QUESTION_INVALID_RANGE,
+    MODEL_QUESTION_INVALID_RANGE_VALUE,
+    MODEL_STRUCTURE_UNEXPECTED,
+)
+from visailu.validate import ScaleChecker, _validate, diagnose, diagnose_path, validate_path
+
+TEST_PREFIX = pathlib.Path('test', 'fixtures', 'basic')
+INVALID_YAML_PATH = pathlib.Path(TEST_PREFIX, 'abuse', 'invalid-yaml.yml')
+MODEL_MANY_ERRORS_PATH = pathlib.Path(TEST_PREFIX, 'abuse', 'model-many-errors.yml')
+MODEL_MISSING_META_PATH = pathlib.Path(TEST_PREFIX, 'abuse', 'model-missing-meta.yml')
+ROCOCO_MODEL_PATH = pathlib.Path(TEST_PREFIX, 'use', 'rococo.yml')
+
+BINARY_META = {'scale': {'range': 'binary'}, 'defaults': {'rating': False}}
+PERCENTAGE_META = {'scale': {'range': 'percentage'}, 'defaults': {'rating': 100}}
+
+
+def test_scale_checker_binary():
+    checker = ScaleChecker(BINARY_META)
+    assert checker.message == ''
+    assert checker.check(True) == ''
+    assert checker.check('yes') == MODEL_QUESTION_INVALID_RANGE
+
+
+def test_scale_checker_percentage():
+    checker = ScaleChecker(PERCENTAGE_META)
+    assert checker.message == ''
+    assert checker.check(66.6667) == ''
+    for rating in (True, '50', 101, 10**400):
+        assert checker.check(rating) == MODEL_QUESTION_INVALID_RANGE_VALUE
+
+
+def test_scale_checker_invalid_meta():
+    assert ScaleChecker(None).message == MODEL_META_INVALID_DEFAULTS
+    assert ScaleChecker({'defaults': {'rating': 1}}).message == MODEL_META_INVALID_DEFAULTS
+    assert ScaleChecker({'scale': {'range': 'perc'}, 'defaults': {'rating': 101}}).message == (
+        MODEL_META_INVALID_RANGE_VALUE
+    )
+
+
+def test_validate_missing_meta():
+    with MODEL_MISSING_META_PATH.open('rt', encoding='utf-8') as handle:
+        data = yaml.safe_load(handle)
+    assert _validate(data)[:2] == (1, MODEL_META_INVALID_DEFAULTS)
+
+
+def test_validate_unexpected_question_structure():
+    data = {'id': 'x', 'title': 'y', 'meta': BINARY_META, 'questions': ['not a mapping']}
+    assert _validate(data)[:2] == (1, MODEL_STRUCTURE_UNEXPECTED)
+
+
+def test_validate_fills_in_defaults():
+    with ROCOCO_MODEL_PATH.open('rt', encoding='utf-8') as handle:
+        data = yaml.safe_load(handle)
+    code, _, completed = _validate(copy.deepcopy(data))
+    assert code == 0
+    assert [option['rating'] for option in completed['questions'][0]['answers']] == [100, 100, 66.6667, 100]
+
+
+def test_diagnose_path_collects_all_violations():
+    code, diagnostics, _ = diagnose_path(str(MODEL_MANY_ERRORS_PATH))
+    assert code == 1
+    assert [(d.constant, d.question, d.answer, d.line, d.column) for d in diagnostics] == [
+        ('MODEL_QUESTION_INVALID_RANGE', 1, 1, 13, 5),
+        ('MODEL_QUESTION_ANSWER_MISSING', 1, 3, 16, 5),
+        ('MODEL_QUESTION_INCOMPLETE', 2, None, 17, 3),
+        ('MODEL_META_INVALID_RANGE_VALUE', 3, None, 20, 5),
+    ]
+    assert diagnostics[0].message == MODEL_QUESTION_INVALID_RANGE
+
+
+def test_diagnose_first_matches_validate():
+    with MODEL_MANY_ERRORS_PATH.open('rt', encoding='utf-8') as handle:
+        data = yaml.safe_load(handle)
+    assert diagnose(copy.deepcopy(data))[0].message == _validate(data)[1]
+
+
+def test_diagnose_path_invalid_yaml_location():
+    code, diagnostics, _ = diagnose_path(str(INVALID_YAML_PATH))
+    assert code == 1
+    assert diagnostics[0][1:] == ('INVALID_YAML_RESOURCE', INVALID_YAML_RESOURCE, None, None, 1, 14)
+
+
+@pytest.mark.parametrize('questions, constant', [('', 'MODEL_VALUES_MISSING'), ('42', 'MODEL_STRUCTURE_UNEXPECTED')])
+def test_diagnose_path_questions_not_a_list(tmp_path, questions, constant):
+    path = tmp_path / 'model.yml'
+    path.write_text(f'id: x\ntitle: y\nquestions: {questions}\n', encoding='utf-8')
+    code, diagnostics, _ = diagnose_path(str(path))
+    assert code == 1
+    assert [diagnostic.constant for diagnostic in diagnostics] == [constant]
+    assert validate_path(str(path))[:2] == (1, diagnostics[0].message)
+
+
+def test_diagnose_path_valid():
+    assert diagnose_path(str(ROCOCO_MODEL_PATH))[:2] == (0, [])
@@ -0,0 +1,49 @@
+import pathlib
+
+import pytest
+import yaml
+
+import visailu.verify as verify
+from visailu.verify import load, select_loader, verify_path
+
+TEST_PREFIX = pathlib.Path('test', 'fixtures', 'basic')
+INVALID_YAML_PATH = pathlib.Path(TEST_PREFIX, 'abuse', 'invalid-yaml.yml')
+ROCOCO_MODEL_PATH = pathlib.Path(TEST_PREFIX, 'use', 'rococo.yml')
+
+
+def test_select_loader_python():
+    assert select_loader({'yaml_loader': 'python'}) is yaml.SafeLoader
+
+
+def test_select_loader_auto():
+    expected = yaml.CSafeLoader if verify.HAS_LIBYAML else yaml.SafeLoader
+    assert select_loader({'yaml_loader': 'auto'}) is expected
+    assert select_loader({'yaml_loader': 'no-such-loader'}) is expected
+
+
+def test_select_loader_c_without_libyaml(monkeypatch):
+    monkeypatch.setattr(verify, 'HAS_LIBYAML', False)
+    assert select_loader({'yaml_loader': 'c'}) is yaml.SafeLoader
+
+
+def test_select_loader_from_environment(monkeypatch):
+    monkeypatch.setattr(verify, 'YAML_LOADER', 'pure')
+    assert select_loader() is yaml.SafeLoader
+
+
+@pytest.mark.parametrize('loader', ['c', 'python'])
+def test_verify_path_loaders_agree_on_data(loader):
+    code, message, data = verify_path(str(ROCOCO_MODEL_PATH), options={'yaml_loader': loader})
+    assert code == 0
+    assert data == verify_path(str(ROCOCO_MODEL_PATH), options={'yaml_loader': 'python'})[2]
+
+
+def test_verify_path_loaders_agree_on_errors():
+    c_result = verify_path(str(INVALID_YAML_PATH), options={'yaml_loader': 'c'})
+    python_result = verify_path(str(INVALID_YAML_PATH), options={'yaml_loader': 'python'})
+    assert c_result[0] == 1
+    assert c_result == python_result
+
+
+def test_load_text():
+    assert load('a: [1, true]', options={'yaml_loader': 'c'}) == {'a': [1, True]}
@@ -0,0 +1,88 @@
+import pathlib
+import shutil
+
+from visailu import MODEL_VALUES_MISSING
+from visailu import batch
+from visailu.watch import difference, snapshot, watch
+
+MINIMAL_MODEL_PATH = pathlib.Path('test', 'fixtures', 'basic', 'use', 'minimal.yml')
+ROCOCO_MODEL_PATH = pathlib.Path('test', 'fixtures', 'basic', 'use', 'rococo.yml')
+
+
+def test_difference():
+    before = {'a.yml': (1, 10), 'b.yml': (1, 10), 'c.yml': (1, 10)}
+    after = {'a.yml': (1, 10), 'b.yml': (2, 10), 'd.yml': (1, 5)}
+    assert difference(before, after) == (['b.yml', 'd.yml'], ['c.yml'])
+
+
+def test_watch_processes_only_changed_models(tmp_path):
+    shutil.copy(MINIMAL_MODEL_PATH, tmp_path / 'minimal.yml')
+    shutil.copy(ROCOCO_MODEL_PATH, tmp_path / 'rococo.yml')
+    folder = str(tmp_path)
+    assert len(snapshot([folder])) == 2
+
+    edits = iter(
+        [
+            lambda: (tmp_path / 'rococo.yml').write_text('id: changed\n', encoding='utf-8'),
+            lambda: None,
+            lambda: (tmp_path / 'minimal.yml').unlink(),
+            lambda: None,
+        ]
+    )
+    results = []
+    watch(
+        [folder],
+        options={},
+        cycles=2,
+        report=results.append,
+        sleep=lambda _: next(edits, lambda: None)(),
+    )
+    assert results == [
+        (str(tmp_path / 'minimal.yml'), 0, ''),
+        (str(tmp_path / 'rococo.yml'), 0, ''),
+        (str(tmp_path / 'rococo.yml'), 1, MODEL_VALUES_MISSING),
+    ]
+
+
+def test_watch_without_initial_run(tmp_path):
+    shutil.copy(MINIMAL_MODEL_PATH, tmp_path / 'minimal.yml')
+    results = []
+    assert watch([str(tmp_path)], cycles=1, report=results.append, initial=False, sleep=lambda _: None) == 0
+    assert results == []
+
+
+def test_watch_survives_half_saved_models(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = tmp_path / 'minimal.yml'
+    shutil.copy(pathlib.Path(__file__).parent.parent / MINIMAL_MODEL_PATH, model)
+    text = model.read_text(encoding='utf-8')
+    edits = iter(
+        [
+            lambda: model.write_text('a: [1, 2\nb: c\n', encoding='utf-8'),
+            lambda: None,
+            lambda: model.write_text(text, encoding='utf-8'),
+            lambda: None,
+        ]
+    )
+    results = []
+    watch(
+        [str(model)],
+        action='publish',
+        options={'incremental': True},
+        cycles=2,
+        report=results.append,
+        sleep=lambda _: next(edits, lambda: None)(),
+    )
+    assert [code for _, code, _ in results] == [0, 1, 0]
+    assert (tmp_path / 'build' / 'minimal.json').is_file()
+
+
+def test_watch_reports_unexpected_failures(tmp_path, monkeypatch):
+    def explode(path, options=None):
+        raise OSError('gone')
+
+    monkeypatch.setitem(batch.ACTIONS, 'validate', explode)
+    shutil.copy(MINIMAL_MODEL_PATH, tmp_path / 'minimal.yml')
+    results = []
+    assert watch([str(tmp_path)], cycles=1, report=results.append, sleep=lambda _: None) == 1
+    assert results[0][1:] == (1, f'processing model at ({tmp_path / "minimal.yml"}) failed: OSError: gone')
@@ -0,0 +1,51 @@
+import gzip
+import json
+import pathlib
+
+import pytest
+
+from visailu.writer import json_chunks, write_quiz
+
+USE_PREFIX = pathlib.Path('test', 'fixtures', 'basic', 'use')
+QUIZ_PATHS = sorted(USE_PREFIX.glob('*.json'))
+
+
+def _quiz(path):
+    with path.open('rt', encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+@pytest.mark.parametrize('quiz_path', QUIZ_PATHS, ids=lambda path: path.name)
+def test_pretty_chunks_match_json_dump(quiz_path):
+    quiz = _quiz(quiz_path)
+    assert ''.join(json_chunks(iter(quiz))) == json.dumps(quiz, indent=2)
+
+
+@pytest.mark.parametrize('quiz', [[], [{'id': 1, 'question': 'Ä?\nB', 'options': []}]])
+def test_chunks_edge_cases(quiz):
+    assert ''.join(json_chunks(quiz)) == json.dumps(quiz, indent=2)
+    assert ''.join(json_chunks(quiz, compact=True)) == json.dumps(quiz, separators=(',', ':'))
+
+
+def test_write_quiz_compact_gzip(tmp_path):
+    quiz = _quiz(USE_PREFIX / 'ten.json')
+    target = tmp_path / 'ten.json.gz'
+    written = write_quiz(iter(quiz), target, compact=True, compress=True)
+    payload = gzip.decompress(target.read_bytes())
+    assert len(payload) == written
+    assert json.loads(payload) == quiz
+    assert [path.name for path in tmp_path.iterdir()] == ['ten.json.gz']
+
+
+def test_write_quiz_keeps_previous_content_on_failure(tmp_path):
+    target = tmp_path / 'quiz.json'
+    write_quiz([{'id': 1}], target)
+
+    def failing():
+        yield {'id': 2}
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        write_quiz(failing(), target)
+    assert json.loads(target.read_text(encoding='utf-8')) == [{'id': 1}]
+    assert [path.name for path in tmp_path.iterdir()] == ['quiz.json']
@@ -1,10 +1,12 @@
 """Quiz (Finnish: visailu) data operations."""
 
-import datetime as dti
-import logging
 import os
 import pathlib
-from typing import List, no_type_check
+import threading
+from typing import TYPE_CHECKING, List, no_type_check
+
+if TYPE_CHECKING:
+    import logging  # pragma: no cover
 
 # [[[fill git_describe()]]]
 __version__ = '2023.8.27+parent.gf8ac9e03'
@@ -20,14 +22,23 @@ DEBUG = bool(os.getenv(f'{APP_ENV}_DEBUG', ''))
 VERBOSE = bool(os.getenv(f'{APP_ENV}_VERBOSE', ''))
 QUIET = False
 STRICT = bool(os.getenv(f'{APP_ENV}_STRICT', ''))
+YAML_LOADER = os.getenv(f'{APP_ENV}_YAML_LOADER', 'auto').strip().lower()  # auto, c, or python
+CACHE_MAX_BYTES = int(os.getenv(f'{APP_ENV}_CACHE_MAX_BYTES', str(64 << 20)))  # bound of the parsed model cache
 ENCODING = 'utf-8'
 ENCODING_ERRORS_POLICY = 'ignore'
 DEFAULT_CONFIG_NAME = f'.{APP_ALIAS}.json'
-log = logging.getLogger()  # Module level logger is sufficient
 LOG_FOLDER = pathlib.Path('logs')
 LOG_FILE = f'{APP_ALIAS}.log'
 LOG_PATH = pathlib.Path(LOG_FOLDER, LOG_FILE) if LOG_FOLDER.is_dir() else pathlib.Path(LOG_FILE)
-LOG_LEVEL = logging.INFO
+LOG_LEVEL = 20  # logging.INFO (the logging package is only imported on first use of the logger)
+LOG_FORMAT = os.getenv(f'{APP_ENV}_LOG_FORMAT', 'text').strip().lower()  # text or json
+WARNINGS_SAMPLE = int(os.getenv(f'{APP_ENV}_WARNINGS_SAMPLE', '10'))  # warnings shown per kind and model in batches
+LIMIT_BYTES = int(os.getenv(f'{APP_ENV}_LIMIT_BYTES', str(32 << 20)))  # hard limits on parsing sources (0 is unlimited)
+LIMIT_DOCUMENTS = int(os.getenv(f'{APP_ENV}_LIMIT_DOCUMENTS', '10000'))
+LIMIT_DEPTH = int(os.getenv(f'{APP_ENV}_LIMIT_DEPTH', '64'))
+LIMIT_NODES = int(os.getenv(f'{APP_ENV}_LIMIT_NODES', '4000000'))
+LIMIT_ALIASES = int(os.getenv(f'{APP_ENV}_LIMIT_ALIASES', '100000'))  # nodes reached through aliases
+LIMIT_SECONDS = float(os.getenv(f'{APP_ENV}_LIMIT_SECONDS', '60'))  # wall-clock budget per source
 
 TS_FORMAT_LOG = '%Y-%m-%dT%H:%M:%S'
 TS_FORMAT_PAYLOADS = '%Y-%m-%d %H:%M:%S.%f UTC'
@@ -39,8 +50,19 @@ VERSION_INFO = __version_info__
 OUT_QUESTION_COUNT = 10
 OUT_ANSWERS_COUNT = 4
 
+# local service defaults (here so the command line interface need not import the server to show them):
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8080
+SERVE_WORKERS = 4
+
 # messages registry:
 INVALID_YAML_RESOURCE = 'is invalid yaml or the resource is inaccessible'
+LIMIT_ALIASES_EXCEEDED = 'exceeds the limit of alias expansions'
+LIMIT_BYTES_EXCEEDED = 'exceeds the size limit in bytes'
+LIMIT_DEPTH_EXCEEDED = 'exceeds the nesting depth limit'
+LIMIT_DOCUMENTS_EXCEEDED = 'exceeds the limit of documents'
+LIMIT_NODES_EXCEEDED = 'exceeds the limit of nodes'
+LIMIT_SECONDS_EXCEEDED = 'exceeds the time budget for parsing'
 MODEL_META_INVALID_DEFAULTS = 'contains invalid defaults for scale in meta'
 MODEL_META_INVALID_RANGE = 'contains an invalid range of scale in meta'
 MODEL_META_INVALID_RANGE_VALUE = 'contains an invalid default value for the scale'
@@ -57,11 +79,25 @@ __all__: List[str] = [
     'APP_ALIAS',
     'APP_ENV',
     'APP_NAME',
+    'CACHE_MAX_BYTES',
     'DEBUG',
     'DEFAULT_CONFIG_NAME',
     'DEFAULT_STRUCTURE_NAME',
     'ENCODING',
     'INVALID_YAML_RESOURCE',
+    'LIMIT_ALIASES',
+    'LIMIT_ALIASES_EXCEEDED',
+    'LIMIT_BYTES',
+    'LIMIT_BYTES_EXCEEDED',
+    'LIMIT_DEPTH',
+    'LIMIT_DEPTH_EXCEEDED',
+    'LIMIT_DOCUMENTS',
+    'LIMIT_DOCUMENTS_EXCEEDED',
+    'LIMIT_NODES',
+    'LIMIT_NODES_EXCEEDED',
+    'LIMIT_SECONDS',
+    'LIMIT_SECONDS_EXCEEDED',
+    'LOG_FORMAT',
     'MODEL_META_INVALID_DEFAULTS',
     'MODEL_META_INVALID_RANGE',
     'MODEL_META_INVALID_RANGE_VALUE',
@@ -74,6 +110,11 @@ __all__: List[str] = [
     'MODEL_VALUES_MISSING',
     'OUT_QUESTION_COUNT',
     'OUT_ANSWERS_COUNT',
+    'SERVE_HOST',
+    'SERVE_PORT',
+    'SERVE_WORKERS',
+    'WARNINGS_SAMPLE',
+    'YAML_LOADER',
     'log',
 ]
 
@@ -86,24 +127,38 @@ def slugify(text: str) -> str:
 @no_type_check
 def formatTime_RFC3339(self, record, datefmt=None):  # noqa
     """HACK A DID ACK we could inject .astimezone() to localize ..."""
+    import datetime as dti
+
     return dti.datetime.fromtimestamp(record.created, dti.timezone.utc).isoformat()  # pragma: no cover
 
 
 @no_type_check
 def init_logger(name=None, level=None):
-    """Initialize module level logger"""
+    """Initialize module level logger (writing through a queue and a listener thread to stderr)"""
     global log  # pylint: disable=global-statement
+    import logging
+
+    from visailu.logs import start
 
-    log_format = {
-        'format': '%(asctime)s %(levelname)s [%(name)s]: %(message)s',
-        'datefmt': TS_FORMAT_LOG,
-        # 'filename': LOG_PATH,
-        'level': LOG_LEVEL if level is None else level,
-    }
     logging.Formatter.formatTime = formatTime_RFC3339
-    logging.basicConfig(**log_format)
+    start(LOG_LEVEL if level is None else level, LOG_FORMAT)
     log = logging.getLogger(APP_ENV if name is None else name)
     log.propagate = True
 
 
-init_logger(name=APP_ENV, level=logging.DEBUG if DEBUG else None)
+class _LazyLogger:
+    """Stand-in for the module level logger that initializes the logging on first use (not at import)."""
+
+    __slots__ = ()
+
+    @no_type_check
+    def __getattr__(self, name):
+        if isinstance(log, _LazyLogger):
+            with _LOG_LOCK:  # Threads logging first at the same time initialize once
+                if isinstance(log, _LazyLogger):
+                    init_logger(name=APP_ENV, level=10 if DEBUG else None)  # 10 is logging.DEBUG
+        return getattr(log, name)
+
+
+_LOG_LOCK = threading.Lock()
+log: 'logging.Logger' = _LazyLogger()  # type: ignore[assignment]  # Module level logger is sufficient
@@ -1,6 +1,23 @@
 import sys
+from typing import Optional
+
+from visailu import APP_NAME, __version__ as APP_VERSION
+
+VERSION_REQUESTS = (['version'], ['-V'], ['--version'])
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Answer version requests without importing the command line machinery and delegate everything else."""
+    args = sys.argv[1:] if argv is None else argv
+    if args in VERSION_REQUESTS:
+        print(f'{APP_NAME} version {APP_VERSION}')
+        return 0
+
+    from visailu.cli import app
+
+    code: int = app(args=args, prog_name='visailu')  # pragma: no cover
+    return code  # pragma: no cover
 
-from visailu.cli import app
 
 if __name__ == '__main__':
-    sys.exit(app(prog_name='visailu'))  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
@@ -0,0 +1,67 @@
+"""Flat API to verify, validate, and publish models held in memory without reading or writing any files.
+
+Sources are YAML as text, bytes, or file-like objects (text or binary) or models already parsed into a dict.
+All functions return the (code, message, data) triplet known from the path based functions and never raise for
+invalid YAML (like parser or constructor errors of untrusted uploads).
+Sources are untrusted (option untrusted defaults to True) and thus parsed within all default limits (see
+visailu.limits).
+"""
+
+from typing import IO, Any, Union, no_type_check
+
+from visailu.model import from_validated
+from visailu.publish import exported
+from visailu.validate import _validate
+from visailu.verify import failure_message, verify_source
+
+DEFAULT_LABEL = '<memory>'
+
+SourceType = Union[str, bytes, IO[str], IO[bytes], dict[str, Any]]
+
+
+@no_type_check
+def verify(source: SourceType, options=None, label: str = DEFAULT_LABEL) -> tuple[int, str, Any]:
+    """Verify the source is valid YAML and provide the parsed data (dicts pass as is).
+
+    The label names the source in messages.
+    """
+    if isinstance(source, dict):
+        return 0, '', source
+    return verify_source(source, label, options={'untrusted': True, **(options or {})})
+
+
+@no_type_check
+def validate(source: SourceType, options=None, label: str = DEFAULT_LABEL) -> tuple[int, str, Any]:
+    """Validate the source against the model.
+
+    Like validate_path the data is completed in place (default ratings) - pass a copy to keep a dict unchanged.
+    """
+    code, message, data = verify(source, options=options, label=label)
+    if code != 0:
+        return code, failure_message(message), data
+
+    return _validate(data)
+
+
+@no_type_check
+def publish(source: SourceType, options=None, label: str = DEFAULT_LABEL) -> tuple[int, str, Any]:
+    """Validate the source and provide the exported questions of the target profile (option target) as data.
+
+    With option sample (a SamplePlan) the questions are drawn from the source and more than one variant are provided
+    as list of quizzes.
+    """
+    if options is None:
+        options = {}
+    code, message, data = validate(source, options=options, label=label)
+    if code != 0:
+        return code, message, data
+
+    plan = options.get('sample')
+    if plan:
+        from visailu.sample import variants  # only needed for sampling
+
+        quizzes = [list(exported(from_validated(variant), options.get('target'))) for variant in variants(data, plan)]
+        return 0, '', quizzes if len(quizzes) > 1 else quizzes[0]
+
+    model = data if isinstance(source, dict) else from_validated(data, release=True)  # Callers keep their dicts
+    return 0, '', list(exported(model, options.get('target')))
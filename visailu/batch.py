@@ -0,0 +1,187 @@
+"""Batch processing of many models (paths, directories, and glob patterns) optionally across a process pool."""
+
+import glob
+import json
+import os
+import pathlib
+from typing import Any, Iterable, no_type_check
+
+from visailu import log
+from visailu.collector import collecting
+from visailu.profiling import profiled
+from visailu.publish import publish_path, publish_stream
+from visailu.timings import OBSERVERS, StageRecord, observing, replay
+from visailu.validate import diagnose_path, validate_path, validate_stream
+from visailu.verify import verify_path, verify_stream
+
+DOCUMENT_SUFFIXES = ('.yaml', '.yml')
+GLOB_MAGIC = ('*', '?', '[')
+
+
+@no_type_check
+def diagnose_report(path: str, options=None) -> tuple[int, str, Any]:
+    """Collect all violations of the model at path and report them as JSON lines in the message."""
+    code, diagnostics, data = diagnose_path(path, options=options)
+    lines = (json.dumps({'path': path, **diagnostic._asdict()}) for diagnostic in diagnostics)
+    return code, '\n'.join(lines), data
+
+
+ACTIONS = {
+    'diagnose': diagnose_report,
+    'publish': publish_path,
+    'validate': validate_path,
+    'verify': verify_path,
+}
+STREAM_ACTIONS = {
+    'publish': publish_stream,
+    'validate': validate_stream,
+    'verify': verify_stream,
+}
+
+BatchEntryType = tuple[str, int, str]  # path, code, message
+
+
+def is_pattern(text: str) -> bool:
+    """Detect glob patterns (as opposed to plain paths)."""
+    return any(magic in text for magic in GLOB_MAGIC)
+
+
+def expand(requests: Iterable[str]) -> list[BatchEntryType]:
+    """Expand the requested paths, directories, and glob patterns into an ordered list of entries.
+
+    Directories contribute their YAML documents (recursively and sorted), patterns their matching files (sorted).
+    Requests that resolve to nothing are kept in order as entries with code 2 and an explaining message.
+    """
+    entries: list[BatchEntryType] = []
+    for request in requests:
+        if is_pattern(request):
+            matches = sorted(hit for hit in glob.glob(request, recursive=True) if pathlib.Path(hit).is_file())
+            if not matches:
+                entries.append((request, 2, f'requested model file pattern ({request}) matches no files'))
+            entries.extend((match, 0, '') for match in matches)
+            continue
+        path = pathlib.Path(request)
+        if not path.exists():
+            entries.append((request, 2, f'requested model file path at ({request}) does not exist'))
+        elif path.is_dir():
+            documents = sorted(
+                str(hit) for hit in path.rglob('*') if hit.suffix.lower() in DOCUMENT_SUFFIXES and hit.is_file()
+            )
+            if not documents:
+                entries.append((request, 2, f'requested model folder at ({request}) contains no YAML documents'))
+            entries.extend((document, 0, '') for document in documents)
+        elif path.is_file():
+            entries.append((request, 0, ''))
+        else:
+            entries.append((request, 2, f'requested model file path at ({request}) is not a file'))
+    return entries
+
+
+@no_type_check
+def process(action: str, path: str, options=None) -> list[BatchEntryType]:
+    """Process a single model path with the action and return only labels, codes, and messages (cheap to transfer).
+
+    In stream mode (option stream) every document gets its own result labeled path#index.
+    Published questions are not collected as they would be dropped anyway.
+    Unexpected failures are reported as results with code 1 of the model.
+    Warnings are aggregated per model (see visailu.collector) and with option profile the processing is profiled per
+    model (see visailu.profiling).
+    """
+    options = {**(options or {}), 'collect': False}
+    if options.get('stream') and action not in STREAM_ACTIONS:
+        raise ValueError(f'batch action ({action}) does not support stream mode')
+    try:
+        with collecting(path), profiled(options, path):
+            if options.get('stream'):
+                return [
+                    (f'{path}#{index}', code, message)
+                    for index, code, message, _ in STREAM_ACTIONS[action](path, options=options)
+                ]
+            code, message, _ = ACTIONS[action](path, options=options)
+    except Exception as err:  # One failing model must not cost the results of the others
+        log.debug(f'processing model at ({path}) failed', exc_info=True)
+        return [(path, 1, f'processing model at ({path}) failed: {type(err).__name__}: {err}')]
+    return [(path, code, message)]
+
+
+@no_type_check
+def observed_call(function, *args) -> tuple[Any, list[StageRecord]]:
+    """Call the function and also return the stage records measured (to replay them in the parent)."""
+    records = []
+    with observing(records.append):
+        result = function(*args)
+    return result, records
+
+
+def effective_jobs(jobs: int, count: int) -> int:
+    """Derive the number of worker processes (0 means one per CPU) bounded by the number of tasks."""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, count))
+
+
+@no_type_check
+def pool_map(function, *iterables, jobs: int = 1) -> list[Any]:
+    """Map the (module level) function over the arguments in order - across worker processes for more jobs.
+
+    Workers log through the parent and their stage records are replayed in the parent while observed.
+    """
+    arguments = list(zip(*iterables))
+    workers = effective_jobs(jobs, len(arguments))
+    if workers == 1:
+        return [function(*args) for args in arguments]
+
+    import logging
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor  # deferred as multiprocessing is slow to import
+
+    from visailu.logs import init_worker, serve_workers
+
+    chunk_size = max(1, len(arguments) // (workers * 4))
+    observed = bool(OBSERVERS)  # Observers live in this process only - so workers return their records
+    channel = multiprocessing.Queue()  # Workers log into the channel and never wait for the output
+    listener = serve_workers(channel)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(channel, logging.getLogger().level)
+        ) as executor:
+            if observed:
+                outcomes = list(
+                    executor.map(observed_call, [function] * len(arguments), *zip(*arguments), chunksize=chunk_size)
+                )
+            else:
+                outcomes = list(executor.map(function, *zip(*arguments), chunksize=chunk_size))
+    finally:
+        listener.stop()
+    if observed:
+        for _, records in outcomes:
+            replay(records)
+        outcomes = [result for result, _ in outcomes]
+    return outcomes
+
+
+@no_type_check
+def run(action: str, entries: list[BatchEntryType], options=None, jobs: int = 1) -> list[BatchEntryType]:
+    """Run the action across all processable entries and return the results in input order."""
+    if action not in ACTIONS:
+        raise ValueError(f'unknown batch action ({action}) - expected one of {", ".join(sorted(ACTIONS))}')
+    todo = [path for path, code, _ in entries if code == 0]
+    outcomes = pool_map(process, [action] * len(todo), todo, [options] * len(todo), jobs=jobs)
+    return merged(entries, outcomes)
+
+
+def merged(entries: list[BatchEntryType], outcomes: Iterable[list[BatchEntryType]]) -> list[BatchEntryType]:
+    """Merge the outcomes of the processable entries (code 0) with the others in input order."""
+    results: list[BatchEntryType] = []
+    completed = iter(outcomes)
+    for entry in entries:
+        if entry[1] == 0:
+            results.extend(next(completed))
+        else:
+            results.append(entry)
+    return results
+
+
+def summary_code(results: list[BatchEntryType]) -> int:
+    """Summarize the per file codes as the worst (highest) code or 0 for an empty batch."""
+    return max((code for _, code, _ in results), default=0)
@@ -0,0 +1,218 @@
+"""Publish many quizzes into one indexed bundle file and fetch single quizzes from it by id via mmap.
+
+Layout (little endian):
+  header: magic (8 bytes), record count (u64), offset of the index (u64)
+  records: one compact JSON line {"id": ..., "quiz": [...]} per quiz in publication order
+  index: one entry per record sorted by key - key (u64, the first 8 bytes of the BLAKE2b digest of the id),
+         offset (u64), and length (u64) of the record
+
+The reader maps the file and binary searches the fixed width index, so opening a bundle reads only the header and
+fetching a quiz touches only the pages of its index entries and its record.
+"""
+
+import hashlib
+import json
+import mmap
+import pathlib
+import struct
+from typing import IO, Any, Iterator, Optional, Union, cast, no_type_check
+
+from visailu import ENCODING
+from visailu.collector import collecting
+from visailu.model import from_validated
+from visailu.profiling import profiled
+from visailu.publish import exported
+from visailu.validate import validate_path, validate_stream
+from visailu.writer import COMPACT_SEPARATORS, atomic_target
+
+BUNDLE_SUFFIX = '.bundle'
+MAGIC = b'VSLBNDL1'
+HEADER = struct.Struct('<8sQQ')
+ENTRY = struct.Struct('<QQQ')
+
+PathLike = Union[str, pathlib.Path]
+RecordType = tuple[str, int, str, Optional[str], Optional[bytes]]  # label, code, message, quiz id, record
+
+
+def key_of(quiz_id: str) -> int:
+    """Derive the index key of the quiz id."""
+    return int.from_bytes(hashlib.blake2b(quiz_id.encode(ENCODING), digest_size=8).digest(), 'little')
+
+
+def record_of(quiz_id: str, quiz: Any) -> bytes:
+    """Serialize the quiz with its id as one compact JSON line."""
+    return (json.dumps({'id': quiz_id, 'quiz': quiz}, separators=COMPACT_SEPARATORS) + '\n').encode(ENCODING)
+
+
+@no_type_check
+def _records(label: str, data, options) -> list[RecordType]:
+    """Export the validated data (or its sampled variants with ids <id>-v<n>) as records labeled for messages."""
+    quiz_id = str(data.get('id'))
+    plan = options.get('sample')
+    if not plan:
+        quiz = list(exported(from_validated(data, release=True), options.get('target')))
+        return [(label, 0, '', quiz_id, record_of(quiz_id, quiz))]
+
+    from visailu.sample import variants  # only needed for sampling
+
+    drawn = variants(data, plan)
+    records = []
+    for number, variant in enumerate(drawn, 1):
+        variant_id = f'{quiz_id}-v{number}' if len(drawn) > 1 else quiz_id
+        quiz = list(exported(from_validated(variant, release=True), options.get('target')))
+        records.append((label, 0, '', variant_id, record_of(variant_id, quiz)))
+    return records
+
+
+@no_type_check
+def bundle_records(path: str, options=None) -> list[RecordType]:
+    """Validate and export the model at path (or every document in stream mode) as bundle records.
+
+    Invalid models yield their code and message without record (cheap to transfer from worker processes).
+    Warnings are aggregated per model (see visailu.collector) and with option profile it is profiled per model.
+    """
+    if options is None:
+        options = {}
+    with collecting(path), profiled(options, path):
+        return _bundle_records(path, options)
+
+
+@no_type_check
+def _bundle_records(path: str, options) -> list[RecordType]:
+    if options.get('stream'):
+        records = []
+        for index, code, message, data in validate_stream(path, options=options):
+            label = f'{path}#{index}'
+            records.extend(_records(label, data, options) if code == 0 else [(label, code, message, None, None)])
+        return records
+    code, message, data = validate_path(path, options=options)
+    if code != 0:
+        return [(path, code, message, None, None)]
+    return _records(path, data, options)
+
+
+class BundleWriter:
+    """Append records to a bundle written atomically (the index and header are written when closing)."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        self.handle = handle
+        self.entries: list[tuple[int, int, int]] = []
+        self.known: dict[str, int] = {}
+        handle.write(HEADER.pack(MAGIC, 0, 0))
+
+    def add(self, quiz_id: str, record: bytes) -> bool:
+        """Append the record of the quiz id (False and nothing appended for a duplicate id)."""
+        if quiz_id in self.known:
+            return False
+        offset = self.handle.tell()
+        self.handle.write(record)
+        self.known[quiz_id] = offset
+        self.entries.append((key_of(quiz_id), offset, len(record)))
+        return True
+
+    def close(self) -> None:
+        """Write the sorted index and complete the header."""
+        index_offset = self.handle.tell()
+        for entry in sorted(self.entries):
+            self.handle.write(ENTRY.pack(*entry))
+        self.handle.seek(0)
+        self.handle.write(HEADER.pack(MAGIC, len(self.entries), index_offset))
+
+
+@no_type_check
+def publish_bundle(entries, target: PathLike, options=None, jobs: int = 1) -> list[tuple[str, int, str]]:
+    """Publish the processable entries (code 0) of the batch entries into one bundle at target.
+
+    Models are validated and exported across jobs worker processes while the parent appends the records in input
+    order. Later models with an id already bundled are reported with code 1.
+    Returns the batch results (path, code, message) in input order.
+    """
+    from visailu.batch import merged, pool_map
+
+    options = {**(options or {}), 'collect': False}
+    todo = [path for path, code, _ in entries if code == 0]
+    outcomes = pool_map(bundle_records, todo, [options] * len(todo), jobs=jobs)
+    results = []
+    with atomic_target(target) as handle:
+        writer = BundleWriter(handle)
+        for records in outcomes:
+            results.append([])
+            for label, code, message, quiz_id, record in records:
+                if code == 0 and not writer.add(quiz_id, record):
+                    code, message = 1, f'has duplicate quiz id ({quiz_id}) already in bundle'
+                elif code == 0:
+                    message = f'bundled quiz data of id {quiz_id} into {target} (from model at {label})'
+                results[-1].append((label, code, message))
+        writer.close()
+    return merged(entries, results)
+
+
+class Bundle:
+    """Read only random access to the quizzes of a bundle by id (memory mapped)."""
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = pathlib.Path(path)
+        with self.path.open('rb') as handle:
+            self.map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f'not a quiz bundle at {path}')
+
+    def __enter__(self) -> 'Bundle':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the mapping."""
+        self.map.close()
+
+    def __len__(self) -> int:
+        return int(self.count)
+
+    def _entry(self, slot: int) -> tuple[int, int, int]:
+        return cast(tuple[int, int, int], ENTRY.unpack_from(self.map, self.index_offset + slot * ENTRY.size))
+
+    def raw(self, quiz_id: str) -> Optional[bytes]:
+        """Fetch the record of the quiz id as bytes (None if not bundled)."""
+        key = key_of(quiz_id)
+        low, high = 0, self.count
+        while low < high:  # Leftmost entry with the key
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        needle = b'{"id":' + json.dumps(quiz_id).encode(ENCODING) + b','
+        for slot in range(low, self.count):
+            found, offset, length = self._entry(slot)
+            if found != key:
+                break
+            if self.map[offset : offset + len(needle)] == needle:  # Keys of different ids may collide
+                return self.map[offset : offset + length]
+        return None
+
+    def get(self, quiz_id: str) -> Optional[Any]:
+        """Fetch the quiz (list of exported questions) of the quiz id (None if not bundled)."""
+        record = self.raw(quiz_id)
+        return None if record is None else json.loads(record)['quiz']
+
+    def __contains__(self, quiz_id: Any) -> bool:
+        return isinstance(quiz_id, str) and self.raw(quiz_id) is not None
+
+    def __getitem__(self, quiz_id: str) -> Any:
+        quiz = self.get(quiz_id)
+        if quiz is None:
+            raise KeyError(quiz_id)
+        return quiz
+
+    @no_type_check
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the quiz ids in publication order (reading the records sequentially)."""
+        offset = HEADER.size
+        while offset < self.index_offset:
+            end = self.map.find(b'\n', offset, self.index_offset)
+            yield json.loads(self.map[offset:end])['id']
+            offset = end + 1
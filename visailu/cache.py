@@ -0,0 +1,165 @@
+"""Persistent cache of parsed models so that subsequent verify, validate, and publish runs skip the YAML parsing.
+
+Entries are keyed by the resolved source path, its size, its modification time, the SHA-256 of its content, and
+the resource limits it was parsed within (see visailu.limits - so documents never bypass stricter limits).
+They live in separate small files below the build folder (marshal serialized) and are evicted least recently used
+once the total size exceeds the bound (VISAILU_CACHE_MAX_BYTES, default 64 MiB).
+The total size is tracked per process from a single scan of the folder, and eviction goes down to a headroom below
+the bound, so that storing stays cheap for runs over many models.
+Documents marshal cannot serialize (like timestamps) are simply not cached.
+"""
+
+import hashlib
+import marshal
+import os
+import pathlib
+import time
+from typing import Any, Callable, Optional, Union, no_type_check
+
+from visailu import CACHE_MAX_BYTES, ENCODING, log
+from visailu.timings import OBSERVERS, emit
+from visailu.writer import atomic_target
+
+CACHE_FOLDER = pathlib.Path('build', '.cache')
+ENTRY_SUFFIX = '.marshal'
+FORMAT = 2  # Increment when the entry layout changes
+HEADROOM = 0.9  # Share of the bound eviction goes down to (so that it scans the folder only once in a while)
+
+PathLike = Union[str, pathlib.Path]
+StampType = tuple[Any, ...]  # resolved path, size, mtime in ns, content digest, limits
+ResultType = tuple[int, str, Any]
+
+
+_TOTALS: dict[str, int] = {}  # Tracked total size per cache folder (of this process)
+
+
+def stamp_of(path: PathLike, limits: tuple[Any, ...] = ()) -> StampType:
+    """Derive the cache key of the source at path parsed within the limits."""
+    source = pathlib.Path(path)
+    stat = source.stat()
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()
+    return str(source.resolve()), stat.st_size, stat.st_mtime_ns, digest, tuple(limits)
+
+
+def entry_path(stamp: StampType, folder: PathLike = CACHE_FOLDER) -> pathlib.Path:
+    """Locate the cache entry for a source (one entry per source path)."""
+    name = hashlib.sha1(stamp[0].encode(ENCODING), usedforsecurity=False).hexdigest()
+    return pathlib.Path(folder) / f'{name}{ENTRY_SUFFIX}'
+
+
+@no_type_check
+def lookup(stamp: StampType, folder: PathLike = CACHE_FOLDER) -> tuple[bool, Any]:
+    """Return (True, data) if the cache holds the parsed document for exactly this stamp else (False, None)."""
+    entry = entry_path(stamp, folder)
+    try:
+        fmt, known, data = marshal.loads(entry.read_bytes())
+    except (OSError, EOFError, TypeError, ValueError):
+        return False, None
+    if fmt != FORMAT or tuple(known) != stamp:
+        return False, None
+    try:
+        os.utime(entry)  # The modification time of entries tracks the last use
+    except OSError:
+        pass
+    return True, data
+
+
+@no_type_check
+def store(stamp: StampType, data: Any, folder: PathLike = CACHE_FOLDER, max_bytes: int = CACHE_MAX_BYTES) -> bool:
+    """Store the parsed document for the stamp and evict least recently used entries once beyond max bytes.
+
+    Returns False if the document cannot be serialized (and is thus not cached).
+    """
+    try:
+        payload = marshal.dumps((FORMAT, stamp, data))
+    except ValueError as err:
+        log.debug(f'not caching model at {stamp[0]} - {err}')
+        return False
+    entry = entry_path(stamp, folder)
+    key = str(pathlib.Path(folder).resolve())
+    if key not in _TOTALS:
+        _TOTALS[key] = sum(size for _, size, _ in _entries(folder))
+    try:
+        replaced = entry.stat().st_size
+    except OSError:
+        replaced = 0
+    with atomic_target(entry) as handle:
+        handle.write(payload)
+    _TOTALS[key] += len(payload) - replaced
+    if _TOTALS[key] > max_bytes:
+        evict(folder, int(max_bytes * HEADROOM))
+    return True
+
+
+def _entries(folder: PathLike) -> list[tuple[int, int, pathlib.Path]]:
+    """List the entries as (last use in ns, size, path) sorted least recently used first."""
+    found = []
+    for path in pathlib.Path(folder).glob(f'*{ENTRY_SUFFIX}'):
+        try:
+            stat = path.stat()
+        except OSError:  # Evicted concurrently
+            continue
+        found.append((stat.st_mtime_ns, stat.st_size, path))
+    return sorted(found)
+
+
+def evict(folder: PathLike = CACHE_FOLDER, max_bytes: int = CACHE_MAX_BYTES) -> int:
+    """Remove least recently used entries until the total size is within max bytes and return the number removed."""
+    entries = _entries(folder)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    _TOTALS[str(pathlib.Path(folder).resolve())] = max(total, 0)
+    return removed
+
+
+@no_type_check
+def cached(
+    path: PathLike, parse: Callable[[], ResultType], folder: PathLike = CACHE_FOLDER, limits: tuple[Any, ...] = ()
+) -> ResultType:
+    """Provide the (code, message, data) of parsing the source at path from the cache or else by parse (and store).
+
+    Only successfully parsed documents are cached and only reused when parsed within the same limits.
+    Observers of the stages see hits and misses as stage cache.
+    """
+    start = time.perf_counter()
+    stamp = stamp_of(path, limits)
+    hit, data = lookup(stamp, folder)
+    if hit:
+        log.debug(f'parsed model at {path} taken from cache')
+        if OBSERVERS:
+            emit('cache', time.perf_counter() - start, {'hits': 1, 'bytes_read': stamp[1]})
+        return 0, '', data
+    parsing = time.perf_counter()
+    code, message, data = parse()
+    parsed = time.perf_counter()
+    if code == 0:
+        store(stamp, data, folder)
+    if OBSERVERS:  # The parse itself is reported as stage verify
+        emit('cache', time.perf_counter() - parsed + parsing - start, {'misses': 1})
+    return code, message, data
+
+
+def stats(folder: PathLike = CACHE_FOLDER, max_bytes: int = CACHE_MAX_BYTES) -> dict[str, Any]:
+    """Summarize the cache: folder, entry count, total and maximum bytes, and least and most recent use."""
+    entries = _entries(folder)
+    oldest: Optional[int] = entries[0][0] if entries else None
+    newest: Optional[int] = entries[-1][0] if entries else None
+    return {
+        'folder': str(folder),
+        'entries': len(entries),
+        'bytes': sum(size for _, size, _ in entries),
+        'max_bytes': max_bytes,
+        'least_recent_use_ns': oldest,
+        'most_recent_use_ns': newest,
+    }
+
+
+def clear(folder: PathLike = CACHE_FOLDER) -> int:
+    """Remove all entries and return their number."""
+    return evict(folder, -1)
@@ -1,14 +1,23 @@
-"""Command line interface for quiz (Finnish: visailu) data operations."""
+"""Command line interface for quiz (Finnish: visailu) data operations.
 
+The processing modules are imported only by the commands using them to keep the start of the application fast.
+"""
+
+import json
 import logging
 import pathlib
+from typing import TYPE_CHECKING, List, Optional, Union
 
 import typer
 
-from visailu import APP_NAME, QUIET, __version__ as APP_VERSION, log
-from visailu.publish import publish_path
-from visailu.validate import validate_path
-from visailu.verify import verify_path
+from visailu import APP_NAME, LOG_FORMAT, QUIET, SERVE_HOST, SERVE_PORT, SERVE_WORKERS, __version__ as APP_VERSION, log
+
+if TYPE_CHECKING:
+    from visailu.sample import SamplePlan  # pragma: no cover
+
+TIMINGS_FORMATS = ('human', 'json')
+
+OptionsType = dict[str, Union[bool, str, 'SamplePlan']]
 
 app = typer.Typer(
     add_completion=False,
@@ -16,6 +25,11 @@ app = typer.Typer(
     no_args_is_help=True,
 )
 
+DocumentPaths = typer.Argument(
+    None,
+    help='Paths to model files, folders (searched recursively for YAML files), or glob patterns',
+    show_default=False,
+)
 DocumentPath = typer.Option(
     '',
     '-f',
@@ -34,6 +48,80 @@ Strictness = typer.Option(
     '--strict',
     help='Ouput noisy warnings on console (default is False)',
 )
+YamlLoader = typer.Option(
+    '',
+    '--yaml-loader',
+    help='YAML loader to parse with (auto, c, or python) - default from VISAILU_YAML_LOADER else auto',
+)
+Incremental = typer.Option(
+    False,
+    '-i',
+    '--incremental',
+    help='Skip models unchanged since the last publication and clean up after removed ones (default is False)',
+)
+CheckIncremental = typer.Option(
+    False,
+    '--check-incremental',
+    help='Verify incremental results against a full run and log differences as errors (default is False)',
+)
+Stream = typer.Option(
+    False,
+    '--stream',
+    help='Treat every model file as YAML stream and process each document separately (default is False)',
+)
+AllErrors = typer.Option(
+    False,
+    '-a',
+    '--all-errors',
+    help='Report all violations per model as JSON lines with locations instead of stopping at the first',
+)
+Compact = typer.Option(
+    False,
+    '--compact',
+    help='Publish JSON without optional whitespace (default is False)',
+)
+Compress = typer.Option(
+    False,
+    '--gzip',
+    help='Publish gzip compressed JSON with suffix .json.gz (default is False)',
+)
+Target = typer.Option(
+    'naive',
+    '-t',
+    '--target',
+    help='Export target profile (naive: 10 questions with 4 answers, bank: unbounded)',
+)
+Jobs = typer.Option(
+    1,
+    '-j',
+    '--jobs',
+    help='Number of worker processes for many models (0 for one per CPU, default is 1)',
+)
+NoCache = typer.Option(
+    False,
+    '--no-cache',
+    help='Parse every model instead of reusing parsed models from the cache below build/.cache (default is False)',
+)
+Timings = typer.Option(
+    False,
+    '--timings',
+    help='Report wall time and counters per stage (verify, validate, etl, write) on stderr (default is False)',
+)
+TimingsFormat = typer.Option(
+    'human',
+    '--timings-format',
+    help='Format of the timings report (human or json)',
+)
+Profiling = typer.Option(
+    False,
+    '--profile',
+    help='Write pstats, collapsed stacks, and top allocation sites per model (or command) below build/profile',
+)
+CommandProfiling = typer.Option(
+    False,
+    '--profile',
+    help='Write pstats, collapsed stacks, and top allocation sites of the command below build/profile',
+)
 OutputPath = typer.Option(
     '',
     '-o',
@@ -50,7 +138,12 @@ def callback(
         '--version',
         help='Display the application version and exit',
         is_eager=True,
-    )
+    ),
+    log_format: str = typer.Option(
+        LOG_FORMAT,
+        '--log-format',
+        help='Format of the log output on stderr (text or json) - default from VISAILU_LOG_FORMAT else text',
+    ),
 ) -> None:
     """
     Quiz (Finnish: visailu) data operations.
@@ -58,101 +151,455 @@ def callback(
     if version:
         typer.echo(f'{APP_NAME} version {APP_VERSION}')
         raise typer.Exit()
+    if log_format != LOG_FORMAT:
+        from visailu.logs import LOG_FORMATS, set_format
+
+        if log_format not in LOG_FORMATS:
+            log.error(f'unknown log format ({log_format}) - expected one of {", ".join(LOG_FORMATS)}')
+            raise typer.Exit(code=2)
+        set_format(log_format)
 
 
 def _verify_call_vector(
-    doc_path: str, doc_path_pos: str, verbose: bool, strict: bool
-) -> tuple[int, str, str, dict[str, bool]]:
+    doc_path: str,
+    doc_paths_pos: Optional[List[str]],
+    verbose: bool,
+    strict: bool,
+    yaml_loader: str = '',
+    stream: bool = False,
+) -> tuple[int, str, list[str], OptionsType]:
     """DRY"""
-    doc = doc_path.strip()
-    if not doc and doc_path_pos:
-        doc = doc_path_pos
-    if not doc:
-        return 2, 'Document path required', '', {}
-
-    doc_path_path = pathlib.Path(doc)
-    if doc_path_path.exists():
-        if not doc_path_path.is_file():
-            return 2, f'requested model file path at ({doc}) is not a file', '', {}
-    else:
-        return 2, f'requested model file path at ({doc}) does not exist', '', {}
+    requests = [doc for doc in [doc_path.strip(), *(doc_paths_pos or [])] if doc]
+    if not requests:
+        return 2, 'Document path required', [], {}
 
-    options = {
+    options: OptionsType = {
         'quiet': QUIET and not verbose and not strict,
         'strict': strict,
         'verbose': verbose,
+        'stream': stream,
+        'yaml_loader': yaml_loader,
     }
     if verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-    return 0, '', doc, options
+        log.root.setLevel(logging.DEBUG)  # via the module logger to initialize the logging first
+    return 0, '', requests, options
+
+
+def _known_target(target: str) -> bool:
+    """Check the export target profile name and log the alternatives if unknown."""
+    from visailu.publish import PROFILES
+
+    if target in PROFILES:
+        return True
+    log.error(f'unknown target profile ({target}) - expected one of {", ".join(sorted(PROFILES))}')
+    return False
+
+
+def _sample_plan(
+    target: str, questions: Optional[int], answers: Optional[int], seed: Optional[int], variants: int, weighted: bool
+) -> tuple[int, str, Optional['SamplePlan']]:
+    """Derive the sample plan with the counts defaulting to those of the target profile."""
+    from visailu.publish import PROFILES
+    from visailu.sample import SamplePlan
+
+    profile = PROFILES[target]
+    plan = SamplePlan(
+        profile.question_count if questions is None else questions,
+        profile.answers_count if answers is None else answers,
+        0 if seed is None else seed,
+        variants,
+        weighted,
+    )
+    if any(count is not None and count < 1 for count in (plan.questions, plan.answers, plan.variants)):
+        return 2, 'sampling requires positive counts of questions, answers, and variants', None
+    return 0, '', plan
+
+
+def _timed_execute(action: str, requests: list[str], options: OptionsType, jobs: int, timings: bool, fmt: str) -> int:
+    """Execute and (if requested) report the aggregated stage timings in the format on stderr."""
+    if not timings:
+        return _execute(action, requests, options, jobs)
+    if fmt not in TIMINGS_FORMATS:
+        log.error(f'unknown timings format ({fmt}) - expected one of {", ".join(TIMINGS_FORMATS)}')
+        return 2
+
+    from visailu.timings import Aggregate, observing
+
+    aggregate = Aggregate()
+    with observing(aggregate):
+        code = _execute(action, requests, options, jobs)
+    report = aggregate.report(fmt)
+    if report:
+        typer.echo(report, err=True)
+    return code
+
+
+def _execute(action: str, requests: list[str], options: OptionsType, jobs: int) -> int:
+    """Process all requested models in input order, report per file, and return the summary code."""
+    from visailu.batch import expand, is_pattern, run, summary_code
+    from visailu.publish import BUILD_FOLDER
+
+    entries = expand(requests)
+    is_batch = (
+        len(entries) > 1
+        or bool(options.get('stream'))
+        or any(is_pattern(request) or pathlib.Path(request).is_dir() for request in requests)
+    )
+    if action == 'publish' and options.get('bundle'):
+        from visailu.bundle import publish_bundle
+
+        results = publish_bundle(entries, str(options['bundle']), options=options, jobs=jobs)
+    else:
+        results = run(action, entries, options=options, jobs=jobs)
+    for path, code, message in results:
+        if action == 'diagnose':
+            if code == 2:
+                log.error(message)
+            elif message:
+                typer.echo(message)
+            continue
+        if code != 0:
+            log.error(message if code == 2 or action == 'verify' else f'path {path} {message}')
+        elif action == 'publish':
+            log.info(message)
+        if is_batch:
+            typer.echo(f'{code} {path}')
+    if options.get('cache') and jobs != 1:
+        from visailu.cache import evict
+
+        evict()  # Workers track the size of the cache each on their own - so settle the bound once for the run
+    if action == 'publish' and options.get('incremental'):
+        from visailu.manifest import prune
+
+        for target in prune(BUILD_FOLDER):
+            log.info(f'removed quiz data at {target} (model no longer exists)')
+    if action == 'publish' and options.get('hashed'):
+        from visailu.etags import aggregate
+
+        manifest_path, count = aggregate(BUILD_FOLDER)
+        log.info(f'listed {count} hashed quizzes in manifest at {manifest_path}')
+    return summary_code(results)
 
 
 @app.command('verify')
 def verify_cmd(  # noqa
-    doc_path_pos: str = typer.Argument(''),
+    doc_paths_pos: Optional[List[str]] = DocumentPaths,
     doc_path: str = DocumentPath,
     verbose: bool = Verbosity,
     strict: bool = Strictness,
+    yaml_loader: str = YamlLoader,
+    stream: bool = Stream,
+    jobs: int = Jobs,
+    timings: bool = Timings,
+    timings_format: str = TimingsFormat,
+    no_cache: bool = NoCache,
+    profile: bool = Profiling,
 ) -> int:
     """
     Verify the model data against YAML syntax.
     """
-    code, message, path, options = _verify_call_vector(doc_path, doc_path_pos, verbose, strict)
+    code, message, requests, options = _verify_call_vector(
+        doc_path, doc_paths_pos, verbose, strict, yaml_loader, stream
+    )
     if code:
         log.error(message)
         raise typer.Exit(code=code)
+    options['cache'] = not no_cache
+    options['profile'] = profile
 
-    code, message, data = verify_path(path, options=options)
-    if code != 0:
-        log.error(message)
-
-    raise typer.Exit(code=code)
+    raise typer.Exit(code=_timed_execute('verify', requests, options, jobs, timings, timings_format))
 
 
 @app.command('validate')
 def validate_cmd(  # noqa
-    doc_path_pos: str = typer.Argument(''),
+    doc_paths_pos: Optional[List[str]] = DocumentPaths,
     doc_path: str = DocumentPath,
     verbose: bool = Verbosity,
     strict: bool = Strictness,
+    yaml_loader: str = YamlLoader,
+    stream: bool = Stream,
+    jobs: int = Jobs,
+    all_errors: bool = AllErrors,
+    timings: bool = Timings,
+    timings_format: str = TimingsFormat,
+    no_cache: bool = NoCache,
+    incremental: bool = typer.Option(
+        False,
+        '-i',
+        '--incremental',
+        help='Check only the questions changed since the last incremental run (default is False)',
+    ),
+    check_incremental: bool = CheckIncremental,
+    engine: str = typer.Option(
+        'objects',
+        '--engine',
+        help='Validate on the parsed objects or on the YAML event stream with memory bounded by one question (events)',
+    ),
+    fail_fast: bool = typer.Option(
+        False, '--fail-fast', help='Stop parsing at the first violation (events engine only, default is False)'
+    ),
+    profile: bool = Profiling,
 ) -> int:
     """
     Validate the YAML data against the model.
     """
-    code, message, path, options = _verify_call_vector(doc_path, doc_path_pos, verbose, strict)
+    code, message, requests, options = _verify_call_vector(
+        doc_path, doc_paths_pos, verbose, strict, yaml_loader, stream
+    )
     if code:
         log.error(message)
         raise typer.Exit(code=code)
+    options['cache'] = not no_cache
 
-    code, message, data = validate_path(path, options=options)
-    if code != 0:
-        log.error(f'path {path} {message}')
+    if all_errors and stream:
+        log.error('reporting all errors is not supported in stream mode')
+        raise typer.Exit(code=2)
+    if incremental and (all_errors or stream):
+        log.error('incremental validation is not supported in stream mode or when reporting all errors')
+        raise typer.Exit(code=2)
+    options['incremental'] = incremental
+    options['check_incremental'] = check_incremental
+    if engine not in ('objects', 'events'):
+        log.error(f'unknown engine ({engine}) - expected one of objects, events')
+        raise typer.Exit(code=2)
+    if engine == 'events' and (incremental or all_errors or stream):
+        log.error('the events engine does not support incremental or stream mode or reporting all errors')
+        raise typer.Exit(code=2)
+    if fail_fast and engine != 'events':
+        log.error('fail fast requires the events engine')
+        raise typer.Exit(code=2)
+    options['engine'] = engine
+    options['fail_fast'] = fail_fast
+    options['profile'] = profile
 
-    raise typer.Exit(code=code)
+    raise typer.Exit(
+        code=_timed_execute('diagnose' if all_errors else 'validate', requests, options, jobs, timings, timings_format)
+    )
 
 
 @app.command('publish')
 def publish_cmd(  # noqa
-    doc_path_pos: str = typer.Argument(''),
+    doc_paths_pos: Optional[List[str]] = DocumentPaths,
     doc_path: str = DocumentPath,
     verbose: bool = Verbosity,
     strict: bool = Strictness,
+    yaml_loader: str = YamlLoader,
+    stream: bool = Stream,
+    jobs: int = Jobs,
+    incremental: bool = Incremental,
+    compact: bool = Compact,
+    compress: bool = Compress,
+    target: str = Target,
+    timings: bool = Timings,
+    timings_format: str = TimingsFormat,
+    no_cache: bool = NoCache,
+    check_incremental: bool = CheckIncremental,
+    sample: bool = typer.Option(
+        False,
+        '--sample',
+        help='Draw the questions and answers from the model as pool (implied by the other sampling options)',
+    ),
+    questions: Optional[int] = typer.Option(
+        None, '--questions', help='Questions to draw per quiz (default from the target profile)', show_default=False
+    ),
+    answers: Optional[int] = typer.Option(
+        None, '--answers', help='Answers to draw per question (default from the target profile)', show_default=False
+    ),
+    seed: Optional[int] = typer.Option(None, '--seed', help='Seed of the draw (default 0)', show_default=False),
+    variants: int = typer.Option(1, '--variants', help='Quiz variants to draw from one parse as <stem>-v<n>.json'),
+    weighted: bool = typer.Option(
+        False, '--weighted', help='Draw questions proportional to their optional weight key (default 1)'
+    ),
+    bundle: str = typer.Option(
+        '', '--bundle', help='Publish all quizzes into one indexed bundle file at this path instead of one file each'
+    ),
+    hashed: bool = typer.Option(
+        False,
+        '--hashed',
+        help='Name outputs by content digest with .json.gz sidecars and list them in build/manifest.json with ETags',
+    ),
+    profile: bool = Profiling,
 ) -> int:
     """
     Publish the model data in simplified JSON syntax.
     """
-    code, message, path, options = _verify_call_vector(doc_path, doc_path_pos, verbose, strict)
+    code, message, requests, options = _verify_call_vector(
+        doc_path, doc_paths_pos, verbose, strict, yaml_loader, stream
+    )
     if code:
         log.error(message)
         raise typer.Exit(code=code)
+    options['cache'] = not no_cache
 
-    code, message, data = publish_path(path, options=options)
-    if code != 0:
-        log.error(f'path {path} {message}')
-    else:
-        log.info(message)
+    options['incremental'] = incremental
+    options['check_incremental'] = check_incremental
+    options['compact'] = compact
+    options['gzip'] = compress
+    options['profile'] = profile
+    if not _known_target(target):
+        raise typer.Exit(code=2)
+    options['target'] = target
+
+    if sample or questions is not None or answers is not None or seed is not None or variants != 1 or weighted:
+        code, message, plan = _sample_plan(target, questions, answers, seed, variants, weighted)
+        if code or plan is None:
+            log.error(message)
+            raise typer.Exit(code=code)
+        if incremental and variants > 1:
+            log.error('incremental publication of more than one variant is not supported')
+            raise typer.Exit(code=2)
+        options['sample'] = plan
+
+    if bundle:
+        if incremental or compress or hashed:
+            log.error('bundles are not supported in incremental, gzip, or hashed mode')
+            raise typer.Exit(code=2)
+        options['bundle'] = bundle
+    if hashed and compress:
+        log.error('hashed mode always writes gzip sidecars - drop the gzip option')
+        raise typer.Exit(code=2)
+    options['hashed'] = hashed
+
+    raise typer.Exit(code=_timed_execute('publish', requests, options, jobs, timings, timings_format))
+
+
+@app.command('watch')
+def watch_cmd(  # noqa
+    doc_paths_pos: Optional[List[str]] = DocumentPaths,
+    verbose: bool = Verbosity,
+    strict: bool = Strictness,
+    yaml_loader: str = YamlLoader,
+    publish: bool = typer.Option(
+        False,
+        '-p',
+        '--publish',
+        help='Republish instead of only revalidating changed models (default is False)',
+    ),
+    incremental: bool = Incremental,
+    target: str = Target,
+    interval: float = typer.Option(0.25, '--interval', help='Seconds between polling for changes'),
+    debounce: float = typer.Option(0.1, '--debounce', help='Seconds a change has to settle before processing'),
+    initial: bool = typer.Option(True, '--initial/--no-initial', help='Process all models once at start'),
+    profile: bool = Profiling,
+) -> int:
+    """
+    Watch the models and revalidate (or republish) only the changed ones.
+    """
+    code, message, requests, options = _verify_call_vector('', doc_paths_pos, verbose, strict, yaml_loader)
+    if code:
+        log.error(message)
+        raise typer.Exit(code=code)
+    if not _known_target(target):
+        raise typer.Exit(code=2)
+    options['incremental'] = incremental
+    options['target'] = target
+    options['profile'] = profile
+
+    from visailu.watch import snapshot, watch
+
+    log.info(f'watching {len(snapshot(requests))} models (press Ctrl+C to stop)')
+    try:
+        watch(requests, 'publish' if publish else 'validate', options, interval, debounce, initial=initial)
+    except KeyboardInterrupt:
+        log.info('stopped watching')
+    raise typer.Exit(code=0)
+
+
+@app.command('serve')
+def serve_cmd(  # noqa
+    host: str = typer.Option(SERVE_HOST, '--host', help='Host to listen on'),
+    port: int = typer.Option(SERVE_PORT, '--port', help='Port to listen on'),
+    socket_path: str = typer.Option('', '--socket', help='Unix domain socket path to listen on instead of TCP'),
+    workers: int = typer.Option(SERVE_WORKERS, '-w', '--workers', help='Number of worker threads'),
+    verbose: bool = Verbosity,
+    profile: bool = typer.Option(
+        False,
+        '--profile',
+        help='Write pstats, collapsed stacks, and top allocation sites per request below build/profile',
+    ),
+) -> int:
+    """
+    Serve verify, validate, and publish for posted YAML models over local HTTP.
+    """
+    if verbose:
+        log.root.setLevel(logging.DEBUG)  # via the module logger to initialize the logging first
+    from visailu.serve import make_server
+
+    server = make_server(host, port, socket_path or None, workers, profile=profile)
+    where = socket_path if socket_path else f'http://{host}:{server.server_address[1]}'
+    log.info(f'serving on {where} with {server.workers} workers (press Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info('stopped serving')
+    finally:
+        server.server_close()
+    raise typer.Exit(code=0)
+
+
+@app.command('dedupe')
+def dedupe_cmd(  # noqa
+    doc_paths_pos: Optional[List[str]] = DocumentPaths,
+    verbose: bool = Verbosity,
+    yaml_loader: str = YamlLoader,
+    threshold: float = typer.Option(
+        0.8, '--threshold', help='Minimal estimated similarity (0 to 1) to report near duplicates'
+    ),
+    index_path: str = typer.Option('', '--index', help='Path of the persistent index (default build/.dedupe)'),
+    no_cache: bool = NoCache,
+    profile: bool = CommandProfiling,
+) -> int:
+    """
+    Report duplicate and near duplicate questions across the models (exit code 1 if any are found).
+    """
+    code, message, requests, options = _verify_call_vector('', doc_paths_pos, verbose, False, yaml_loader)
+    if code:
+        log.error(message)
+        raise typer.Exit(code=code)
+    options['cache'] = not no_cache
+
+    from visailu import dedupe
+    from visailu.batch import expand
+    from visailu.profiling import profiled
+
+    entries = expand(requests)
+    for _, problem, problem_message in entries:
+        if problem:
+            log.error(problem_message)
+    paths = [path for path, problem, _ in entries if not problem]
+    index_location = index_path or dedupe.INDEX_PATH
+    with profiled({'profile': profile}, 'dedupe'):
+        index = dedupe.load_index(index_location)
+        counts = dedupe.update(index, paths, options)
+        dedupe.save_index(index, index_location)
+        exact, near = dedupe.duplicates(index, paths, threshold)
+    log.info(', '.join(f'{count} {name}' for name, count in counts.items()) + ' model files in dedupe index')
+
+    for members in exact:
+        typer.echo('exact: ' + ', '.join(f'{path} question {number}' for path, number in members))
+    for score, (path, number), (other_path, other_number) in near:
+        typer.echo(f'near {score:.2f}: {path} question {number} ~ {other_path} question {other_number}')
+    if any(problem for _, problem, _ in entries):
+        raise typer.Exit(code=2)
+    raise typer.Exit(code=1 if exact or near else 0)
+
+
+@app.command('cache-stats')
+def cache_stats_cmd(  # noqa
+    clear: bool = typer.Option(False, '--clear', help='Remove all cache entries after reporting'),
+    profile: bool = CommandProfiling,
+) -> int:
+    """
+    Report the state of the parsed model cache (as JSON) and optionally clear it.
+    """
+    from visailu import cache
+    from visailu.profiling import profiled
 
-    raise typer.Exit(code=code)
+    with profiled({'profile': profile}, 'cache-stats'):
+        typer.echo(json.dumps(cache.stats(), indent=2))
+        if clear:
+            log.info(f'removed {cache.clear()} entries from the parsed model cache')
+    raise typer.Exit(code=0)
 
 
 @app.command('version')
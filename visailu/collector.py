@@ -0,0 +1,89 @@
+"""Aggregate the warnings about a model per kind (message template) with counts and a capped sample.
+
+Warnings are recorded as template and arguments and only formatted when reported (lazily like logging does).
+Without an active collector warn logs right away (still with lazy formatting by the logging package).
+"""
+
+import contextlib
+from typing import Any, Iterator, Optional
+
+from visailu import WARNINGS_SAMPLE, log
+
+
+def example(template: str, samples: list[tuple[Any, ...]]) -> str:
+    """Format the first sampled warning of the template (the template itself if none were sampled)."""
+    return template % samples[0] if samples else template
+
+
+class WarningCollector:
+    """Count the warnings per template and keep the arguments of the first limit warnings per template."""
+
+    __slots__ = ('label', 'limit', 'kinds')
+
+    def __init__(self, label: str = '', limit: int = WARNINGS_SAMPLE) -> None:
+        self.label = label
+        self.limit = limit
+        self.kinds: dict[str, tuple[list[int], list[tuple[Any, ...]]]] = {}
+
+    def warning(self, template: str, *args: Any) -> None:
+        """Record a warning as template with arguments."""
+        count, samples = self.kinds.setdefault(template, ([0], []))
+        count[0] += 1
+        if len(samples) < self.limit:
+            samples.append(args)
+
+    def counts(self) -> dict[str, int]:
+        """Provide the number of warnings per template."""
+        return {template: count[0] for template, (count, _) in self.kinds.items()}
+
+    def __len__(self) -> int:
+        return sum(count[0] for count, _ in self.kinds.values())
+
+    def lines(self) -> Iterator[str]:
+        """Format the sampled warnings and one summary line per template with suppressed warnings."""
+        for template, (count, samples) in self.kinds.items():
+            for args in samples:
+                yield template % args
+            if count[0] > len(samples):
+                yield f'{count[0] - len(samples)} more warnings like "{example(template, samples)}" for {self.label}'
+
+    def report(self) -> None:
+        """Log the sampled warnings (formatted by the logging package) and the summaries of suppressed ones.
+
+        The records carry the label as attribute source (part of the JSON log format).
+        """
+        for template, (count, samples) in self.kinds.items():
+            for args in samples:
+                log.warning(template, *args, extra={'source': self.label})
+            if count[0] > len(samples):
+                suppressed = count[0] - len(samples)
+                log.warning(
+                    '%d more warnings like "%s" for %s',
+                    suppressed,
+                    example(template, samples),
+                    self.label,
+                    extra={'source': self.label},
+                )
+
+
+COLLECTORS: list[WarningCollector] = []
+
+
+def warn(template: str, *args: Any) -> None:
+    """Record the warning with the innermost active collector or else log it."""
+    if COLLECTORS:
+        COLLECTORS[-1].warning(template, *args)
+    else:
+        log.warning(template, *args)
+
+
+@contextlib.contextmanager
+def collecting(label: str = '', limit: Optional[int] = None) -> Iterator[WarningCollector]:
+    """Collect the warnings within the context and report them aggregated when leaving it."""
+    collector = WarningCollector(label, WARNINGS_SAMPLE if limit is None else limit)
+    COLLECTORS.append(collector)
+    try:
+        yield collector
+    finally:
+        COLLECTORS.remove(collector)
+        collector.report()
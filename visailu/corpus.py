@@ -0,0 +1,85 @@
+"""Seeded generator of synthetic (valid) quiz models of configurable size for benchmarks and tests.
+
+The same parameters and seed always produce the same model, so measurements are comparable across commits.
+"""
+
+import copy
+import pathlib
+import random
+from typing import Any, Union
+
+import yaml
+
+RANGES = ('binary', 'percentage')
+RATINGS = {'binary': (False, True), 'percentage': (0, 100)}  # (default, rating of the correct answer)
+WORDS = (
+    'alpha',
+    'beta',
+    'gamma',
+    'delta',
+    'epsilon',
+    'zeta',
+    'eta',
+    'theta',
+    'iota',
+    'kappa',
+    'lambda',
+    'omicron',
+)
+
+
+def meta_of(scale_range: str) -> dict[str, Any]:
+    """Return a consistent meta block for the scale range (binary or percentage)."""
+    if scale_range not in RATINGS:
+        raise ValueError(f'unknown scale range ({scale_range}) - expected one of {", ".join(RANGES)}')
+    return {'scale': {'domain': 'text', 'range': scale_range}, 'defaults': {'rating': RATINGS[scale_range][0]}}
+
+
+def synthesize(
+    questions: int = 10,
+    answers: int = 4,
+    overrides: float = 0.1,
+    scale_range: str = 'binary',
+    seed: int = 42,
+) -> dict[str, Any]:
+    """Generate a valid model with questions times answers and exactly one correct answer per question.
+
+    The share overrides (0 to 1) of the questions carries a nested meta block with the other scale range
+    (binary versus percentage) than the model level scale range.
+    """
+    rng = random.Random(seed)  # nosec B311 - reproducible content, no security
+    other_range = RANGES[1 - RANGES.index(scale_range)] if scale_range in RANGES else scale_range
+    model: dict[str, Any] = {
+        'id': f'synthetic-{seed}',
+        'title': f'Synthetic quiz with {questions} questions',
+        'meta': meta_of(scale_range),
+        'questions': [],
+    }
+    overridden = set(rng.sample(range(questions), round(questions * min(max(overrides, 0), 1))))
+    for q_slot in range(questions):
+        effective_range = other_range if q_slot in overridden else scale_range
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+        entry: dict[str, Any] = {'question': f'{words} ({q_slot + 1})?', 'answers': []}
+        if q_slot in overridden:
+            entry['meta'] = meta_of(effective_range)
+        correct = rng.randrange(answers) if answers else -1
+        for a_slot in range(answers):
+            option: dict[str, Any] = {'answer': f'{rng.choice(WORDS)} {q_slot + 1}.{a_slot + 1}'}
+            if a_slot == correct:
+                option['rating'] = RATINGS[effective_range][1]
+            entry['answers'].append(option)
+        model['questions'].append(entry)
+    return model
+
+
+def fresh_copies(model: dict[str, Any], count: int) -> list[dict[str, Any]]:
+    """Provide independent copies of the model (validation completes the data in place)."""
+    return [copy.deepcopy(model) for _ in range(count)]
+
+
+def dump(model: dict[str, Any], path: Union[str, pathlib.Path]) -> pathlib.Path:
+    """Write the model as YAML file to path and return the path."""
+    target = pathlib.Path(path)
+    with target.open('wt', encoding='utf-8') as handle:
+        yaml.safe_dump(model, handle, sort_keys=False, allow_unicode=True)
+    return target
@@ -0,0 +1,206 @@
+"""Find duplicate and near duplicate questions across many models with a persistent incremental index.
+
+Question and answer texts are normalized (slugify and case folding).
+Exact duplicates share the hash of the normalized question and the sorted normalized answers.
+Near duplicates are found with MinHash signatures of character shingles (one permutation hashing with rotation
+densification, so every shingle is hashed once) and locality sensitive hashing (banding), so that only questions
+sharing a band become candidates (roughly linear in the number of questions).
+The index keeps per model file its size, modification time, content hash, and the keys and signatures of its
+questions, so that repeated runs only process changed files.
+"""
+
+import array
+import hashlib
+import marshal
+import operator
+import pathlib
+from typing import Any, Iterable, Optional, Union, no_type_check
+
+import yaml
+
+from visailu import ENCODING, log, slugify
+from visailu.verify import verify_path
+from visailu.writer import atomic_target
+
+INDEX_PATH = pathlib.Path('build', '.dedupe', 'index.marshal')
+FORMAT = 1  # Increment when the index layout or the signature parameters change
+SHINGLE_SIZE = 5
+SLOT_BITS = 6
+SLOT_MASK = (1 << SLOT_BITS) - 1
+NUM_PERM = 1 << SLOT_BITS  # Number of bins of the signature
+BANDS = 10
+ROWS = 6  # Bands times rows of at most NUM_PERM - the candidate threshold is about (1 / BANDS) ** (1 / ROWS)
+DEFAULT_THRESHOLD = 0.8
+EMPTY = (1 << 64) - 1
+
+PathLike = Union[str, pathlib.Path]
+ItemType = tuple[str, int, str, bytes]  # path, question number (from 1), exact key, signature
+IndexType = dict[str, Any]
+
+
+def normalize(text: Any) -> str:
+    """Normalize the text for comparison (whitespace as in slugify and case folded)."""
+    return slugify(str(text)).casefold()
+
+
+def exact_key(question: str, answers: Iterable[str]) -> str:
+    """Hash the normalized question with its normalized answers in any order."""
+    text = question + '\x1f' + '\x1e'.join(sorted(answers))
+    return hashlib.sha1(text.encode(ENCODING), usedforsecurity=False).hexdigest()
+
+
+def shingles(text: str) -> set[str]:
+    """Split the text into the set of overlapping character shingles."""
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[start : start + SHINGLE_SIZE] for start in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> bytes:
+    """Compute the MinHash signature of the text (minimum 64 bit shingle hash per bin, empty bins densified)."""
+    values = sorted(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode(ENCODING), digest_size=8).digest(), 'little')
+            for shingle in shingles(text)
+        ),
+        reverse=True,
+    )
+    found = {value & SLOT_MASK: value >> SLOT_BITS for value in values}  # The last (minimal) value per bin wins
+    bins = [found.get(slot, EMPTY) for slot in range(NUM_PERM)]
+    if len(found) < NUM_PERM:
+        for slot in range(NUM_PERM):
+            distance = 1
+            while bins[slot] == EMPTY:  # Borrow from the next originally filled bin (marked by the distance)
+                donor = (slot + distance) % NUM_PERM
+                if donor in found:
+                    bins[slot] = found[donor] | (distance << (64 - SLOT_BITS))
+                distance += 1
+    return array.array('Q', bins).tobytes()
+
+
+def similarity(one: Union[bytes, tuple[int, ...]], other: Union[bytes, tuple[int, ...]]) -> float:
+    """Estimate the Jaccard similarity from two signatures (share of equal bins) given as bytes or unpacked."""
+    if isinstance(one, bytes):
+        one = tuple(array.array('Q', one))
+    if isinstance(other, bytes):
+        other = tuple(array.array('Q', other))
+    equal: int = sum(map(operator.eq, one, other))
+    return equal / NUM_PERM
+
+
+@no_type_check
+def items_of(data) -> list[tuple[int, str, bytes]]:
+    """Derive (question number, exact key, signature) for all questions of parsed model data (skipping others)."""
+    questions = data.get('questions') if isinstance(data, dict) else None
+    if not isinstance(questions, list):
+        return []
+    items = []
+    for number, entry in enumerate(questions, 1):
+        if not isinstance(entry, dict) or 'question' not in entry:
+            continue
+        options = entry.get('answers') if isinstance(entry.get('answers'), list) else []
+        answers = [normalize(option.get('answer', '')) for option in options if isinstance(option, dict)]
+        question = normalize(entry['question'])
+        items.append((number, exact_key(question, answers), signature(' '.join([question, *sorted(answers)]))))
+    return items
+
+
+def load_index(path: PathLike = INDEX_PATH) -> IndexType:
+    """Load the index or provide an empty one if missing, broken, or of another format."""
+    try:
+        index = marshal.loads(pathlib.Path(path).read_bytes())
+    except (OSError, EOFError, TypeError, ValueError):
+        return {'format': FORMAT, 'files': {}}
+    if not isinstance(index, dict) or index.get('format') != FORMAT:
+        return {'format': FORMAT, 'files': {}}
+    return index
+
+
+def save_index(index: IndexType, path: PathLike = INDEX_PATH) -> None:
+    """Persist the index atomically."""
+    with atomic_target(path) as handle:
+        handle.write(marshal.dumps(index))
+
+
+@no_type_check
+def update(index: IndexType, paths: Iterable[str], options=None) -> dict[str, int]:
+    """Bring the index up to date for the model paths and drop files that no longer exist.
+
+    Files with unchanged size and modification time (or else unchanged content hash) are reused as is.
+    Returns the counts of reused, indexed, failed, and dropped files.
+    """
+    files = index['files']
+    counts = {'reused': 0, 'indexed': 0, 'failed': 0, 'dropped': 0}
+    for path in paths:
+        source = pathlib.Path(path)
+        stat = source.stat()
+        known = files.get(path)
+        if known and (known['size'], known['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            counts['reused'] += 1
+            continue
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()
+        if known and known['digest'] == digest:
+            known['size'], known['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+            counts['reused'] += 1
+            continue
+        try:
+            code, message, data = verify_path(path, options=options)
+        except yaml.YAMLError as err:  # like multiple documents in one file
+            code, message, data = 1, slugify(str(err)), None
+        if code != 0:
+            log.warning(f'skipping model at {path} for deduplication - {message}')
+            files.pop(path, None)
+            counts['failed'] += 1
+            continue
+        files[path] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': digest,
+            'items': items_of(data),
+        }
+        counts['indexed'] += 1
+    for path in [path for path in files if not pathlib.Path(path).is_file()]:
+        del files[path]
+        counts['dropped'] += 1
+    return counts
+
+
+@no_type_check
+def duplicates(
+    index: IndexType, paths: Optional[Iterable[str]] = None, threshold: float = DEFAULT_THRESHOLD
+) -> tuple[list[list[tuple[str, int]]], list[tuple[float, tuple[str, int], tuple[str, int]]]]:
+    """Find exact duplicate groups and near duplicate pairs among the questions of the paths (default all indexed).
+
+    Exact groups list (path, question number) in index order.
+    Near pairs (similarity, first, second) compare one representative per exact key and are sorted by similarity.
+    """
+    selected = list(index['files']) if paths is None else [path for path in paths if path in index['files']]
+    groups: dict[str, list[tuple[str, int]]] = {}
+    representatives: dict[str, bytes] = {}
+    for path in selected:
+        for number, key, sig in index['files'][path]['items']:
+            groups.setdefault(key, []).append((path, number))
+            representatives.setdefault(key, sig)
+
+    buckets: dict[tuple[int, bytes], list[str]] = {}
+    for key, sig in representatives.items():
+        for band in range(BANDS):
+            buckets.setdefault((band, sig[band * ROWS * 8 : (band + 1) * ROWS * 8]), []).append(key)
+
+    unpacked = {key: tuple(array.array('Q', sig)) for key, sig in representatives.items()}
+    compared: set[tuple[str, str]] = set()
+    near = []
+    for keys in buckets.values():
+        for slot, key in enumerate(keys):
+            for other in keys[slot + 1 :]:
+                pair = (key, other) if key < other else (other, key)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                score = similarity(unpacked[key], unpacked[other])
+                if score >= threshold:
+                    near.append((score, groups[key][0], groups[other][0]))
+
+    exact = [members for members in groups.values() if len(members) > 1]
+    near.sort(key=lambda entry: (-entry[0], entry[1], entry[2]))
+    return exact, near
@@ -0,0 +1,130 @@
+"""Manifest of content addressed publications mapping quiz ids to hashed file names, sizes, and ETags.
+
+Publishing in hashed mode writes every quiz as <stem>.<digest>.json with a precompressed <stem>.<digest>.json.gz
+sidecar (see visailu.writer.write_hashed), so that unchanged quizzes keep their names and caches never refetch them.
+Every published model records its quizzes in a separate small file below the build folder (workers never contend
+for one file) and the batch driver aggregates them into build/manifest.json after the run:
+
+{
+  "quizzes": {
+    "<quiz id>": {
+      "etag": "\"<digest>\"",
+      "file": "<stem>.<digest>.json",
+      "gzip": {"etag": "\"<digest>\"", "file": "<stem>.<digest>.json.gz", "size": 123},
+      "size": 456
+    }
+  },
+  "version": "<visailu version>"
+}
+"""
+
+import json
+import pathlib
+from typing import Any, Union, no_type_check
+
+from visailu import ENCODING, VERSION, log
+from visailu.manifest import source_key
+from visailu.writer import HashedFile, atomic_target
+
+ENTRIES_FOLDER_NAME = '.hashed'
+MANIFEST_NAME = 'manifest.json'
+ETAG_DIGITS = 32
+
+PathLike = Union[str, pathlib.Path]
+QuizEntryType = dict[str, Any]
+
+
+def etag_of(digest: str) -> str:
+    """Derive the strong ETag (quoted) from the SHA-256 hex digest of the content."""
+    return f'"{digest[:ETAG_DIGITS]}"'
+
+
+def quiz_entry(plain: HashedFile, packed: HashedFile) -> QuizEntryType:
+    """Describe the published files of one quiz (names relative to the build folder)."""
+    return {
+        'etag': etag_of(plain.digest),
+        'file': plain.path.name,
+        'gzip': {'etag': etag_of(packed.digest), 'file': packed.path.name, 'size': packed.size},
+        'size': plain.size,
+    }
+
+
+def entry_path(build_path: PathLike, source: PathLike) -> pathlib.Path:
+    """Locate the record of a source below the build folder."""
+    return pathlib.Path(build_path) / ENTRIES_FOLDER_NAME / f'{source_key(source)}.json'
+
+
+@no_type_check
+def _load(path: pathlib.Path) -> dict[str, Any]:
+    try:
+        with path.open('rt', encoding=ENCODING) as handle:
+            entry = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return entry if isinstance(entry, dict) and isinstance(entry.get('quizzes'), dict) else {}
+
+
+def _files_of(quizzes: dict[str, QuizEntryType]) -> set[str]:
+    return {name for quiz in quizzes.values() for name in (quiz['file'], quiz['gzip']['file'])}
+
+
+def _referenced(build_path: pathlib.Path, excluded: set[pathlib.Path]) -> set[str]:
+    """Collect the files recorded by all records but the excluded (sources with equal stem and quizzes share files)."""
+    paths = (build_path / ENTRIES_FOLDER_NAME).glob('*.json')
+    return {name for path in paths if path not in excluded for name in _files_of(_load(path).get('quizzes', {}))}
+
+
+@no_type_check
+def record(build_path: PathLike, source: PathLike, quizzes: dict[str, QuizEntryType]) -> None:
+    """Record the quizzes published from source and remove the files published from it before but no longer.
+
+    Files still recorded for other sources are kept.
+    """
+    build_path = pathlib.Path(build_path)
+    path = entry_path(build_path, source)
+    stale = _files_of(_load(path).get('quizzes', {})) - _files_of(quizzes)
+    if stale:
+        stale -= _referenced(build_path, {path})
+    for name in sorted(stale):
+        (build_path / name).unlink(missing_ok=True)
+    entry = {'source': str(pathlib.Path(source).resolve()), 'quizzes': quizzes}
+    with atomic_target(path) as handle:
+        handle.write(json.dumps(entry, sort_keys=True).encode(ENCODING))
+
+
+@no_type_check
+def aggregate(build_path: PathLike) -> tuple[pathlib.Path, int]:
+    """Write the manifest of all recorded quizzes (dropping those of removed sources) and return path and quiz count.
+
+    Sources are visited in path order - a quiz id published from more than one source keeps the first.
+    Files of removed sources are kept while recorded for an existing source.
+    """
+    build_path = pathlib.Path(build_path)
+    entries = [_load(path) for path in sorted((build_path / ENTRIES_FOLDER_NAME).glob('*.json'))]
+    entries = sorted((entry for entry in entries if entry), key=lambda entry: entry.get('source', ''))
+    live = {
+        name
+        for entry in entries
+        if pathlib.Path(entry.get('source', '')).is_file()
+        for name in _files_of(entry['quizzes'])
+    }
+    quizzes: dict[str, QuizEntryType] = {}
+    sources: dict[str, str] = {}
+    for entry in entries:
+        source = entry.get('source', '')
+        if not pathlib.Path(source).is_file():
+            for name in _files_of(entry['quizzes']) - live:
+                (build_path / name).unlink(missing_ok=True)
+            entry_path(build_path, source).unlink(missing_ok=True)
+            log.info(f'removed hashed quiz data of {source} (model no longer exists)')
+            continue
+        for quiz_id, quiz in entry['quizzes'].items():
+            if quiz_id in quizzes:
+                log.warning(f'quiz id {quiz_id} of model at {source} already published from {sources[quiz_id]}')
+                continue
+            quizzes[quiz_id], sources[quiz_id] = quiz, source
+    target = build_path / MANIFEST_NAME
+    payload = json.dumps({'quizzes': quizzes, 'version': VERSION}, indent=2, sort_keys=True).encode(ENCODING)
+    with atomic_target(target) as handle:
+        handle.write(payload)
+    return target, len(quizzes)
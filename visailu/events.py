@@ -0,0 +1,307 @@
+"""Validate models on the YAML event stream with memory bounded by one question.
+
+The engine composes and constructs the top level values (id, title, meta) as usual but every question on its own,
+checks it, and drops it, so the object graph of the whole model never exists.
+The resource limits (see visailu.limits) apply as with the object based path.
+The first violation decides (like validate_path) - the rest of the document is still parsed (without keeping
+anything but anchors) so that YAML errors later in the file are reported like the object based path does.
+With option fail_fast the engine stops at the first violation instead.
+Publication and sampling receive the valid questions on the way (building the compact model or drawing variants).
+
+Results (code and message) are identical to validate_path: the checks of the object based path are reused per
+question, questions are only checked once id, title, and meta are known (a document with the questions before
+these is scanned twice), and unusual top level structures (no mapping, merge keys, tags, anchors, duplicate keys,
+or questions not given as sequence) are handed to the object based path.
+"""
+
+import pathlib
+import time
+from typing import Any, Callable, IO, Optional, no_type_check
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.events import MappingEndEvent, MappingStartEvent, SequenceEndEvent, SequenceStartEvent, StreamEndEvent
+from yaml.nodes import ScalarNode
+
+from visailu import ENCODING, INVALID_YAML_RESOURCE, MODEL_STRUCTURE_UNEXPECTED, MODEL_VALUES_MISSING
+from visailu.limits import LimitExceeded, Limits, check_size, guarded_loader, limits_of
+from visailu.timings import OBSERVERS, emit
+from visailu.validate import ScaleChecker, _question_violations, validate_path
+from visailu.verify import select_loader
+
+HEADER_KEYS = ('id', 'title', 'meta')
+MODEL_KEYS = (*HEADER_KEYS, 'questions')
+STR_TAG = 'tag:yaml.org,2002:str'
+
+ResultType = tuple[int, str, Any]
+
+
+class _Fallback(Exception):
+    """The document needs the object based path for identical results."""
+
+
+class _Reordered(Exception):
+    """The questions precede parts of the header - scan the header first."""
+
+
+@no_type_check
+def question_verdict(entry, top_checker: Callable[[], ScaleChecker]) -> str:
+    """Check one question like _violations does and return the message of its first violation (else empty)."""
+    try:
+        meta = entry.get('meta')
+        question = entry.get('question', '')
+        answers = entry.get('answers', [])
+    except AttributeError:
+        return MODEL_STRUCTURE_UNEXPECTED
+    checker = top_checker() if meta is None else ScaleChecker(meta)
+    if checker.message:
+        return checker.message
+    for message, _ in _question_violations(question, answers, checker):
+        return message
+    return ''
+
+
+class _Run:
+    """One pass over the events of a document deciding the first violation."""
+
+    def __init__(
+        self,
+        loader: Any,
+        header: Optional[dict[str, Any]] = None,
+        fail_fast: bool = False,
+        sink: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        self.loader = loader
+        self.header: Optional[dict[str, Any]] = header  # Known from a previous scan (None if not scanned)
+        self.fail_fast = fail_fast
+        self.sink = sink  # Receives every valid question (completed with the defaults) while walking
+        self.scanning = False
+        self.seen: dict[str, Any] = {}
+        self.verdict = ''
+        self.questions = 0
+        self.answers = 0
+        self._checker: Optional[ScaleChecker] = None
+
+    def top_checker(self) -> ScaleChecker:
+        if self._checker is None:
+            meta = (self.header if self.header is not None else self.seen).get('meta')
+            self._checker = ScaleChecker(meta)
+        return self._checker
+
+    @no_type_check
+    def _construct(self, node) -> Any:
+        return self.loader.construct_document(node)
+
+    @no_type_check
+    def _key(self) -> str:
+        event = self.loader.peek_event()
+        if event.anchor is not None:
+            raise _Fallback()
+        node = self.loader.compose_node(None, None)
+        if not isinstance(node, ScalarNode) or node.tag != STR_TAG:
+            raise _Fallback()  # Merge keys, tags, and keys other than strings
+        key = self._construct(node)
+        if key in self.seen:
+            raise _Fallback()
+        return key
+
+    def _decided_header(self) -> Optional[str]:
+        """Decide the model level violation known before the questions (None if the questions decide)."""
+        header = self.header if self.header is not None else self.seen
+        if not header.get('id') or not header.get('title', ''):
+            return MODEL_VALUES_MISSING
+        return None
+
+    @no_type_check
+    def _questions(self) -> None:
+        loader = self.loader
+        start = loader.peek_event()
+        if start.anchor is not None or start.tag not in (None, '!') or not isinstance(start, SequenceStartEvent):
+            raise _Fallback()
+        if not self.scanning and self.header is None and any(key not in self.seen for key in HEADER_KEYS):
+            raise _Reordered()
+        if not self.scanning:
+            self.verdict = self._decided_header() or ''
+        loader.enter(loader.get_event())
+        while not loader.check_event(SequenceEndEvent):
+            node = loader.compose_node(None, None)
+            self.questions += 1
+            if self.scanning or self.verdict:
+                if self.fail_fast and not self.scanning:
+                    return
+                continue  # Parse on for YAML errors (and anchors)
+            entry = self._construct(node)
+            if isinstance(entry, dict) and isinstance(entry.get('answers'), list):
+                self.answers += len(entry['answers'])
+            self.verdict = question_verdict(entry, self.top_checker)
+            if self.verdict and self.fail_fast:
+                return
+            if self.sink is not None and not self.verdict:
+                self.sink(entry)
+        loader.get_event()
+        loader.leave()
+        self.seen['questions'] = None
+
+    @no_type_check
+    def scan(self) -> dict[str, Any]:
+        """Walk the document only collecting the header values (id, title, and meta)."""
+        self.scanning = True
+        self.run()
+        return self.seen
+
+    @no_type_check
+    def run(self) -> str:
+        """Walk the document and return the message of the first violation (empty if valid)."""
+        loader = self.loader
+        loader.get_event()  # Stream start
+        if loader.check_event(StreamEndEvent):
+            return MODEL_STRUCTURE_UNEXPECTED  # Empty document
+        loader.get_event()  # Document start
+        root = loader.peek_event()
+        if not isinstance(root, MappingStartEvent) or root.anchor is not None or root.tag not in (None, '!'):
+            raise _Fallback()
+        loader.enter(loader.get_event())
+        while not loader.check_event(MappingEndEvent):
+            key = self._key()
+            if key == 'questions':
+                self._questions()
+                if self.verdict and self.fail_fast:
+                    return self.verdict
+                continue
+            value = self._construct(loader.compose_node(None, None))
+            self.seen[key] = value if key in HEADER_KEYS else None  # Other keys only matter as seen
+        loader.get_event()  # Mapping end
+        loader.get_event()  # Document end
+        if not loader.check_event(StreamEndEvent):
+            event = loader.get_event()
+            raise ComposerError(
+                'expected a single document in the stream',
+                root.start_mark,
+                'but found another document',
+                event.start_mark,
+            )
+        if not self.questions:
+            return self._decided_header() or MODEL_VALUES_MISSING
+        return self.verdict
+
+
+@no_type_check
+def _decide(
+    opener: Callable[[], IO[str]], loader_class, fail_fast: bool, limits: Limits, start: float, sink=None
+) -> tuple[str, int, int, dict[str, Any]]:
+    """Decide the first violation (message, questions, answers, header) reading from fresh handles of the opener."""
+    header = None
+    for _ in range(2):
+        with opener() as handle:
+            loader = guarded_loader(loader_class, handle, limits, start, events=True)
+            try:
+                walk = _Run(loader, header, fail_fast, sink)
+                message = walk.run()
+                known = walk.seen if header is None else header
+                return message, walk.questions, walk.answers, {key: known[key] for key in HEADER_KEYS if key in known}
+            except _Reordered:
+                pass
+            finally:
+                loader.dispose()
+        with opener() as handle:
+            loader = guarded_loader(loader_class, handle, limits, start, events=True)
+            try:
+                header = _Run(loader).scan()
+            finally:
+                loader.dispose()
+    raise _Fallback()  # pragma: no cover
+
+
+@no_type_check
+def _walk(path: str, options, sink_of=None) -> tuple[int, str, Optional[dict[str, Any]], Any]:
+    """Walk the model at path returning (code, message, header, sink) with the sink made fresh per pass by sink_of.
+
+    Documents needing the object based path raise _Fallback.
+    """
+    start = time.perf_counter()
+    fail_fast = bool(options.get('fail_fast'))
+
+    def opener():
+        return pathlib.Path(path).open('rt', encoding=ENCODING)
+
+    def attempt(loader_class):
+        sink = None if sink_of is None else sink_of()
+        return (*_decide(opener, loader_class, fail_fast, limits, start, None if sink is None else sink.add), sink)
+
+    loader_class = select_loader(options)
+    limits = limits_of(options)
+    try:
+        check_size(pathlib.Path(path).stat().st_size, limits)
+        try:
+            message, questions, answers, header, sink = attempt(loader_class)
+        except yaml.YAMLError:
+            if loader_class is yaml.SafeLoader:
+                raise
+            message, questions, answers, header, sink = attempt(yaml.SafeLoader)
+    except LimitExceeded as err:
+        return 1, err.message, None, None
+    except (RuntimeError, yaml.YAMLError):
+        return 1, INVALID_YAML_RESOURCE, None, None
+    if OBSERVERS:
+        counters = {'questions': questions, 'answers': answers, 'bytes_read': pathlib.Path(path).stat().st_size}
+        emit('validate', time.perf_counter() - start, counters)
+    return (1 if message else 0), message, header, sink
+
+
+@no_type_check
+def validate_events_path(path: str, options=None) -> tuple[int, str, Any]:
+    """Validate the model at path on the YAML event stream returning (code, message, None).
+
+    Nothing of the model is returned as it is never materialized as a whole.
+    """
+    if options is None:
+        options = {}
+    try:
+        code, message, _, _ = _walk(path, options)
+    except _Fallback:
+        code, message, _ = validate_path(path, options={**options, 'engine': 'objects'})
+    return code, message, None
+
+
+@no_type_check
+def sample_events_path(path: str, plan, options=None) -> tuple[int, str, Any]:
+    """Validate the model at path on the YAML event stream drawing the variants of the sample plan on the way.
+
+    Only the sampled questions are kept, so the pool is never materialized as a whole.
+    The data returned is the list of variants (validated data each, identical to visailu.sample.variants of the
+    validated model) and None for invalid models.
+    """
+    from visailu.sample import assembled, pool_of, variants  # only needed for sampling
+
+    if options is None:
+        options = {}
+    try:
+        code, message, header, pool = _walk(path, options, lambda: pool_of(plan))
+    except _Fallback:
+        code, message, data = validate_path(path, options={**options, 'engine': 'objects'})
+        return code, message, (variants(data, plan) if code == 0 else None)
+    if code != 0:
+        return code, message, None
+    return 0, '', assembled(header, pool, plan)
+
+
+@no_type_check
+def model_events_path(path: str, options=None) -> tuple[int, str, Any]:
+    """Validate the model at path on the YAML event stream building the compact model (see visailu.model) on the way.
+
+    Every valid question is converted as soon as it is checked, so the parsed model never exists as a whole.
+    The data returned is the Quiz (identical to visailu.model.from_validated of the validated model) and None for
+    invalid models.
+    """
+    from visailu.model import QuizBuilder, from_validated  # only needed for publication
+
+    if options is None:
+        options = {}
+    try:
+        code, message, header, builder = _walk(path, options, QuizBuilder)
+    except _Fallback:
+        code, message, data = validate_path(path, options={**options, 'engine': 'objects'})
+        return code, message, (from_validated(data, release=True) if code == 0 else None)
+    if code != 0:
+        return code, message, None
+    return 0, '', builder.built(header)
@@ -0,0 +1,336 @@
+"""Hard resource limits for parsing untrusted YAML sources.
+
+Sources are checked for their size in bytes before parsing and, while the nodes are composed, for the number of
+documents, the nesting depth, the number of nodes, the number of nodes reached through aliases (expanded, so that
+"billion laughs" documents stop early), and the wall-clock budget of the whole source.
+Untrusted sources (option untrusted - set by the in-memory API and thus the service) are parsed within the defaults
+from the environment (VISAILU_LIMIT_* - zero disables a limit).
+Trusted sources (like model files named on the command line) are only limited in depth (the composer recurses per
+level) and by the variables set explicitly, so that large banks are never rejected by surprise.
+Option limits (a dict with any of the Limits fields or a Limits) overrides them.
+
+The C parser keeps delivering the events, but the nodes are composed by the Python composer with the checks (libyaml
+composes recursively without bounds and crashes on deeply nested documents).
+Only when the depth is the single limit (like for trusted sources by default) and a cheap scan of the source proves
+it too shallow to crash libyaml, the C loader composes as is and the depth is checked on the composed nodes (unless
+the scan proves the limit kept already).
+"""
+
+import os
+import re
+import time
+from typing import Any, Iterable, NamedTuple, Optional, no_type_check
+
+import yaml
+from yaml.composer import Composer
+from yaml.events import AliasEvent
+from yaml.nodes import MappingNode, ScalarNode, SequenceNode
+
+from visailu import (
+    APP_ENV,
+    LIMIT_ALIASES,
+    LIMIT_ALIASES_EXCEEDED,
+    LIMIT_BYTES,
+    LIMIT_BYTES_EXCEEDED,
+    LIMIT_DEPTH,
+    LIMIT_DEPTH_EXCEEDED,
+    LIMIT_DOCUMENTS,
+    LIMIT_DOCUMENTS_EXCEEDED,
+    LIMIT_NODES,
+    LIMIT_NODES_EXCEEDED,
+    LIMIT_SECONDS,
+    LIMIT_SECONDS_EXCEEDED,
+)
+
+
+class Limits(NamedTuple):
+    """Resource limits per source (zero disables a limit)."""
+
+    bytes: int = LIMIT_BYTES
+    documents: int = LIMIT_DOCUMENTS
+    depth: int = LIMIT_DEPTH
+    nodes: int = LIMIT_NODES
+    aliases: int = LIMIT_ALIASES
+    seconds: float = LIMIT_SECONDS
+
+
+TRUSTED_FIELDS = ('depth',)  # Limits trusted sources are parsed within even if not set explicitly
+
+
+def configured(field: str) -> bool:
+    """Decide if the limit is set explicitly in the environment."""
+    return f'{APP_ENV}_LIMIT_{field.upper()}' in os.environ
+
+
+TRUSTED = Limits()._replace(
+    **{field: 0 for field in Limits._fields if field not in TRUSTED_FIELDS and not configured(field)}
+)
+
+SAFE_NESTING = 2000  # libyaml composes this deep without exhausting the C stack (it crashes at some 20000 levels)
+SHALLOW_INDENT = 16  # Widest block indentation (with indicators) of common models
+INDENT_BOUND = 256  # Widest block indentation (with indicators) scanned for
+SCAN_CHUNK = 1 << 20
+
+
+def _indented(width: int) -> 're.Pattern[str]':
+    return re.compile(r'\n[ \t?:-]{%d}' % width)  # Line breaks normalized to newlines
+
+
+SHALLOW_PREFIX, DEEP_PREFIX = _indented(SHALLOW_INDENT), _indented(INDENT_BOUND)
+
+LIMIT_MESSAGES = {
+    'bytes': LIMIT_BYTES_EXCEEDED,
+    'documents': LIMIT_DOCUMENTS_EXCEEDED,
+    'depth': LIMIT_DEPTH_EXCEEDED,
+    'nodes': LIMIT_NODES_EXCEEDED,
+    'aliases': LIMIT_ALIASES_EXCEEDED,
+    'seconds': LIMIT_SECONDS_EXCEEDED,
+}
+
+
+class LimitExceeded(Exception):
+    """A source exceeds one of the limits (message is the registered message of the limit)."""
+
+    def __init__(self, limit: str, detail: str, mark: Any = None) -> None:
+        self.limit = limit
+        self.message = LIMIT_MESSAGES[limit]
+        self.mark = mark
+        super().__init__(f'{self.message} ({detail})')
+
+
+@no_type_check
+def limits_of(options=None) -> Limits:
+    """Derive the limits from the defaults for trusted or untrusted sources (option untrusted) and option limits."""
+    options = options or {}
+    base = Limits() if options.get('untrusted') else TRUSTED
+    given = options.get('limits')
+    if not given:
+        return base
+    if isinstance(given, Limits):
+        return given
+    return base._replace(**given)
+
+
+def check_size(size: int, limits: Limits) -> None:
+    """Raise LimitExceeded if the size in bytes of a source exceeds the limit."""
+    if limits.bytes and size > limits.bytes:
+        raise LimitExceeded('bytes', f'{size} > {limits.bytes}')
+
+
+def limit_message(message: str) -> Optional[str]:
+    """Find the limit message within the message of a failed verification (None if no limit was exceeded)."""
+    return next((text for text in LIMIT_MESSAGES.values() if text in message), None)
+
+
+def nesting_bound(source: Any) -> Optional[int]:
+    """Bound the nesting depth of the source (text, bytes, or seekable text handle) cheaply from above.
+
+    Flow collections nest at most once per opening bracket and block collections at most twice per column of the
+    indentation (with indicators), so the count of the brackets and the widest indentation bound the depth.
+    Returns None for sources possibly nesting SAFE_NESTING deep (or handles that cannot be rewound).
+    Handles are scanned in chunks and rewound.
+    """
+    if isinstance(source, bytes):
+        source = source.decode(errors='replace')
+    if isinstance(source, str):
+        return _bound_of((source,))
+    if not (hasattr(source, 'seekable') and source.seekable()):
+        return None
+    try:
+        return _bound_of(iter(lambda: source.read(SCAN_CHUNK), ''))
+    finally:
+        source.seek(0)
+
+
+def _bound_of(chunks: Iterable[str]) -> Optional[int]:
+    openers, wide, tail = 0, False, '\n'  # The text starts a line
+    budget = SAFE_NESTING - 2 * INDENT_BOUND - 2
+    for chunk in chunks:
+        if '\r' in chunk:
+            chunk = chunk.replace('\r', '\n')
+        openers += chunk.count('[') + chunk.count('{')
+        seam = tail + chunk[:INDENT_BOUND]  # Lines starting in the previous chunk (without copying large texts)
+        if openers > budget or DEEP_PREFIX.search(seam) or DEEP_PREFIX.search(chunk):
+            return None
+        wide = wide or any(SHALLOW_PREFIX.search(text) for text in (seam, chunk))
+        tail = chunk[-INDENT_BOUND - 1 :]
+    return openers + 2 * (INDENT_BOUND if wide else SHALLOW_INDENT) + 2
+
+
+@no_type_check
+def check_depth(node, depth: int) -> None:
+    """Raise LimitExceeded at the first node in document order nested deeper than depth (aliases are not followed).
+
+    Only collections are walked and only down to the level above the limit.
+    """
+    if node is None or not depth:
+        return
+    seen = set()
+    pending = [(node, 0)]
+    while pending:
+        node, level = pending.pop()
+        if node.__class__ is SequenceNode:
+            children = node.value
+        elif node.__class__ is MappingNode:
+            children = [child for pair in node.value for child in pair]
+        else:
+            continue
+        if not children or id(node) in seen:
+            continue
+        seen.add(id(node))
+        if level + 1 >= depth:  # The first child is the first node too deep in document order
+            raise LimitExceeded('depth', f'{level + 2} > {depth}', children[0].start_mark)
+        pending.extend((child, level + 1) for child in reversed(children) if child.__class__ is not ScalarNode)
+
+
+class Guard:
+    """Composer mixin checking the limits per node (call guard before loading)."""
+
+    limits = Limits()
+    deadline: Optional[float] = None
+    level = 0
+    documents = 0
+    nodes = 0
+    expanded = 0
+
+    @no_type_check
+    def guard(self, limits: Limits, start: Optional[float] = None) -> None:
+        """Apply the limits with the wall-clock budget counting from start (default now)."""
+        self.limits = limits
+        self.deadline = None
+        if limits.seconds:
+            self.deadline = (time.perf_counter() if start is None else start) + limits.seconds
+        self.level = 0  # Containers walked by the caller (not composed here)
+        self.documents = 0
+        self.nodes = 0
+        self.expanded = 0
+        self._subtrees: list[int] = []
+        self._sizes: dict[int, int] = {}
+
+    @no_type_check
+    def enter(self, event) -> None:
+        """Count a container node the caller walks itself."""
+        self.level += 1
+        self._count(event)
+
+    def leave(self) -> None:
+        """Close a container node the caller walks itself."""
+        self.level -= 1
+
+    @no_type_check
+    def _count(self, event) -> None:
+        limits = self.limits
+        self.nodes += 1
+        if limits.nodes and self.nodes > limits.nodes:
+            raise LimitExceeded('nodes', f'{self.nodes} > {limits.nodes}', event.start_mark)
+        if limits.depth and self.level + len(self._subtrees) >= limits.depth:
+            depth = self.level + len(self._subtrees) + 1
+            raise LimitExceeded('depth', f'{depth} > {limits.depth}', event.start_mark)
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise LimitExceeded('seconds', f'more than {limits.seconds} seconds', event.start_mark)
+
+    @no_type_check
+    def compose_document(self) -> Any:
+        self.documents += 1
+        if self.limits.documents and self.documents > self.limits.documents:
+            raise LimitExceeded(
+                'documents', f'{self.documents} > {self.limits.documents}', self.peek_event().start_mark
+            )
+        self._sizes = {}
+        return super().compose_document()
+
+    @no_type_check
+    def compose_node(self, parent, index) -> Any:
+        event = self.peek_event()
+        subtrees = self._subtrees
+        if event.__class__ is AliasEvent:
+            node = super().compose_node(parent, index)
+            size = self._sizes.get(id(node), 1)
+            self.expanded += size
+            if self.limits.aliases and self.expanded > self.limits.aliases:
+                raise LimitExceeded('aliases', f'{self.expanded} > {self.limits.aliases}', event.start_mark)
+            if subtrees:
+                subtrees[-1] += size
+            return node
+        self._count(event)
+        subtrees.append(1)
+        node = super().compose_node(parent, index)  # An exception ends the loading (no need to restore counts)
+        size = subtrees.pop()
+        if event.anchor is not None:
+            self._sizes[id(node)] = size
+        if subtrees:
+            subtrees[-1] += size
+        return node
+
+
+class GuardedLoader(Guard, yaml.SafeLoader):
+    """Pure Python safe loader checking the limits."""
+
+
+GUARDED: dict[Any, Any] = {yaml.SafeLoader: GuardedLoader}
+
+if hasattr(yaml, 'CSafeLoader'):
+
+    class CComposingLoader(yaml.CSafeLoader):
+        """Safe loader with the C parser for events and the Python composer for nodes."""
+
+        check_node = Composer.check_node
+        get_node = Composer.get_node
+        get_single_node = Composer.get_single_node
+        compose_document = Composer.compose_document
+        compose_node = Composer.compose_node
+        compose_scalar_node = Composer.compose_scalar_node
+        compose_sequence_node = Composer.compose_sequence_node
+        compose_mapping_node = Composer.compose_mapping_node
+
+        def __init__(self, stream: Any) -> None:
+            super().__init__(stream)
+            self.anchors: dict[str, Any] = {}
+
+    class CGuardedLoader(Guard, CComposingLoader):
+        """Safe loader with the C parser checking the limits."""
+
+    class CDepthLoader(yaml.CSafeLoader):
+        """Safe C loader checking only the depth after composing (for sources too shallow to crash libyaml)."""
+
+        depth = 0
+
+        def guard(self, limits: Limits, start: Optional[float] = None) -> None:
+            """Apply the depth limit (all other limits are zero)."""
+            self.depth = limits.depth
+
+        def get_node(self) -> Any:
+            node = super().get_node()
+            check_depth(node, self.depth)
+            return node
+
+        def get_single_node(self) -> Any:
+            node = super().get_single_node()
+            check_depth(node, self.depth)
+            return node
+
+    GUARDED[yaml.CSafeLoader] = CGuardedLoader
+
+
+def depth_only(limits: Limits) -> bool:
+    """Decide if the depth is the only limit applied."""
+    return not any(value for field, value in limits._asdict().items() if field != 'depth')
+
+
+@no_type_check
+def guarded_loader(loader_class, source, limits: Limits, start: Optional[float] = None, events: bool = False) -> Any:
+    """Create the loader of the guarded variant of the loader class (SafeLoader or CSafeLoader) for the source.
+
+    Loaders walking the events themselves (events) always get the guarded composer.
+    """
+    bound = None
+    if not events and loader_class is yaml.CSafeLoader and depth_only(limits):
+        bound = nesting_bound(source)
+    if bound is None:
+        loader = GUARDED.get(loader_class, loader_class)(source)
+    else:
+        loader = CDepthLoader(source)
+        if bound <= limits.depth:  # Kept for sure
+            limits = limits._replace(depth=0)
+    loader.guard(limits, start)
+    return loader
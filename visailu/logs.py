@@ -0,0 +1,138 @@
+"""Non-blocking log output through a queue and a listener thread (also for worker processes) in text or JSON format.
+
+The application logs into a queue (QueueHandler) and a listener thread (QueueListener) formats the records and
+writes them to stderr, so producers never wait for log I/O.
+Worker processes log into a process safe queue served by a listener in the parent which hands the records to the
+loggers of the parent (and thus to the same output and to any capturing handlers).
+A root logger configured already (like by an application hosting visailu as library) is left alone, so that the
+records reach its handlers at its level only (as logging.basicConfig would do).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Any, Optional
+
+from visailu import APP_ENV, TS_FORMAT_LOG
+
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s]: %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.handlers.QueueHandler] = None
+_LISTENER_LOCK = threading.RLock()  # Serializes starting and stopping the listener across threads
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON objects (one per line) with timestamp, level, logger, message, and source (if any)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        source = getattr(record, 'source', None)
+        if source:
+            entry['source'] = source
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def formatter_of(fmt: str = 'text') -> logging.Formatter:
+    """Create the formatter for the log format (text or json)."""
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f'unknown log format ({fmt}) - expected one of {", ".join(LOG_FORMATS)}')
+    return JsonFormatter(datefmt=TS_FORMAT_LOG) if fmt == 'json' else logging.Formatter(TEXT_FORMAT, TS_FORMAT_LOG)
+
+
+def _stop() -> None:
+    """Stop the listener (writing all queued records) - registered to run at exit."""
+    global _listener  # pylint: disable=global-statement
+    with _LISTENER_LOCK:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def start(level: int, fmt: str = 'text') -> None:
+    """Route the records of the root logger through a queue to stderr (unknown formats fall back to text).
+
+    Does nothing if the root logger has handlers other than the queue handler of an earlier start.
+    """
+    global _handler, _listener  # pylint: disable=global-statement
+    with _LISTENER_LOCK:
+        root = logging.getLogger()
+        if any(handler is not _handler for handler in root.handlers):
+            return
+        _stop()
+        fmt = fmt if fmt in LOG_FORMATS else 'text'
+        records: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(formatter_of(fmt))
+        if _handler is not None:
+            root.removeHandler(_handler)
+        _handler = logging.handlers.QueueHandler(records)
+        root.addHandler(_handler)
+        root.setLevel(level)
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+
+
+def set_format(fmt: str) -> None:
+    """Switch the format of the log output (text or json)."""
+    from visailu import log
+
+    formatter = formatter_of(fmt)
+    log.getEffectiveLevel()  # Initialize the output of this process (if not yet done)
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.setFormatter(formatter)
+
+
+def flush() -> None:
+    """Write all records queued so far (by restarting the listener)."""
+    with _LISTENER_LOCK:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+class _Forward(logging.Handler):
+    """Hand records received from worker processes to the loggers of this process."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def serve_workers(channel: Any) -> logging.handlers.QueueListener:
+    """Start a listener in the parent forwarding the records workers put into the (process safe) channel."""
+    from visailu import log
+
+    log.getEffectiveLevel()  # Initialize the output of this process (if not yet done)
+    listener = logging.handlers.QueueListener(channel, _Forward())
+    listener.start()
+    return listener
+
+
+def init_worker(channel: Any, level: int) -> None:
+    """Initialize the logging of a worker process to put all records into the channel served by the parent."""
+    import visailu
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(channel))
+    root.setLevel(level)
+    visailu.log = logging.getLogger(APP_ENV)  # Skip the initialization of the output in the worker
+
+
+atexit.register(_stop)
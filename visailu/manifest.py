@@ -0,0 +1,134 @@
+"""Persistent build manifest for incremental publication.
+
+Every published model has an entry recording the content hash of the source, the visailu version, the output
+settings, and the paths and content hashes of the targets.
+Entries live in separate small files below the build folder, so that concurrent workers never contend for one file.
+A target only belongs to the entry while its content hash matches (sources with the same stem publish to the same
+target), so targets overwritten from other sources are neither taken as current nor removed.
+"""
+
+import hashlib
+import json
+import pathlib
+from typing import Any, Union, no_type_check
+
+from visailu import ENCODING, VERSION
+from visailu.writer import atomic_target
+
+MANIFEST_FOLDER_NAME = '.manifest'
+CHUNK_SIZE = 1 << 20
+
+PathLike = Union[str, pathlib.Path]
+
+
+def digest_of(path: PathLike) -> str:
+    """Return the SHA-256 hex digest of the content at path."""
+    hasher = hashlib.sha256()
+    with pathlib.Path(path).open('rb') as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def source_key(source: PathLike) -> str:
+    """Derive the stable entry name for a source path."""
+    return hashlib.sha1(str(pathlib.Path(source).resolve()).encode(ENCODING), usedforsecurity=False).hexdigest()
+
+
+def entry_path(build_path: PathLike, source: PathLike) -> pathlib.Path:
+    """Locate the manifest entry of a source below the build folder."""
+    return pathlib.Path(build_path) / MANIFEST_FOLDER_NAME / f'{source_key(source)}.json'
+
+
+@no_type_check
+def load_entry(build_path: PathLike, source: PathLike) -> dict[str, Any]:
+    """Load the manifest entry of the source or an empty dict if none (or a broken one) exists."""
+    try:
+        with entry_path(build_path, source).open('rt', encoding=ENCODING) as handle:
+            entry = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return entry if isinstance(entry, dict) else {}
+
+
+def target_entries(targets: list[PathLike]) -> list[dict[str, str]]:
+    """Describe the targets by resolved path and content hash."""
+    return [{'path': str(pathlib.Path(target).resolve()), 'digest': digest_of(target)} for target in targets]
+
+
+@no_type_check
+def owns(target: dict[str, str]) -> bool:
+    """Decide if the target described still holds the content recorded (and not that published from elsewhere)."""
+    path = pathlib.Path(target.get('path', ''))
+    return path.is_file() and digest_of(path) == target.get('digest')
+
+
+@no_type_check
+def _removable(entry: dict[str, Any]) -> list[str]:
+    """Provide the targets of the entry that may be removed (content addressed targets belong to visailu.etags)."""
+    if (entry.get('settings') or {}).get('hashed'):
+        return []
+    return [target['path'] for target in entry.get('targets', []) if owns(target)]
+
+
+@no_type_check
+def is_current(entry: dict[str, Any], digest: str, settings: dict[str, Any]) -> bool:
+    """Decide if the entry documents an existing publication of the same content with same version and settings."""
+    return (
+        bool(entry)
+        and entry.get('digest') == digest
+        and entry.get('version') == VERSION
+        and entry.get('settings') == settings
+        and bool(entry.get('targets'))
+        and all(owns(target) for target in entry['targets'])
+    )
+
+
+@no_type_check
+def record(
+    build_path: PathLike, source: PathLike, digest: str, settings: dict[str, Any], targets: list[PathLike]
+) -> None:
+    """Record the publication of source at targets and remove those published before under other names."""
+    previous = load_entry(build_path, source)
+    current = target_entries(targets)
+    kept = {target['path'] for target in current}
+    for path in _removable(previous):
+        if path not in kept:
+            pathlib.Path(path).unlink(missing_ok=True)
+    entry = {
+        'source': str(pathlib.Path(source).resolve()),
+        'digest': digest,
+        'version': VERSION,
+        'settings': settings,
+        'targets': current,
+    }
+    with atomic_target(entry_path(build_path, source)) as handle:
+        handle.write(json.dumps(entry, sort_keys=True).encode(ENCODING))
+
+
+def forget(build_path: PathLike, source: PathLike) -> None:
+    """Drop the manifest entry of the source (if any)."""
+    entry_path(build_path, source).unlink(missing_ok=True)
+
+
+@no_type_check
+def prune(build_path: PathLike) -> list[str]:
+    """Remove the entries and owned targets of all recorded sources that no longer exist and return removed targets."""
+    folder = pathlib.Path(build_path) / MANIFEST_FOLDER_NAME
+    if not folder.is_dir():
+        return []
+    removed = []
+    for path in sorted(folder.glob('*.json')):
+        try:
+            with path.open('rt', encoding=ENCODING) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+            continue
+        if pathlib.Path(entry.get('source', '')).is_file():
+            continue
+        for target in _removable(entry):
+            pathlib.Path(target).unlink(missing_ok=True)
+            removed.append(target)
+        path.unlink(missing_ok=True)
+    return removed
@@ -0,0 +1,209 @@
+"""Compact in-memory representation of validated quiz data.
+
+Questions keep their answer texts in a tuple and their ratings in a compact array (one byte per answer for binary
+ratings) and refer to interned scale objects shared by all questions with the same effective meta.
+Questions and answers offer read access by the model keys (question, answers, answer, rating), so that the export
+shapes work on both the parsed YAML data and this model.
+"""
+
+import array
+import weakref
+from typing import Any, Iterator, Optional, Union, no_type_check
+
+from visailu.validate import parse_defaults
+
+RatingsType = Union['array.array[int]', tuple[Any, ...]]
+
+
+class Scale:
+    """Interned scale of ratings (target type, range, and default) shared by all questions using it.
+
+    Scales are interned only while in use (weakly), so that long running processes do not collect them forever.
+    """
+
+    __slots__ = ('target_type', 'maps_to', 'default_rating', '__weakref__')
+    _interned: 'weakref.WeakValueDictionary[tuple[Any, ...], Scale]' = weakref.WeakValueDictionary()
+
+    def __init__(self, target_type: Any, maps_to: tuple[Any, ...], default_rating: Any) -> None:
+        self.target_type = target_type
+        self.maps_to = maps_to
+        self.default_rating = default_rating
+
+    @classmethod
+    def intern(cls, target_type: Any, maps_to: Any, default_rating: Any) -> 'Scale':
+        """Return the one scale object for these values."""
+        bounds = tuple(maps_to or ())
+        key = (target_type, bounds, type(default_rating), default_rating)
+        try:
+            scale = cls._interned.get(key)
+        except TypeError:  # Unhashable values are not interned
+            return cls(target_type, bounds, default_rating)
+        if scale is None:
+            scale = cls._interned[key] = cls(target_type, bounds, default_rating)
+        return scale
+
+    def __repr__(self) -> str:
+        name = getattr(self.target_type, '__name__', self.target_type)
+        return f'Scale({name}, {self.maps_to!r}, {self.default_rating!r})'
+
+
+class Answer:
+    """View of one answer of a question."""
+
+    __slots__ = ('answer', 'rating')
+
+    def __init__(self, answer: Any, rating: Any) -> None:
+        self.answer = answer
+        self.rating = rating
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in Answer.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Answer) and (self.answer, self.rating) == (other.answer, other.rating)
+
+    def __repr__(self) -> str:
+        return f'Answer({self.answer!r}, {self.rating!r})'
+
+
+class Question:
+    """Question with answer texts, compact ratings, and the interned effective scale."""
+
+    __slots__ = ('question', 'texts', 'ratings', 'scale')
+
+    def __init__(self, question: Any, texts: tuple[Any, ...], ratings: RatingsType, scale: Optional[Scale]) -> None:
+        self.question = question
+        self.texts = texts
+        self.ratings = ratings
+        self.scale = scale
+
+    @property
+    def answers(self) -> tuple[Answer, ...]:
+        """Provide the answers as views (ratings of binary arrays restored to bool)."""
+        if isinstance(self.ratings, array.array):
+            return tuple(Answer(text, bool(rating)) for text, rating in zip(self.texts, self.ratings))
+        return tuple(Answer(text, rating) for text, rating in zip(self.texts, self.ratings))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'question':
+            return self.question
+        if key == 'answers':
+            return self.answers
+        raise KeyError(key)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __repr__(self) -> str:
+        return f'Question({self.question!r}, {len(self.texts)} answers)'
+
+
+class Quiz:
+    """Validated quiz with identifier, title, model level scale, and questions."""
+
+    __slots__ = ('id', 'title', 'scale', 'questions')
+
+    def __init__(self, id: Any, title: Any, scale: Optional[Scale], questions: list[Question]) -> None:  # noqa
+        self.id = id
+        self.title = title
+        self.scale = scale
+        self.questions = questions
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in Quiz.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[Question]:
+        return iter(self.questions)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __repr__(self) -> str:
+        return f'Quiz({self.id!r}, {len(self.questions)} questions)'
+
+
+def compact_ratings(ratings: list[Any]) -> RatingsType:
+    """Pack binary ratings into a byte array and keep all others as tuple."""
+    if all(rating is True or rating is False for rating in ratings):
+        return array.array('b', ratings)
+    return tuple(ratings)
+
+
+@no_type_check
+def scale_of(meta) -> Optional[Scale]:
+    """Resolve the interned scale of a meta block (None for blocks without a consistent scale)."""
+    try:
+        target_type, maps_to, default_rating = parse_defaults(meta)
+    except (AttributeError, TypeError):
+        return None
+    return Scale.intern(target_type, maps_to, default_rating)
+
+
+@no_type_check
+def _scale_of(meta, scales: dict[int, Optional[Scale]]) -> Optional[Scale]:
+    """Resolve the interned scale of a meta block (once per block)."""
+    key = id(meta)
+    if key not in scales:
+        scales[key] = scale_of(meta)
+    return scales[key]
+
+
+@no_type_check
+def question_of(entry, scale: Optional[Scale]) -> Question:
+    """Convert one validated question entry with its effective scale."""
+    options = entry['answers']
+    return Question(
+        entry['question'],
+        tuple(option['answer'] for option in options),
+        compact_ratings([option['rating'] for option in options]),
+        scale,
+    )
+
+
+@no_type_check
+def from_validated(data, release: bool = False) -> Quiz:
+    """Build the quiz from validated data (with defaults filled in by the validation).
+
+    With release the question entries of the data are dropped while converting, so that their memory is freed early.
+    """
+    scales = {}
+    meta = data.get('meta')
+    entries = data['questions']
+    questions = []
+    for slot, entry in enumerate(entries):
+        questions.append(question_of(entry, _scale_of(meta if entry.get('meta') is None else entry['meta'], scales)))
+        if release:
+            entries[slot] = None
+    return Quiz(data.get('id'), data.get('title'), _scale_of(meta, scales), questions)
+
+
+class QuizBuilder:
+    """Build the quiz from validated question entries offered one by one (like while walking the event stream).
+
+    Only the compact questions are kept, the entries can be dropped right after adding them.
+    Questions without meta of their own receive the model level scale once the model values are known.
+    """
+
+    def __init__(self) -> None:
+        self.questions: list[Question] = []
+        self._inheriting: list[int] = []  # Slots of the questions using the model level scale
+
+    @no_type_check
+    def add(self, entry) -> None:
+        """Convert the validated question entry and keep the compact question."""
+        meta = entry.get('meta')
+        if meta is None:
+            self._inheriting.append(len(self.questions))
+        self.questions.append(question_of(entry, None if meta is None else scale_of(meta)))
+
+    @no_type_check
+    def built(self, header) -> Quiz:
+        """Complete the quiz with the model values (id, title, and meta)."""
+        scale = scale_of(header.get('meta'))
+        for slot in self._inheriting:
+            self.questions[slot].scale = scale
+        return Quiz(header.get('id'), header.get('title'), scale, self.questions)
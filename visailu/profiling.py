@@ -0,0 +1,161 @@
+"""Profile the processing of every model file (or a whole command) for attaching to bug reports.
+
+Every session writes three files named after the model path (or the command) below the profile folder:
+
+- <label>.pstats - the cProfile statistics (python -m pstats, snakeviz, ...)
+- <label>.collapsed.txt - sampled stacks in collapsed format (one "root;...;leaf count" per line) for flame graphs
+- <label>.memory.txt - the peak of traced memory and the top allocation sites (tracemalloc)
+
+Sessions run in the process doing the work, so batch runs across worker processes profile per file as well.
+Only one session per process runs at a time (Python 3.12+ allows only one active profiler), so sessions starting
+while another one runs (like of overlapping requests of the service) are skipped with a log message.
+Tracing the allocations slows the run down, so compare timings only between profiled runs.
+"""
+
+import collections
+import contextlib
+import cProfile
+import pathlib
+import re
+import sys
+import threading
+import tracemalloc
+from typing import Any, ContextManager, Optional, Union, no_type_check
+
+from visailu import ENCODING, log
+
+PROFILE_FOLDER = pathlib.Path('build', 'profile')
+SAMPLE_INTERVAL = 0.001  # seconds between stack samples (the interpreter switch interval may coarsen this)
+TOP_SITES = 25
+
+PathLike = Union[str, pathlib.Path]
+
+_SESSION_LOCK = threading.Lock()  # Held by the one active session of the process
+
+
+def label_of(name: str) -> str:
+    """Derive a file name stem from a model path or command name."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_.') or 'profile'
+
+
+@no_type_check
+def stack_of(frame) -> str:
+    """Render the stack of the frame in collapsed form (outermost first, frames as function (file:line))."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({pathlib.Path(code.co_filename).name}:{code.co_firstlineno})'.replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Sample the stack of one thread periodically from a background thread."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL) -> None:
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.counts: collections.Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='visailu-profile-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[stack_of(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def lines(self) -> list[str]:
+        """Provide the collapsed stacks with their sample counts (most frequent first)."""
+        return [f'{stack} {count}' for stack, count in self.counts.most_common()]
+
+
+@no_type_check
+def memory_report(snapshot, current: int, peak: int, top: int = TOP_SITES) -> list[str]:
+    """Render the peak and current traced memory and the top allocation sites of the snapshot."""
+    lines = [f'peak {peak / 1024 / 1024:.1f} MiB, current {current / 1024 / 1024:.1f} MiB (traced)']
+    statistics = snapshot.statistics('lineno')
+    lines.append(f'top {min(top, len(statistics))} allocation sites by size:')
+    for stat in statistics[:top]:
+        frame = stat.traceback[0]
+        lines.append(f'{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}')
+    return lines
+
+
+class Session:
+    """Profile the enclosed code and write the reports on exit."""
+
+    def __init__(self, name: str, folder: PathLike = PROFILE_FOLDER) -> None:
+        self.label = label_of(name)
+        self.folder = pathlib.Path(folder)
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler()
+        self.active = False
+        self.owned = False
+
+    def __enter__(self) -> 'Session':
+        if not _SESSION_LOCK.acquire(blocking=False):
+            log.info(f'profile of {self.label} skipped (another profile session is active)')
+            return self
+        try:
+            self.profiler.enable()
+        except ValueError as err:  # Another profiling tool is already active
+            _SESSION_LOCK.release()
+            log.info(f'profile of {self.label} skipped ({err})')
+            return self
+        self.active = True
+        self.owned = not tracemalloc.is_tracing()
+        if self.owned:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        self.sampler.start()
+        return self
+
+    @no_type_check
+    def __exit__(self, *exc_info) -> None:
+        if not self.active:
+            return
+        self.profiler.disable()
+        self.sampler.stop()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))  # Not the sampler
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        if self.owned:
+            tracemalloc.stop()
+        self.active = False
+        _SESSION_LOCK.release()
+        self.write(snapshot, current, peak)
+
+    @no_type_check
+    def write(self, snapshot, current: int, peak: int) -> dict[str, pathlib.Path]:
+        """Write the reports and return their paths per kind."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        paths = {
+            'pstats': self.folder / f'{self.label}.pstats',
+            'collapsed': self.folder / f'{self.label}.collapsed.txt',
+            'memory': self.folder / f'{self.label}.memory.txt',
+        }
+        self.profiler.dump_stats(paths['pstats'])
+        paths['collapsed'].write_text(''.join(f'{line}\n' for line in self.sampler.lines()), encoding=ENCODING)
+        report = memory_report(snapshot, current, peak)
+        paths['memory'].write_text('\n'.join(report) + '\n', encoding=ENCODING)
+        log.info(f'profile of {self.label} written to {self.folder}/{self.label}.* ({report[0]})')
+        return paths
+
+
+@no_type_check
+def profiled(options, name: str) -> ContextManager[Any]:
+    """Profile per option profile (True for the default folder or a folder path) else do nothing."""
+    folder = (options or {}).get('profile')
+    if not folder:
+        return contextlib.nullcontext()
+    return Session(name, PROFILE_FOLDER if folder is True else folder)
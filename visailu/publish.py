@@ -1,6 +1,6 @@
 """Publish a valid YAML model as application specific JSON.
 
-Target format is a naive 10 question array with 4 options each array:
+The default target profile (naive) is a 10 question array with 4 options each array:
 [
   {
     "id": 1,
@@ -24,18 +24,27 @@ Target format is a naive 10 question array with 4 options each array:
     ]
   },
 ]
+
+Other target profiles (like the unbounded bank) can be selected per name or registered with register_profile.
+With a sample plan (option sample) the questions and answers are drawn from the model as pool (see visailu.sample)
+while validating on the YAML event stream, so that the pool is never materialized as a whole (see visailu.events).
 """
 
-import json
+import itertools
 import pathlib
-from typing import Any, Union, no_type_check
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Union, no_type_check
 
 from visailu import (
     OUT_QUESTION_COUNT,
     OUT_ANSWERS_COUNT,
-    log,
 )
-from visailu.validate import validate_path
+from visailu.collector import warn
+from visailu.model import Question, Quiz, from_validated
+from visailu.timings import OBSERVERS, timed_iter
+from visailu.validate import validate_path, validate_stream
+from visailu.writer import target_suffix, write_hashed, write_quiz
+
+BUILD_FOLDER = 'build'
 
 AnswerExportType = list[dict[str, Union[str, bool]]]
 QuestionExportType = dict[str, Union[int, str, AnswerExportType]]
@@ -43,51 +52,262 @@ QuizExportType = list[QuestionExportType]
 
 
 @no_type_check
-def etl(data: Any) -> QuizExportType:
-    """Extract, load, and transform the data."""
-    id_export = 1
-    quiz_export: QuestionExportType = []
+def naive_shape(id_export: int, entry) -> QuestionExportType:
+    """Shape a validated question entry as naive export question with options."""
+    return {
+        'id': id_export,
+        'question': entry['question'],
+        'options': [{'answer': option['answer'], 'isCorrect': option['rating']} for option in entry['answers']],
+    }
+
+
+class TargetProfile(NamedTuple):
+    """Export target profile with question and answer counts expected (None means unbounded) and question shape."""
+
+    name: str
+    question_count: Optional[int]
+    answers_count: Optional[int]
+    shape: Callable[[int, Any], QuestionExportType]
+
+
+DEFAULT_PROFILE = 'naive'
+PROFILES = {
+    'bank': TargetProfile('bank', None, None, naive_shape),
+    'naive': TargetProfile('naive', OUT_QUESTION_COUNT, OUT_ANSWERS_COUNT, naive_shape),
+}
+
+
+def register_profile(profile: TargetProfile) -> None:
+    """Register (or replace) an export target profile by name."""
+    PROFILES[profile.name] = profile
+
+
+def resolve_profile(profile: Union[TargetProfile, str, None] = None) -> TargetProfile:
+    """Resolve the profile given by name (default naive) or as is."""
+    if isinstance(profile, TargetProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f'unknown target profile ({name}) - expected one of {", ".join(sorted(PROFILES))}')
+    return PROFILES[name]
+
+
+@no_type_check
+def etl(data: Any, profile: Union[TargetProfile, str, None] = None) -> Iterator[QuestionExportType]:
+    """Extract, load, and transform the data (parsed model or Quiz) lazily yielding one export question at a time.
+
+    The limits and the shape of the questions derive from the target profile (default naive: 10 times 4).
+    """
+    profile = resolve_profile(profile)
+    question_count, answers_count = profile.question_count, profile.answers_count
     questions = data['questions']
     num_questions = len(questions)
-    if num_questions < OUT_QUESTION_COUNT or OUT_QUESTION_COUNT < num_questions:
-        problem = 'too few' if num_questions < OUT_QUESTION_COUNT else 'too many'
-        log.warning(f'model with {problem} questions {num_questions} instead of 10')
-    for entry in questions:
-        question_export = {
-            'id': id_export,
-            'question': entry['question'],
-            'options': [],
-        }
-        answers = entry['answers']
-        num_answers = len(answers)
-        if num_answers < OUT_ANSWERS_COUNT or OUT_ANSWERS_COUNT < num_answers:
-            problem = 'too few' if num_answers < OUT_ANSWERS_COUNT else 'too many'
-            log.warning(f'model with {problem} answers {num_answers} instead of 4 at question {id_export}')
-        for option in answers:
-            question_export['options'].append({'answer': option['answer'], 'isCorrect': option['rating']})
-        quiz_export.append(question_export)
+    if question_count is not None and num_questions != question_count:
+        problem = 'too few' if num_questions < question_count else 'too many'
+        warn('model with %s questions %d instead of %d', problem, num_questions, question_count)
+    id_export = 0
+    for entry in itertools.islice(questions, question_count):
         id_export += 1
-        if id_export > OUT_QUESTION_COUNT:
-            break
+        num_answers = len(entry) if isinstance(entry, Question) else len(entry['answers'])
+        if answers_count is not None and num_answers != answers_count:
+            problem = 'too few' if num_answers < answers_count else 'too many'
+            warn(
+                'model with %s answers %d instead of %d at question %d', problem, num_answers, answers_count, id_export
+            )
+        yield profile.shape(id_export, entry)
 
-    if len(quiz_export) < OUT_QUESTION_COUNT:
-        log.warning(f'quiz with too few questions {len(quiz_export)} instead of 10')
+    if question_count is not None and id_export < question_count:
+        warn('quiz with too few questions %d instead of %d', id_export, question_count)
 
-    return quiz_export
+
+def _export_counts(question: Any) -> dict[str, int]:
+    options = question.get('options') if isinstance(question, dict) else None
+    return {'questions': 1, 'answers': len(options) if isinstance(options, list) else 0}
+
+
+@no_type_check
+def exported(data: Any, profile: Union[TargetProfile, str, None] = None) -> Iterable[QuestionExportType]:
+    """Export the questions lazily - or eagerly while stages are observed to time etl apart from writing."""
+    questions = etl(data, profile)
+    if OBSERVERS:
+        return list(timed_iter('etl', questions, _export_counts))
+    return questions
+
+
+def output_settings(options: Union[dict[str, Any], None] = None) -> dict[str, Any]:
+    """Collect the settings that influence the published output (part of the incremental build identity)."""
+    if options is None:
+        options = {}
+    profile = resolve_profile(options.get('target'))
+    return {
+        'answers_count': profile.answers_count,
+        'compact': bool(options.get('compact', False)),
+        'gzip': bool(options.get('gzip', False)),
+        'hashed': bool(options.get('hashed', False)),
+        'question_count': profile.question_count,
+        'sample': list(options['sample']) if options.get('sample') else None,
+        'shape': f'{profile.shape.__module__}.{profile.shape.__qualname__}',
+        'target': profile.name,
+    }
+
+
+@no_type_check
+def _collecting(questions, collector: Optional[list[Any]]) -> Iterator[Any]:
+    """Pass the questions through and append them to the collector (if any)."""
+    for question in questions:
+        if collector is not None:
+            collector.append(question)
+        yield question
+
+
+@no_type_check
+def _publish_data(
+    data, base: pathlib.Path, options, revalidation=None, addressed=None, drawn=None
+) -> tuple[list[pathlib.Path], Any]:
+    """Write the validated data as quiz to base plus suffix (or each sampled variant to base-v<n> plus suffix).
+
+    With a revalidation (see visailu.revalidate) the texts of unchanged questions are reused (unless sampling).
+    Variants drawn already (like on the event stream) are published instead of drawing them from the data (quizzes
+    of the compact model as they are).
+    With option hashed the quizzes are written content addressed with gzip sidecars and described per quiz id in
+    the addressed dict (see visailu.etags).
+    Returns the targets and the quiz (the list of variant quizzes for more than one variant, None if not collected).
+    """
+    compact, compress = bool(options.get('compact', False)), bool(options.get('gzip', False))
+    plan = options.get('sample')
+    if drawn is None and plan:
+        from visailu.sample import variants  # only needed for sampling
+
+        drawn = variants(data, plan)
+        data['questions'] = None  # The pool is no longer needed
+    elif drawn is None:
+        drawn = [data]
+    targets, quizzes = [], []
+    for number, variant in enumerate(drawn, 1):
+        suffix = target_suffix(compress)
+        target_path = base.with_name(f'{base.name}-v{number}{suffix}' if len(drawn) > 1 else base.name + suffix)
+        if isinstance(variant, Quiz):
+            model = variant  # Built on the event stream already
+        else:
+            model = from_validated(variant, release=True)  # The compact model replaces the parsed questions
+        quiz = [] if options.get('collect', True) else None
+        questions = _collecting(exported(model, options.get('target')), quiz)
+        if revalidation is not None and not plan:
+            questions = revalidation.serialized(questions, output_settings(options), compact)
+        if options.get('hashed'):
+            from visailu.etags import quiz_entry  # only needed for content addressed outputs
+
+            plain, packed = write_hashed(questions, target_path.with_name(target_path.stem), compact=compact)
+            quiz_id = str(model.id) if len(drawn) == 1 else f'{model.id}-v{number}'
+            if addressed is not None:
+                if quiz_id in addressed:
+                    warn('quiz id %s published more than once from one model', quiz_id)
+                addressed[quiz_id] = quiz_entry(plain, packed)
+            target_path = plain.path
+        else:
+            write_quiz(questions, target_path, compact=compact, compress=compress)
+        targets.append(target_path)
+        quizzes.append(quiz)
+    if len(drawn) > 1:
+        return targets, quizzes if options.get('collect', True) else None
+    return targets, quizzes[0]
+
+
+def _published(targets: list[pathlib.Path]) -> str:
+    """Name the targets in messages."""
+    if len(targets) == 1:
+        return f'quiz data at {targets[0]}'
+    return f'{len(targets)} quiz variants at {targets[0]} to {targets[-1]}'
 
 
 @no_type_check
 def publish_path(path: str, options=None) -> tuple[int, str, Any]:
-    """Drive the model publication."""
-    code, message, data = validate_path(path)
+    """Drive the model publication.
+
+    Option compact drops all optional whitespace, option gzip compresses the output (suffix .json.gz).
+    The target is written while the questions are exported and replaced atomically.
+    Option target names the export target profile (default naive).
+    Option sample (a SamplePlan) draws the questions and answers - more than one variant are written to
+    build/<stem>-v<n>.json (variant n counting from 1) and the data returned is the list of variant quizzes.
+    Option collect (default True) decides if the exported questions are also returned (else None).
+    Without the parsed model cache (option cache) the compact model is built while validating on the YAML event
+    stream (see visailu.events), so the parsed questions are never held as a whole.
+    Option hashed writes build/<stem>.<digest>.json with a precompressed .json.gz sidecar and records them for the
+    manifest (see visailu.etags) instead (option gzip is ignored then).
+    In incremental mode (option incremental) models whose content, visailu version, and output settings match
+    the build manifest are skipped and the data returned is None - and of changed models only the changed questions
+    are checked and serialized anew (see visailu.revalidate).
+    """
+    if options is None:
+        options = {}
+    build_path = pathlib.Path(BUILD_FOLDER)
+    target_path = build_path / (pathlib.Path(path).stem + target_suffix(bool(options.get('gzip', False))))
+    incremental = options.get('incremental', False)
+    if incremental:
+        from visailu import manifest  # only needed for incremental builds
+
+        settings = output_settings(options)
+        digest = manifest.digest_of(path)
+        if manifest.is_current(manifest.load_entry(build_path, path), digest, settings):
+            return 0, f'skipped unchanged quiz data at {target_path} (from model at {path})', None
+
+    drawn = None
+    if incremental:
+        from visailu.revalidate import revalidate_path
+
+        revalidation, (code, message, data) = revalidate_path(path, options, save=False)
+    elif options.get('sample'):
+        from visailu.events import sample_events_path  # only needed for sampling
+
+        revalidation, (code, message, drawn) = None, sample_events_path(path, options['sample'], options)
+        data = None
+    elif not options.get('cache'):
+        from visailu.events import model_events_path  # only needed without the parsed model cache
+
+        revalidation, (code, message, model) = None, model_events_path(path, options)
+        data, drawn = None, (None if model is None else [model])
+    else:
+        revalidation, (code, message, data) = None, validate_path(path, options=options)
     if code != 0:
+        if incremental:
+            manifest.forget(build_path, path)
+            if revalidation is not None:
+                revalidation.save()
         return code, message, data
 
-    quiz = etl(data)
-    build_path = pathlib.Path('build')
-    build_path.mkdir(parents=True, exist_ok=True)
-    target_path = build_path / (pathlib.Path(path).stem + '.json')
-    with target_path.open('wt', encoding='utf-8') as handle:
-        json.dump(quiz, handle, indent=2)
+    addressed = {}
+    targets, quiz = _publish_data(data, build_path / pathlib.Path(path).stem, options, revalidation, addressed, drawn)
+    if options.get('hashed'):
+        from visailu import etags  # only needed for content addressed outputs
+
+        etags.record(build_path, path, addressed)
+
+    if incremental:
+        revalidation.save()
+        manifest.record(build_path, path, digest, settings, targets)
+
+    return 0, f'published {_published(targets)} (from model at {path})', quiz
+
+
+@no_type_check
+def publish_stream(path: str, options=None) -> Iterator[tuple[int, int, str, Any]]:
+    """Drive the model publication per document of a YAML stream yielding (index, code, message, quiz).
+
+    Every valid document is published to its own target build/<stem>-<index>.json (index counting from 1).
+    Options compact, gzip, hashed, target, sample, and collect work as for publish_path.
+    """
+    if options is None:
+        options = {}
+    build_path = pathlib.Path(BUILD_FOLDER)
+    stem = pathlib.Path(path).stem
+    addressed = {}
+    for index, code, message, data in validate_stream(path, options=options):
+        if code != 0:
+            yield index, code, message, data
+            continue
+        targets, quiz = _publish_data(data, build_path / f'{stem}-{index}', options, addressed=addressed)
+        yield index, 0, f'published {_published(targets)} (from document {index} of model at {path})', quiz
+    if options.get('hashed'):
+        from visailu import etags  # only needed for content addressed outputs
 
-    return 0, f'published quiz data at {target_path} (from model at {path})', quiz
+        etags.record(build_path, path, addressed)
@@ -0,0 +1,182 @@
+"""Question level incremental revalidation and re-export of large single file models.
+
+Every question gets a fingerprint (BLAKE2b of its parsed subtree and the top level meta), and the outcome of its
+checks (the completed ratings of a clean question) and its serialized export are kept per model below the build
+folder. A later run checks and serializes only the questions whose fingerprint is unknown.
+
+Results are identical to a full run: a fingerprint covers everything the checks of a question depend on (its
+entry including any own meta and the model meta), questions with violations are always checked anew, model level
+checks always run, and the state is dropped when the visailu version or the output settings change.
+With option check_incremental every reused outcome is verified against a full run (mismatches are logged as
+errors and the full result is used).
+"""
+
+import copy
+import hashlib
+import marshal
+import pathlib
+from typing import Any, Iterable, Iterator, Optional, Union, no_type_check
+
+from visailu import ENCODING, VERSION, log
+from visailu.validate import ScaleChecker, _question_violations, _validate
+from visailu.verify import failure_message, verify_path
+from visailu.writer import Serialized, atomic_target, serialize
+
+STATE_FOLDER = pathlib.Path('build', '.questions')
+FORMAT = 1  # Increment when the state layout or the fingerprint changes
+MARSHAL_VERSION = 2  # Without references, so equal values of equal structure marshal to equal bytes
+
+PathLike = Union[str, pathlib.Path]
+ResultType = tuple[int, str, Any]
+
+
+def state_path(source: PathLike, folder: PathLike = STATE_FOLDER) -> pathlib.Path:
+    """Locate the state of the model at source (one per resolved source path)."""
+    name = hashlib.sha1(str(pathlib.Path(source).resolve()).encode(ENCODING), usedforsecurity=False).hexdigest()
+    return pathlib.Path(folder) / f'{name}.marshal'
+
+
+def fingerprint(value: Any, salt: bytes = b'') -> Optional[bytes]:
+    """Digest the value (None for values marshal does not support like timestamps)."""
+    try:
+        payload = marshal.dumps(value, MARSHAL_VERSION)
+    except ValueError:
+        return None
+    return hashlib.blake2b(salt + payload, digest_size=16).digest()
+
+
+class QuestionMemo:
+    """Outcomes of clean questions per fingerprint from the last run and the ones seen in this run."""
+
+    __slots__ = ('salt', 'known', 'seen', 'fingerprints', 'reused', 'checked')
+
+    def __init__(self, known: dict[bytes, tuple[Any, ...]], meta: Any) -> None:
+        self.salt = fingerprint(meta)
+        self.known = known if self.salt is not None else {}
+        self.seen: dict[bytes, tuple[Any, ...]] = {}
+        self.fingerprints: dict[int, bytes] = {}
+        self.reused = 0
+        self.checked = 0
+
+    @no_type_check
+    def replay(self, q_slot: int, entry, question, answers, checker: ScaleChecker) -> Iterator[tuple[str, Any]]:
+        """Check the question like _question_violations unless its fingerprint is known (then only fill ratings)."""
+        key = None if self.salt is None else fingerprint(entry, self.salt)
+        ratings = self.known.get(key) if key is not None else None
+        if ratings is not None:
+            for option, rating in zip(answers, ratings):
+                option['rating'] = rating
+            self.seen[key] = ratings
+            self.fingerprints[q_slot] = key
+            self.reused += 1
+            return
+        self.checked += 1
+        clean = True
+        for violation in _question_violations(question, answers, checker):
+            clean = False
+            yield violation
+        if clean and key is not None:
+            self.seen[key] = tuple(option['rating'] for option in answers)
+            self.fingerprints[q_slot] = key
+
+
+class Revalidation:
+    """State of the question level incremental validation and export of one model."""
+
+    def __init__(self, source: PathLike, options: Any = None, folder: PathLike = STATE_FOLDER) -> None:
+        self.source = str(source)
+        self.path = state_path(source, folder)
+        self.options = options or {}
+        self.settings: Any = None
+        self.memo: Optional[QuestionMemo] = None
+        self.texts: dict[tuple[bytes, int], str] = {}
+        self.known_texts: dict[tuple[bytes, int], str] = {}
+        self.state = self._load()
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            state = marshal.loads(self.path.read_bytes())
+        except (OSError, EOFError, TypeError, ValueError):
+            return {}
+        if not isinstance(state, dict) or state.get('format') != FORMAT or state.get('version') != VERSION:
+            return {}
+        return state
+
+    @no_type_check
+    def validate(self, data) -> ResultType:
+        """Validate the data checking only questions changed since the last run (verified if requested)."""
+        verify = bool(self.options.get('check_incremental'))
+        meta = data.get('meta') if isinstance(data, dict) else None
+        self.memo = QuestionMemo(self.state.get('questions', {}), meta)
+        if verify:
+            full = _validate(copy.deepcopy(data))
+        result = _validate(data, self.memo)
+        if verify and result != full:
+            log.error(f'incremental validation of model at {self.source} differs from the full run')
+            self.memo = None
+            return full
+        log.debug(f'revalidated {self.memo.checked} and reused {self.memo.reused} questions of model at {self.source}')
+        return result
+
+    @no_type_check
+    def serialized(self, questions: Iterable[Any], settings: Any, compact: bool) -> Iterator[Any]:
+        """Pass the exported questions (in model order) as Serialized reusing texts of unchanged questions."""
+        self.settings = settings
+        if self.state.get('settings') == settings:
+            self.known_texts = self.state.get('texts', {})
+        fingerprints = {} if self.memo is None else self.memo.fingerprints
+        verify = bool(self.options.get('check_incremental'))
+        for slot, question in enumerate(questions):
+            key = fingerprints.get(slot)
+            if key is None:
+                yield question
+                continue
+            text = self.known_texts.get((key, slot))
+            if text is None or verify:
+                fresh = serialize(question, compact)
+                if text is not None and text != fresh:
+                    log.error(f'incremental export of question {slot + 1} differs from the full run')
+                text = fresh
+            self.texts[(key, slot)] = text
+            yield Serialized(text)
+
+    def save(self) -> None:
+        """Persist the outcomes and texts of the questions of this run (dropping all others).
+
+        Without export in this run the texts of the last export are kept for the questions still present.
+        """
+        if self.memo is None:
+            self.path.unlink(missing_ok=True)
+            return
+        settings, texts = self.settings, self.texts
+        if settings is None:
+            settings = self.state.get('settings')
+            texts = {key: text for key, text in self.state.get('texts', {}).items() if key[0] in self.memo.seen}
+        state = {
+            'format': FORMAT,
+            'version': VERSION,
+            'questions': self.memo.seen,
+            'settings': settings,
+            'texts': texts,
+        }
+        with atomic_target(self.path) as handle:
+            handle.write(marshal.dumps(state))
+
+
+@no_type_check
+def revalidate_path(path: str, options=None, save: bool = True) -> tuple[Optional[Revalidation], ResultType]:
+    """Drive the incremental validation of the model at path and persist the state (unless the caller saves it).
+
+    Returns the revalidation (None for invalid YAML) and the (code, message, data) of the validation.
+    """
+    if options is None:
+        options = {}
+    code, message, data = verify_path(path, options=options)
+    if code != 0:
+        return None, (code, failure_message(message), data)
+
+    revalidation = Revalidation(path, options)
+    result = revalidation.validate(data)
+    if save:
+        revalidation.save()
+    return revalidation, result
@@ -0,0 +1,149 @@
+"""Draw reproducible samples of questions and answers from large question pools.
+
+A sample plan picks a number of questions per quiz and a number of answers per question with a seed.
+All variants are drawn in one pass over the questions with one reservoir per variant (algorithm R or, when weighted
+by the optional question key weight, the keyed reservoir of Efraimidis and Spirakis), so the pool is never copied
+or shuffled and only the sampled entries are kept.
+The reservoirs take the questions one at a time, so that publication draws them while validating on the YAML event
+stream (see visailu.events.sample_events_path) and large pools are never materialized as a whole.
+Samples keep the order of the pool, and a sample of binary rated answers keeps at least one correct answer.
+"""
+
+import heapq
+import random
+from typing import Any, Callable, Iterable, NamedTuple, Optional, no_type_check
+
+from visailu.collector import warn
+
+WEIGHT_KEY = 'weight'
+
+
+class SamplePlan(NamedTuple):
+    """Counts of questions and answers (None takes all) to draw per variant from the seed (any int or str)."""
+
+    questions: Optional[int]
+    answers: Optional[int]
+    seed: Any = 0
+    variants: int = 1
+    weighted: bool = False
+
+
+def rngs_of(plan: SamplePlan) -> list[random.Random]:
+    """Provide one independent random number generator per variant derived from the seed."""
+    return [random.Random(f'{plan.seed}/{variant}') for variant in range(1, plan.variants + 1)]
+
+
+class Reservoirs:
+    """One sample per generator filled one item at a time (so the items may come from a stream of any length)."""
+
+    def __init__(
+        self, count: Optional[int], rngs: list[random.Random], weight: Optional[Callable[[Any], float]] = None
+    ) -> None:
+        self.count = count
+        self.rngs = rngs
+        self.weight = weight
+        self.seen = 0
+        self.samples: list[list[tuple[int, Any]]] = [[] for _ in rngs]
+        self.heaps: list[list[tuple[float, int, Any]]] = [[] for _ in rngs]
+
+    def add(self, item: Any) -> None:
+        """Offer the next item to every reservoir."""
+        seen, count = self.seen, self.count
+        self.seen += 1
+        if count is None:
+            for sample in self.samples:
+                sample.append((seen, item))
+            return
+        if self.weight is None:
+            for rng, sample in zip(self.rngs, self.samples):
+                if seen < count:
+                    sample.append((seen, item))
+                    continue
+                slot = rng.randrange(seen + 1)
+                if slot < count:
+                    sample[slot] = (seen, item)
+            return
+        mass = self.weight(item)
+        if mass <= 0:
+            return
+        for rng, heap in zip(self.rngs, self.heaps):
+            key = rng.random() ** (1 / mass)
+            if len(heap) < count:
+                heapq.heappush(heap, (key, seen, item))
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, (key, seen, item))
+
+    def drawn(self) -> list[list[Any]]:
+        """Provide the samples in input order."""
+        if self.weight is not None and self.count is not None:
+            chosen = [[(seen, item) for _, seen, item in heap] for heap in self.heaps]
+        else:
+            chosen = self.samples
+        return [[item for _, item in sorted(sample, key=lambda pair: pair[0])] for sample in chosen]
+
+
+def reservoirs(
+    items: Iterable[Any],
+    count: Optional[int],
+    rngs: list[random.Random],
+    weight: Optional[Callable[[Any], float]] = None,
+) -> list[list[Any]]:
+    """Draw count items (all if None) per generator in a single pass and return the samples in input order.
+
+    With weight the chance of an item to be drawn is proportional to its weight (items without positive weight
+    are never drawn).
+    """
+    pool = Reservoirs(count, rngs, weight)
+    for item in items:
+        pool.add(item)
+    return pool.drawn()
+
+
+@no_type_check
+def question_weight(entry) -> float:
+    """Read the optional weight of a question entry (default 1) - invalid weights exclude the question."""
+    value = entry.get(WEIGHT_KEY, 1) if isinstance(entry, dict) else 1
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        warn('ignoring question with non-numeric %s (%r) for sampling', WEIGHT_KEY, value)
+        return 0
+    return value
+
+
+@no_type_check
+def sample_answers(answers: list[Any], count: Optional[int], rng: random.Random) -> list[Any]:
+    """Draw count answers (all if None) in input order keeping at least one correct answer of binary ratings."""
+    if count is None or len(answers) <= count:
+        return list(answers)
+    correct = [slot for slot, option in enumerate(answers) if option['rating'] is True]
+    if not correct or count < 1 or any(not isinstance(option['rating'], bool) for option in answers):
+        return reservoirs(answers, count, [rng])[0]
+    keep = rng.choice(correct)
+    others = reservoirs((slot for slot in range(len(answers)) if slot != keep), count - 1, [rng])[0]
+    return [answers[slot] for slot in sorted([keep, *others])]
+
+
+@no_type_check
+def variants(data, plan: SamplePlan) -> list[dict[str, Any]]:
+    """Draw the variants of the plan from validated data (one pass over the questions) as validated data each.
+
+    The data is left unchanged and the variants share the entries of the sampled questions and answers.
+    """
+    pool = pool_of(plan)
+    for entry in data['questions']:
+        pool.add(entry)
+    return assembled(data, pool, plan)
+
+
+def pool_of(plan: SamplePlan) -> Reservoirs:
+    """Provide the empty reservoirs of the plan to offer the questions to one by one."""
+    return Reservoirs(plan.questions, rngs_of(plan), question_weight if plan.weighted else None)
+
+
+@no_type_check
+def assembled(header, pool: Reservoirs, plan: SamplePlan) -> list[dict[str, Any]]:
+    """Assemble the variants from the model values (without questions) and the filled reservoirs of the plan."""
+    quizzes = []
+    for rng, questions in zip(pool.rngs, pool.drawn()):
+        entries = [{**entry, 'answers': sample_answers(entry['answers'], plan.answers, rng)} for entry in questions]
+        quizzes.append({**header, 'questions': entries})
+    return quizzes
@@ -0,0 +1,229 @@
+"""Local HTTP service to verify, validate, and publish posted YAML models in a warm process.
+
+Endpoints:
+
+- POST /verify, /validate, /publish with the YAML model as body (query parameters target and loader optional)
+- GET /metrics for request counts and latencies per endpoint
+- GET /health for liveness
+
+Requests are handled by a bounded pool of worker threads; requests beyond the pool and its backlog receive 503.
+Every connection carries one request (the response closes it), so idle clients never hold a worker.
+The service listens on a TCP host and port or on a unix domain socket.
+"""
+
+import http.server
+import itertools
+import json
+import socketserver
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, no_type_check
+
+from visailu import APP_ALIAS, SERVE_HOST, SERVE_PORT, SERVE_WORKERS, VERSION, log
+from visailu.api import publish, validate, verify
+from visailu.profiling import profiled
+from visailu.publish import PROFILES
+
+DEFAULT_HOST = SERVE_HOST
+DEFAULT_PORT = SERVE_PORT
+DEFAULT_WORKERS = SERVE_WORKERS
+BACKLOG_PER_WORKER = 8
+MAX_BODY_BYTES = 16 << 20
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+API_ACTIONS = {'publish': publish, 'validate': validate, 'verify': verify}
+ACTIONS = tuple(API_ACTIONS)
+JSON_CONTENT_TYPE = 'application/json'
+
+
+class Metrics:
+    """Thread safe request counters and latency histograms per endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._endpoints: dict[str, dict[str, Any]] = {}
+
+    def observe(self, endpoint: str, status: int, seconds: float) -> None:
+        """Count a request to the endpoint with response status and latency."""
+        millis = seconds * 1e3
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint,
+                {'count': 0, 'status': {}, 'latency_ms_sum': 0.0, 'latency_ms_max': 0.0, 'buckets': {}},
+            )
+            stats['count'] += 1
+            stats['status'][str(status)] = stats['status'].get(str(status), 0) + 1
+            stats['latency_ms_sum'] += millis
+            stats['latency_ms_max'] = max(stats['latency_ms_max'], millis)
+            bucket = next((f'le_{bound}' for bound in LATENCY_BUCKETS_MS if millis <= bound), 'le_inf')
+            stats['buckets'][bucket] = stats['buckets'].get(bucket, 0) + 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Provide a consistent copy of all metrics including mean latencies."""
+        with self._lock:
+            endpoints = {
+                name: {
+                    **stats,
+                    'status': dict(stats['status']),
+                    'buckets': dict(stats['buckets']),
+                    'latency_ms_mean': stats['latency_ms_sum'] / stats['count'],
+                }
+                for name, stats in self._endpoints.items()
+            }
+        return {'uptime_seconds': time.time() - self._started, 'version': VERSION, 'endpoints': endpoints}
+
+
+@no_type_check
+def handle(action: str, body: bytes, options=None) -> tuple[int, dict[str, Any]]:
+    """Process the YAML body with the action in memory and return HTTP status and response document.
+
+    The response document carries code and message like the CLI and, for publish, the exported questions as data.
+    """
+    code, message, data = API_ACTIONS[action](body, options=options, label='<request>')
+    response = {'code': code, 'message': message}
+    if code == 0 and action == 'publish':
+        response['data'] = data
+    return (200 if code == 0 else 422), response
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """Dispatch the endpoints (one request per connection, as a worker serves a whole connection)."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = f'{APP_ALIAS}/{VERSION}'
+    timeout = 5  # Connections sending no complete request release their worker after this many seconds
+    disable_nagle_algorithm = True  # Headers and body are separate writes - avoid the delayed ACK stall
+
+    def address_string(self) -> str:
+        """Name the client (unix domain sockets have no address)."""
+        return str(self.client_address[0]) if isinstance(self.client_address, tuple) else 'local'
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa
+        """Log requests only when debugging."""
+        log.debug(f'{self.address_string()} {format % args}')
+
+    def _timed(self, endpoint: str, status: int, document: Any, start: float) -> None:
+        """Respond with the document after counting the request (so clients seeing a response see it counted)."""
+        payload = json.dumps(document, separators=(',', ':')).encode('utf-8')
+        self.server.metrics.observe(endpoint, status, time.perf_counter() - start)  # type: ignore
+        self.close_connection = True
+        self.send_response(status)
+        self.send_header('Content-Type', JSON_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Serve metrics and health."""
+        start = time.perf_counter()
+        route = urllib.parse.urlsplit(self.path).path
+        if route == '/metrics':
+            return self._timed(route, 200, self.server.metrics.snapshot(), start)  # type: ignore
+        if route == '/health':
+            return self._timed(route, 200, {'status': 'ok'}, start)
+        return self._timed('other', 404, {'code': 2, 'message': f'unknown endpoint ({route})'}, start)
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Verify, validate, or publish the posted YAML model."""
+        start = time.perf_counter()
+        parts = urllib.parse.urlsplit(self.path)
+        action = parts.path.strip('/')
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            length = -1
+        if action not in ACTIONS:
+            return self._timed('other', 404, {'code': 2, 'message': f'unknown endpoint ({parts.path})'}, start)
+        if not 0 <= length <= self.server.max_body:  # type: ignore
+            return self._timed(parts.path, 413, {'code': 2, 'message': 'missing or excessive content length'}, start)
+
+        query = urllib.parse.parse_qs(parts.query)
+        options = {
+            'target': query.get('target', [''])[0] or None,
+            'yaml_loader': query.get('loader', [''])[0],
+        }
+        if options['target'] is not None and options['target'] not in PROFILES:
+            self.rfile.read(length)
+            return self._timed(parts.path, 400, {'code': 2, 'message': 'unknown target profile'}, start)
+
+        body = self.rfile.read(length)
+        try:
+            with profiled({'profile': self.server.profile}, f'{action}-{next(self.server.sequence)}'):  # type: ignore
+                status, document = handle(action, body, options)
+        except Exception as err:  # noqa - answer requests with unexpected structure instead of dropping them
+            log.debug(f'request failed: {err}')
+            status, document = 422, {'code': 1, 'message': f'failed to process the model: {err}'}
+        return self._timed(parts.path, status, document, start)
+
+
+class PooledServerMixIn:
+    """Handle requests in a bounded pool of worker threads and reject the overflow with 503."""
+
+    workers = DEFAULT_WORKERS
+
+    def init_pool(self, workers: int, max_body: int, profile: bool = False) -> None:
+        """Set up the worker pool, the admission bound, and the shared state."""
+        self.workers = workers
+        self.max_body = max_body
+        self.profile = profile
+        self.sequence = itertools.count(1)  # Names the request profiles
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{APP_ALIAS}-worker')
+        self.admission = threading.BoundedSemaphore(workers * BACKLOG_PER_WORKER)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Hand the connection to the pool or reject it when the backlog is full."""
+        if not self.admission.acquire(blocking=False):
+            try:
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            finally:
+                self.shutdown_request(request)  # type: ignore
+            self.metrics.observe('rejected', 503, 0.0)
+            return
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)  # type: ignore
+        except Exception:  # noqa
+            self.handle_error(request, client_address)  # type: ignore
+        finally:
+            self.shutdown_request(request)  # type: ignore
+            self.admission.release()
+
+    def server_close(self) -> None:
+        """Stop the pool after the listening socket."""
+        super().server_close()  # type: ignore
+        self.executor.shutdown(wait=True)
+
+
+class PooledHTTPServer(PooledServerMixIn, http.server.HTTPServer):
+    """HTTP server on TCP with a bounded worker pool."""
+
+
+class PooledUnixHTTPServer(PooledServerMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a unix domain socket with a bounded worker pool."""
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    max_body: int = MAX_BODY_BYTES,
+    profile: bool = False,
+) -> Any:
+    """Create the pooled server listening on the unix domain socket (if given) or else on host and port.
+
+    With profile every request is profiled (see visailu.profiling) as <action>-<sequence number>.
+    """
+    server: Any
+    if socket_path:
+        server = PooledUnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = PooledHTTPServer((host, port), RequestHandler)
+    server.init_pool(max(1, workers), max_body, profile)
+    return server
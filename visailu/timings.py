@@ -0,0 +1,159 @@
+"""Lightweight per-stage instrumentation reporting wall time and counters to registered observers.
+
+Stages are verify (YAML parse), validate, etl, and write.
+Without any observer registered the instrumented functions only check an empty list (effectively zero overhead).
+"""
+
+import contextlib
+import functools
+import json
+import os
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+CountersType = dict[str, int]
+
+
+class StageRecord(NamedTuple):
+    """Measurement of one pass through a stage."""
+
+    stage: str
+    seconds: float
+    counters: CountersType
+
+
+ObserverType = Callable[[StageRecord], None]
+
+OBSERVERS: list[ObserverType] = []
+STAGES = ('cache', 'verify', 'validate', 'etl', 'write')
+
+
+def register(observer: ObserverType) -> None:
+    """Register the observer to receive every stage record."""
+    OBSERVERS.append(observer)
+
+
+def unregister(observer: ObserverType) -> None:
+    """Unregister the observer (if registered)."""
+    with contextlib.suppress(ValueError):
+        OBSERVERS.remove(observer)
+
+
+@contextlib.contextmanager
+def observing(observer: ObserverType) -> Iterator[ObserverType]:
+    """Register the observer for the duration of the context."""
+    register(observer)
+    try:
+        yield observer
+    finally:
+        unregister(observer)
+
+
+def emit(stage: str, seconds: float, counters: Optional[CountersType] = None) -> None:
+    """Hand the record of a stage pass to all observers."""
+    record = StageRecord(stage, seconds, counters or {})
+    for observer in tuple(OBSERVERS):
+        observer(record)
+
+
+def replay(records: Iterable[StageRecord]) -> None:
+    """Hand records measured elsewhere (for example in worker processes) to all observers."""
+    for record in records:
+        emit(*record)
+
+
+def staged(stage: str, tally: Callable[..., CountersType]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorate a function as stage and derive the counters with tally(result, *args, **kwargs) when observed."""
+
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not OBSERVERS:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            emit(stage, seconds, tally(result, *args, **kwargs))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def timed_iter(
+    stage: str, items: Iterable[Any], tally: Callable[[Any], CountersType], counters: Optional[CountersType] = None
+) -> Iterator[Any]:
+    """Pass the items through timing only their production and emit one record when exhausted or closed."""
+    seconds, totals = 0.0, dict(counters or {})
+    iterator = iter(items)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            finally:
+                seconds += time.perf_counter() - start
+            for name, value in tally(item).items():
+                totals[name] = totals.get(name, 0) + value
+            yield item
+    except StopIteration:
+        return
+    finally:
+        emit(stage, seconds, totals)
+
+
+class Aggregate:
+    """Observer summing calls, seconds, and counters per stage."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict[str, Any]] = {}
+
+    def __call__(self, record: StageRecord) -> None:
+        totals = self.stages.setdefault(record.stage, {'calls': 0, 'seconds': 0.0})
+        totals['calls'] += 1
+        totals['seconds'] += record.seconds
+        for name, value in record.counters.items():
+            totals[name] = totals.get(name, 0) + value
+
+    def ordered(self) -> dict[str, dict[str, Any]]:
+        """Provide the totals in pipeline order (unknown stages last by name)."""
+        rank = {stage: slot for slot, stage in enumerate(STAGES)}
+        return {name: self.stages[name] for name in sorted(self.stages, key=lambda name: (rank.get(name, 99), name))}
+
+    def report(self, fmt: str = 'human') -> str:
+        """Render the totals as JSON or as one human readable line per stage."""
+        if fmt == 'json':
+            return json.dumps({'stages': self.ordered()})
+        lines = []
+        for name, totals in self.ordered().items():
+            counters = ' '.join(f'{key}={value}' for key, value in totals.items() if key not in ('calls', 'seconds'))
+            lines.append(
+                f'{name:8s} calls={totals["calls"]} total={totals["seconds"] * 1e3:.3f} ms {counters}'.rstrip()
+            )
+        return '\n'.join(lines)
+
+
+def model_counts(data: Any) -> CountersType:
+    """Count the questions and answers of a (parsed) model without failing on unexpected structure."""
+    questions = data.get('questions') if isinstance(data, dict) else None
+    if not isinstance(questions, list):
+        return {'questions': 0, 'answers': 0}
+    answers = sum(
+        len(entry['answers'])
+        for entry in questions
+        if isinstance(entry, dict) and isinstance(entry.get('answers'), list)
+    )
+    return {'questions': len(questions), 'answers': answers}
+
+
+def source_size(source: Any) -> int:
+    """Determine the size in bytes of a YAML source (text, bytes, or file handle) - 0 if unknown."""
+    if isinstance(source, bytes):
+        return len(source)
+    if isinstance(source, str):
+        return len(source.encode('utf-8'))
+    try:
+        return os.fstat(source.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return 0
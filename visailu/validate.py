@@ -1,9 +1,18 @@
 """Validate data against the model for quiz data."""
 
-from typing import Any, Union, no_type_check
+import pathlib
+from typing import Any, Iterator, NamedTuple, Optional, Union, no_type_check
+
+import yaml
 
 from visailu import (
     INVALID_YAML_RESOURCE,
+    LIMIT_ALIASES_EXCEEDED,
+    LIMIT_BYTES_EXCEEDED,
+    LIMIT_DEPTH_EXCEEDED,
+    LIMIT_DOCUMENTS_EXCEEDED,
+    LIMIT_NODES_EXCEEDED,
+    LIMIT_SECONDS_EXCEEDED,
     MODEL_META_INVALID_DEFAULTS,
     MODEL_META_INVALID_RANGE,
     MODEL_META_INVALID_RANGE_VALUE,
@@ -15,7 +24,42 @@ from visailu import (
     MODEL_STRUCTURE_UNEXPECTED,
     MODEL_VALUES_MISSING,
 )
-from visailu.verify import verify_path
+from visailu.limits import LimitExceeded
+from visailu.timings import model_counts, staged
+from visailu.verify import compose, failure_message, verify_path, verify_stream
+
+MESSAGE_CONSTANTS = {
+    INVALID_YAML_RESOURCE: 'INVALID_YAML_RESOURCE',
+    LIMIT_ALIASES_EXCEEDED: 'LIMIT_ALIASES_EXCEEDED',
+    LIMIT_BYTES_EXCEEDED: 'LIMIT_BYTES_EXCEEDED',
+    LIMIT_DEPTH_EXCEEDED: 'LIMIT_DEPTH_EXCEEDED',
+    LIMIT_DOCUMENTS_EXCEEDED: 'LIMIT_DOCUMENTS_EXCEEDED',
+    LIMIT_NODES_EXCEEDED: 'LIMIT_NODES_EXCEEDED',
+    LIMIT_SECONDS_EXCEEDED: 'LIMIT_SECONDS_EXCEEDED',
+    MODEL_META_INVALID_DEFAULTS: 'MODEL_META_INVALID_DEFAULTS',
+    MODEL_META_INVALID_RANGE: 'MODEL_META_INVALID_RANGE',
+    MODEL_META_INVALID_RANGE_VALUE: 'MODEL_META_INVALID_RANGE_VALUE',
+    MODEL_QUESTION_ANSWER_MISSING: 'MODEL_QUESTION_ANSWER_MISSING',
+    MODEL_QUESTION_ANSWER_MISSING_RATING: 'MODEL_QUESTION_ANSWER_MISSING_RATING',
+    MODEL_QUESTION_INCOMPLETE: 'MODEL_QUESTION_INCOMPLETE',
+    MODEL_QUESTION_INVALID_RANGE: 'MODEL_QUESTION_INVALID_RANGE',
+    MODEL_QUESTION_INVALID_RANGE_VALUE: 'MODEL_QUESTION_INVALID_RANGE_VALUE',
+    MODEL_STRUCTURE_UNEXPECTED: 'MODEL_STRUCTURE_UNEXPECTED',
+    MODEL_VALUES_MISSING: 'MODEL_VALUES_MISSING',
+}
+META_MESSAGES = (MODEL_META_INVALID_DEFAULTS, MODEL_META_INVALID_RANGE, MODEL_META_INVALID_RANGE_VALUE)
+
+
+class Diagnostic(NamedTuple):
+    """Structured report of one violation (question and answer count from 1, line and column too)."""
+
+    code: int
+    constant: str
+    message: str
+    question: Optional[int]
+    answer: Optional[int]
+    line: Optional[int]
+    column: Optional[int]
 
 
 @no_type_check
@@ -84,85 +128,242 @@ def validate_defaults(target_type, maps_to, default_rating) -> tuple[bool, str]:
     return True, ''
 
 
+class ScaleChecker:
+    """Compiled checks of one meta block (scale range and defaults) shared by all questions referring to it.
+
+    The meta level verdict is available as message (empty if the block is consistent).
+    """
+
+    __slots__ = ('message', 'target_type', 'maps_to', 'default_rating')
+
+    @no_type_check
+    def __init__(self, meta) -> None:
+        self.message = MODEL_META_INVALID_DEFAULTS
+        self.target_type, self.maps_to, self.default_rating = None, [], None
+        try:
+            target_type, maps_to, default_rating = parse_defaults(meta)
+        except (AttributeError, TypeError):  # meta, scale, or range of unexpected structure
+            return
+        if target_type is None:
+            return
+        self.target_type, self.maps_to, self.default_rating = target_type, maps_to, default_rating
+        ok, message = validate_defaults(target_type, maps_to, default_rating)
+        self.message = '' if ok else message
+
+    @no_type_check
+    def check(self, rating) -> str:
+        """Check an answer rating against the scale and return the message for an invalid one (else empty)."""
+        if self.target_type is bool:
+            return '' if rating in self.maps_to else MODEL_QUESTION_INVALID_RANGE
+        if isinstance(rating, bool) or not isinstance(rating, (int, float)):
+            return MODEL_QUESTION_INVALID_RANGE_VALUE
+        try:
+            val = float(rating)
+        except OverflowError:
+            return MODEL_QUESTION_INVALID_RANGE_VALUE
+        return '' if self.maps_to[0] <= val <= self.maps_to[1] else MODEL_QUESTION_INVALID_RANGE_VALUE
+
+
+@no_type_check
+def _question_violations(question, answers, checker: ScaleChecker) -> Iterator[tuple[str, Optional[int]]]:
+    """Yield the violations of one question with a consistent scale as (message, answer slot) filling in defaults."""
+    if not question or not answers:
+        yield MODEL_QUESTION_INCOMPLETE, None
+        return
+
+    check, default_rating = checker.check, checker.default_rating
+    for a_slot, option in enumerate(answers):
+        try:
+            answer = option.get('answer', '')
+            rating = option.get('rating')
+        except AttributeError:
+            yield MODEL_STRUCTURE_UNEXPECTED, a_slot
+            continue
+        if rating is None:
+            rating = default_rating
+        ok = True
+        message = check(rating)
+        if message:
+            ok = False
+            yield message, a_slot
+        if not answer:
+            ok = False
+            yield MODEL_QUESTION_ANSWER_MISSING, a_slot
+        if rating is None:
+            ok = False
+            yield MODEL_QUESTION_ANSWER_MISSING_RATING, a_slot
+        if ok:  # We are good, so we can eagerly patch to fill in defaults (containers stay in place)
+            option['rating'] = rating
+
+
 @no_type_check
-def _validate(data) -> tuple[int, str, Any]:
-    """Validate the data against the model and return the completed data.
+def _violations(data, memo=None) -> Iterator[tuple[str, Optional[int], Optional[int]]]:
+    """Yield all violations of the model as (message, question slot, answer slot) in document order.
 
     Defaults being filled in along the way, so that subsequent publication does not duplicate the logic.
+    Every distinct meta block is compiled once per document into a checker shared by the questions using it and
+    an inconsistent block is reported once (at the first question using it).
+    Consumers may stop after the first violation (the data is then completed only up to that point).
+    A memo (see visailu.revalidate) replaces the checks of questions unchanged since an earlier run.
     """
     try:
         identity = data.get('id')
         title = data.get('title', '')
         questions = data.get('questions', [])
+        top_meta = data.get('meta')
     except (AttributeError, RuntimeError):
-        return 1, MODEL_STRUCTURE_UNEXPECTED, data
+        yield MODEL_STRUCTURE_UNEXPECTED, None, None
+        return
 
     if not all(aspect for aspect in (identity, title, questions)):
-        return 1, MODEL_VALUES_MISSING, data
+        yield MODEL_VALUES_MISSING, None, None
+    if not isinstance(questions, list):
+        if questions:
+            yield MODEL_STRUCTURE_UNEXPECTED, None, None
+        return
 
+    checkers = {}
     for q_slot, entry in enumerate(questions):
-        question = entry.get('question', '')
-        answers = entry.get('answers', [])
-        meta = effective_meta(data, entry)
-        target_type, maps_to, default_rating = parse_defaults(meta)
-        if target_type is None:
-            return 1, MODEL_META_INVALID_DEFAULTS, data
-        ok, message = validate_defaults(target_type, maps_to, default_rating)
-        if not ok:
-            return 1, message, data
-        if target_type is None or not maps_to:
-            return 1, MODEL_META_INVALID_RANGE, data
-        if target_type is bool:
-            if default_rating not in maps_to:
-                return 1, MODEL_META_INVALID_RANGE_VALUE, data
-        if target_type is float:
-            try:
-                val = float(default_rating)
-                if not isinstance(default_rating, (int, float)) or default_rating is False or default_rating is True:
-                    return 1, MODEL_META_INVALID_RANGE_VALUE, data
-            except (TypeError, ValueError):
-                return 1, MODEL_META_INVALID_RANGE_VALUE, data
-            if not maps_to[0] <= val <= maps_to[1]:
-                return 1, MODEL_META_INVALID_RANGE_VALUE, data
-
-        if not all(aspect for aspect in (question, answers)):
-            return 1, MODEL_QUESTION_INCOMPLETE, data
-
-        for a_slot, option in enumerate(answers):
-            answer = option.get('answer', '')
-            rating = option.get('rating')
-            if rating is None:
-                rating = default_rating
-            if target_type is bool:
-                if rating not in maps_to:
-                    return 1, MODEL_QUESTION_INVALID_RANGE, data
-            if target_type is float:
-                try:
-                    val = float(rating)
-                    if not isinstance(rating, (int, float)) or rating is False or rating is True:
-                        return 1, MODEL_QUESTION_INVALID_RANGE_VALUE, data
-                except (TypeError, ValueError):
-                    return 1, MODEL_QUESTION_INVALID_RANGE_VALUE, data
-                if not maps_to[0] <= val <= maps_to[1]:
-                    return 1, MODEL_QUESTION_INVALID_RANGE_VALUE, data
-            if not answer:
-                return 1, MODEL_QUESTION_ANSWER_MISSING, data
-            if rating is None:
-                return 1, MODEL_QUESTION_ANSWER_MISSING_RATING, data
-            # We are good, so we can eagerly patch to fill in defaults without too much logic as idempotent rollup
-            option['rating'] = rating
-            answers[a_slot] = option
-            questions[q_slot]['answers'] = answers
-            data['questions'] = questions
+        try:
+            meta = entry.get('meta')
+            question = entry.get('question', '')
+            answers = entry.get('answers', [])
+        except AttributeError:
+            yield MODEL_STRUCTURE_UNEXPECTED, q_slot, None
+            continue
+        if meta is None:
+            meta = top_meta
+        checker = checkers.get(id(meta))
+        if checker is None:
+            checker = checkers[id(meta)] = ScaleChecker(meta)
+            if checker.message:
+                yield checker.message, q_slot, None
+        if checker.message:
+            continue
+
+        if memo is None:
+            violations = _question_violations(question, answers, checker)
+        else:
+            violations = memo.replay(q_slot, entry, question, answers, checker)
+        for message, a_slot in violations:
+            yield message, q_slot, a_slot
 
+
+@staged('validate', lambda result, data, *_: model_counts(data))
+@no_type_check
+def _validate(data, memo=None) -> tuple[int, str, Any]:
+    """Validate the data against the model and return the completed data (stopping at the first violation)."""
+    for message, _, _ in _violations(data, memo):
+        return 1, message, data
     return 0, '', data
 
 
+@no_type_check
+def _node_at(node, key_or_slot) -> Any:
+    """Descend one level into a YAML node per mapping key or sequence slot (None if not present)."""
+    if isinstance(node, yaml.MappingNode) and isinstance(key_or_slot, str):
+        for key_node, value_node in node.value:
+            if isinstance(key_node, yaml.ScalarNode) and key_node.value == key_or_slot:
+                return value_node
+    if isinstance(node, yaml.SequenceNode) and isinstance(key_or_slot, int) and key_or_slot < len(node.value):
+        return node.value[key_or_slot]
+    return None
+
+
+@no_type_check
+def locate(root, message: str, q_slot: Optional[int], a_slot: Optional[int]) -> tuple[Optional[int], Optional[int]]:
+    """Locate a violation in the node tree of the document as 1-based (line, column) pair - (None, None) if unknown.
+
+    Meta level violations point to the effective meta block, all others to the deepest known entry.
+    """
+    if root is None:
+        return None, None
+    node = root
+    trail = [] if q_slot is None else ['questions', q_slot]
+    if message in META_MESSAGES and q_slot is not None:
+        question = _node_at(_node_at(root, 'questions'), q_slot)
+        trail = ['questions', q_slot, 'meta'] if _node_at(question, 'meta') is not None else ['meta']
+    elif a_slot is not None:
+        trail.extend(['answers', a_slot])
+    for step in trail:
+        child = _node_at(node, step)
+        if child is None:
+            break
+        node = child
+    return node.start_mark.line + 1, node.start_mark.column + 1
+
+
+@staged('validate', lambda result, data, *_, **__: model_counts(data))
+@no_type_check
+def diagnose(data, root=None) -> list[Diagnostic]:
+    """Collect all violations of the model as diagnostics (with locations if the document node tree is given)."""
+    diagnostics = []
+    for message, q_slot, a_slot in _violations(data):
+        line, column = locate(root, message, q_slot, a_slot)
+        diagnostics.append(
+            Diagnostic(
+                code=1,
+                constant=MESSAGE_CONSTANTS.get(message, ''),
+                message=message,
+                question=None if q_slot is None else q_slot + 1,
+                answer=None if a_slot is None else a_slot + 1,
+                line=line,
+                column=column,
+            )
+        )
+    return diagnostics
+
+
+@no_type_check
+def diagnose_path(path: str, options=None) -> tuple[int, list[Diagnostic], Any]:
+    """Drive the model validation collecting all violations in one pass as (code, diagnostics, data)."""
+    try:
+        with pathlib.Path(path).open('rt', encoding='utf-8') as handle:
+            data, root = compose(handle, options=options)
+    except LimitExceeded as err:
+        line, column = (None, None) if err.mark is None else (err.mark.line + 1, err.mark.column + 1)
+        return 1, [Diagnostic(1, MESSAGE_CONSTANTS[err.message], err.message, None, None, line, column)], {}
+    except (RuntimeError, yaml.YAMLError) as err:
+        mark = getattr(err, 'problem_mark', None)
+        line, column = (None, None) if mark is None else (mark.line + 1, mark.column + 1)
+        constant = MESSAGE_CONSTANTS[INVALID_YAML_RESOURCE]
+        return 1, [Diagnostic(1, constant, INVALID_YAML_RESOURCE, None, None, line, column)], {}
+
+    diagnostics = diagnose(data, root)
+    return (1 if diagnostics else 0), diagnostics, data
+
+
 @no_type_check
 def validate_path(path: str, options=None) -> tuple[int, str, Any]:
-    """Drive the model validation."""
-    code, message, data = verify_path(path)
+    """Drive the model validation.
+
+    In incremental mode (option incremental) only the questions changed since the last run are checked.
+    With option engine events the model is checked on the YAML event stream (see visailu.events) and the data
+    returned is None.
+    """
+    if options and options.get('engine') == 'events':
+        from visailu.events import validate_events_path  # only needed for the event engine
+
+        return validate_events_path(path, options)
+
+    if options and options.get('incremental'):
+        from visailu.revalidate import revalidate_path  # only needed for incremental runs
+
+        return revalidate_path(path, options)[1]
+
+    code, message, data = verify_path(path, options=options)
     if code != 0:
-        return code, INVALID_YAML_RESOURCE, data
+        return code, failure_message(message), data
 
     return _validate(data)
+
+
+@no_type_check
+def validate_stream(path: str, options=None) -> Iterator[tuple[int, int, str, Any]]:
+    """Drive the model validation per document of a YAML stream yielding (index, code, message, data)."""
+    for index, code, message, data in verify_stream(path, options=options):
+        if code != 0:
+            yield index, code, failure_message(message), data
+            continue
+        code, message, data = _validate(data)
+        yield index, code, message, data
@@ -1,20 +1,226 @@
 """Verify the YAML file for quiz data."""
 
 import pathlib
-from typing import Any, no_type_check
+import time
+from typing import Any, Iterator, no_type_check
 
 import yaml
 
-from visailu import slugify
+from visailu import INVALID_YAML_RESOURCE, YAML_LOADER, log, slugify
+from visailu.limits import LimitExceeded, Limits, check_size, guarded_loader, limit_message, limits_of
+from visailu.timings import OBSERVERS, source_size, staged, timed_iter
+
+LOADER_AUTO = 'auto'
+LOADER_C = 'c'
+LOADER_PYTHON = 'python'
+LOADER_ALIASES = {
+    'auto': LOADER_AUTO,
+    '': LOADER_AUTO,
+    'c': LOADER_C,
+    'cyaml': LOADER_C,
+    'libyaml': LOADER_C,
+    'py': LOADER_PYTHON,
+    'pure': LOADER_PYTHON,
+    'python': LOADER_PYTHON,
+}
+HAS_LIBYAML = bool(getattr(yaml, '__with_libyaml__', False)) and hasattr(yaml, 'CSafeLoader')
 
 
 @no_type_check
-def verify_path(path: str, options=None) -> tuple[int, str, Any]:
-    """Verify the path points to a valid YAML file."""
+def select_loader(options=None) -> Any:
+    """Select the safe YAML loader class per options, environment (VISAILU_YAML_LOADER), and availability.
+
+    The C accelerated loader is preferred when PyYAML was built with libyaml, the pure Python loader is the fallback.
+    """
+    if options is None:
+        options = {}
+    requested = str(options.get('yaml_loader') or YAML_LOADER).strip().lower()
+    choice = LOADER_ALIASES.get(requested)
+    if choice is None:
+        log.warning(f'unknown yaml loader ({requested}) requested - using {LOADER_AUTO} instead')
+        choice = LOADER_AUTO
+    if choice == LOADER_PYTHON:
+        return yaml.SafeLoader
+    if not HAS_LIBYAML:
+        if choice == LOADER_C:
+            log.debug('yaml loader c requested but PyYAML lacks libyaml support - falling back to python')
+        return yaml.SafeLoader
+    return yaml.CSafeLoader
+
+
+@no_type_check
+def _load_with(loader_class, source, limits: Limits, start: float) -> Any:
+    """Load the single document with the guarded variant of the loader class."""
+    loader = guarded_loader(loader_class, source, limits, start)
     try:
-        with pathlib.Path(path).open('rt', encoding='utf-8') as handle:
-            data = yaml.safe_load(handle)
-    except (RuntimeError, yaml.scanner.ScannerError) as err:
-        message = f'path{path} is not a valid YAML file. Details: {slugify(str(err))}'
+        return loader.get_single_data()
+    finally:
+        loader.dispose()
+
+
+@no_type_check
+def load(source, options=None) -> Any:
+    """Load a single YAML document from the source (text, bytes, or a seekable handle) within the limits.
+
+    Errors seen by the C loader are reproduced by the pure Python loader to keep the details identical.
+    """
+    start = time.perf_counter()
+    loader = select_loader(options)
+    limits = limits_of(options)
+    if loader is yaml.SafeLoader:
+        return _load_with(loader, source, limits, start)
+    try:
+        return _load_with(loader, source, limits, start)
+    except yaml.YAMLError:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _load_with(yaml.SafeLoader, source, limits, start)
+
+
+@no_type_check
+def _compose_with(loader_class, source, limits: Limits, start: float) -> tuple[Any, Any]:
+    """Compose the single document node tree and construct the data from it as (data, node) pair."""
+    loader = guarded_loader(loader_class, source, limits, start)
+    try:
+        node = loader.get_single_node()
+        return (None if node is None else loader.construct_document(node)), node
+    finally:
+        loader.dispose()
+
+
+@staged('verify', lambda result, source, *_, **__: {'documents': 1, 'bytes_read': source_size(source)})
+@no_type_check
+def compose(source, options=None) -> tuple[Any, Any]:
+    """Load a single YAML document from the source keeping the node tree (with marks) as (data, node) pair.
+
+    Errors seen by the C loader are reproduced by the pure Python loader to keep the details identical.
+    Sources exceeding the limits raise LimitExceeded.
+    """
+    start = time.perf_counter()
+    loader_class = select_loader(options)
+    limits = limits_of(options)
+    check_size(source_size(source), limits)
+    if loader_class is yaml.SafeLoader:
+        return _compose_with(loader_class, source, limits, start)
+    try:
+        return _compose_with(loader_class, source, limits, start)
+    except yaml.YAMLError:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _compose_with(yaml.SafeLoader, source, limits, start)
+
+
+@staged('verify', lambda result, source, *_, **__: {'documents': 1, 'bytes_read': source_size(source)})
+@no_type_check
+def verify_source(source, label: str, options=None) -> tuple[int, str, Any]:
+    """Verify the source (text, bytes, or handle) labeled for messages is valid YAML within the limits."""
+    try:
+        check_size(source_size(source), limits_of(options))
+        data = load(source, options=options)
+    except LimitExceeded as err:
+        return 1, limit_failure(label, err), {}
+    except (RuntimeError, yaml.YAMLError) as err:
+        message = f'path{label} is not a valid YAML file. Details: {slugify(str(err))}'
         return 1, message, {}
     return 0, '', data
+
+
+def limit_failure(label: str, err: LimitExceeded) -> str:
+    """Report the exceeded limit of the labeled source (with the position if known)."""
+    where = '' if err.mark is None else f' at line {err.mark.line + 1}, column {err.mark.column + 1}'
+    return f'path {label} {err}{where}'
+
+
+def failure_message(message: str) -> str:
+    """Map the message of a failed verification to the model message (exceeded limits keep their message)."""
+    return limit_message(message) or INVALID_YAML_RESOURCE
+
+
+@no_type_check
+def verify_path(path: str, options=None) -> tuple[int, str, Any]:
+    """Verify the path points to a valid YAML file.
+
+    With option cache the parsed document is taken from (or else added to) the persistent parsed model cache (keyed
+    by the limits as well).
+    Sources larger than the byte limit are rejected before reading.
+    """
+    limits = limits_of(options)
+    try:
+        check_size(pathlib.Path(path).stat().st_size, limits)
+    except LimitExceeded as err:
+        return 1, limit_failure(path, err), {}
+    if options and options.get('cache'):
+        from visailu.cache import cached
+
+        return cached(path, lambda: _verify_file(path, options), limits=limits)
+    return _verify_file(path, options)
+
+
+@no_type_check
+def _verify_file(path: str, options=None) -> tuple[int, str, Any]:
+    with pathlib.Path(path).open('rt', encoding='utf-8') as handle:
+        return verify_source(handle, path, options=options)
+
+
+@no_type_check
+def load_all(source_opener, options=None) -> Iterator[Any]:
+    """Lazily load the documents of a YAML stream from the source opener (callable returning a fresh handle).
+
+    Only the current document is materialized at any time and the limits apply to the stream as a whole.
+    Errors seen by the C loader are reproduced by the pure Python loader to keep the details identical.
+    """
+    start = time.perf_counter()
+    loader = select_loader(options)
+    limits = limits_of(options)
+    seen = 0
+    with source_opener() as handle:
+        check_size(source_size(handle), limits)
+        try:
+            for data in _load_all_with(loader, handle, limits, start):
+                seen += 1
+                yield data
+            return
+        except yaml.YAMLError:
+            if loader is yaml.SafeLoader:
+                raise
+    with source_opener() as handle:
+        for slot, data in enumerate(_load_all_with(yaml.SafeLoader, handle, limits, start)):
+            if slot >= seen:
+                yield data
+
+
+@no_type_check
+def _load_all_with(loader_class, source, limits: Limits, start: float) -> Iterator[Any]:
+    """Load the documents one by one with the guarded variant of the loader class."""
+    loader = guarded_loader(loader_class, source, limits, start)
+    try:
+        while loader.check_data():
+            yield loader.get_data()
+    finally:
+        loader.dispose()
+
+
+@no_type_check
+def verify_stream(path: str, options=None) -> Iterator[tuple[int, int, str, Any]]:
+    """Verify the path points to a valid YAML stream and yield (index, code, message, data) per document.
+
+    The index counts from 1. An empty stream yields one empty document (like verify_path does).
+    Verification stops at the first document with invalid YAML.
+    """
+    index = 0
+    documents = load_all(lambda: pathlib.Path(path).open('rt', encoding='utf-8'), options)
+    if OBSERVERS:
+        size = pathlib.Path(path).stat().st_size
+        documents = timed_iter('verify', documents, lambda _: {'documents': 1}, {'bytes_read': size})
+    try:
+        for index, data in enumerate(documents, 1):
+            yield index, 0, '', data
+    except LimitExceeded as err:
+        yield index + 1, 1, limit_failure(path, err), {}
+        return
+    except (RuntimeError, yaml.YAMLError) as err:
+        message = f'path{path} is not a valid YAML file. Details: {slugify(str(err))}'
+        yield index + 1, 1, message, {}
+        return
+    if not index:
+        yield 1, 0, '', None
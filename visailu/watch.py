@@ -0,0 +1,108 @@
+"""Watch model files and revalidate or republish only the changed ones in one warm process.
+
+Changes are detected by polling the modification times and sizes (portable and without extra dependencies) and
+debounced so that editors saving in several steps trigger only one run per file.
+"""
+
+import os
+import time
+from typing import Any, Callable, Iterable, Optional, no_type_check
+
+from visailu import log
+from visailu.batch import BatchEntryType, expand, process
+from visailu.manifest import prune
+from visailu.publish import BUILD_FOLDER
+
+DEBOUNCE_ROUNDS = 10
+
+SnapshotType = dict[str, tuple[int, int]]  # path -> (mtime in ns, size in bytes)
+ReportType = Callable[[BatchEntryType], None]
+
+
+def snapshot(requests: Iterable[str]) -> SnapshotType:
+    """Take the modification time and size of all model files the requests (paths, folders, patterns) resolve to."""
+    state: SnapshotType = {}
+    for path, code, _ in expand(requests):
+        if code != 0:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:  # Removed in between
+            continue
+        state[path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def difference(before: SnapshotType, after: SnapshotType) -> tuple[list[str], list[str]]:
+    """Derive the sorted lists of changed (including new) and removed paths between two snapshots."""
+    changed = sorted(path for path, stamp in after.items() if before.get(path) != stamp)
+    removed = sorted(path for path in before if path not in after)
+    return changed, removed
+
+
+def log_report(entry: BatchEntryType) -> None:
+    """Report a result on the log."""
+    path, code, message = entry
+    if code != 0:
+        log.error(f'path {path} {message}')
+    else:
+        log.info(f'path {path} ok {message}'.rstrip())
+
+
+@no_type_check
+def watch(
+    requests: list[str],
+    action: str = 'validate',
+    options=None,
+    interval: float = 0.25,
+    debounce: float = 0.1,
+    cycles: Optional[int] = None,
+    report: Optional[ReportType] = None,
+    initial: bool = True,
+    sleep: Callable[[float], Any] = time.sleep,
+) -> int:
+    """Poll the requested models every interval seconds and process the changed ones once settled (debounce).
+
+    All models are processed once at start unless initial is False.
+    Failures (like of half saved models) are reported per model and the watch goes on.
+    Runs forever unless a number of polling cycles is given and returns the number of results reported.
+    """
+    if options is None:
+        options = {}
+    if report is None:
+        report = log_report
+    reported = 0
+    known = snapshot(requests)
+    if initial:
+        for path in sorted(known):
+            for entry in process(action, path, options):
+                report(entry)
+                reported += 1
+
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        cycle += 1
+        sleep(interval)
+        current = snapshot(requests)
+        if current == known:
+            continue
+        for _ in range(DEBOUNCE_ROUNDS):
+            sleep(debounce)
+            settled = snapshot(requests)
+            if settled == current:
+                break
+            current = settled
+
+        changed, removed = difference(known, current)
+        known = current
+        for path in changed:
+            for entry in process(action, path, options):
+                report(entry)
+                reported += 1
+        for path in removed:
+            log.info(f'path {path} removed')
+        if removed and action == 'publish' and options.get('incremental'):
+            for target in prune(BUILD_FOLDER):
+                log.info(f'removed quiz data at {target} (model no longer exists)')
+
+    return reported
@@ -0,0 +1,148 @@
+"""Write exported quiz data incrementally, atomically, and optionally compact or compressed."""
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import secrets
+from typing import IO, Any, Iterable, Iterator, NamedTuple, Union, no_type_check
+
+from visailu import ENCODING
+from visailu.timings import staged
+
+GZIP_SUFFIX = '.gz'
+JSON_SUFFIX = '.json'
+COMPACT_SEPARATORS = (',', ':')
+HASHED_GZIP_LEVEL = 9  # Fixed so that equal content always yields equal sidecars
+HASHED_NAME_DIGITS = 16  # Hex digits of the content digest in hashed file names
+
+PathLike = Union[str, pathlib.Path]
+
+
+@contextlib.contextmanager
+def atomic_target(path: PathLike) -> Iterator[IO[bytes]]:
+    """Provide a binary handle to a temporary sibling of path that replaces path only on success.
+
+    Concurrent readers thus either see the previous or the complete new content but never partial writes.
+    """
+    target = pathlib.Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_sibling(target)
+    try:
+        with temp_path.open('xb') as handle:  # honors the umask unlike tempfile.mkstemp
+            yield handle
+        os.replace(temp_path, target)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _temp_sibling(target: pathlib.Path) -> pathlib.Path:
+    """Name a hidden temporary sibling unique per process and call."""
+    return target.parent / f'.{target.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp'
+
+
+def target_suffix(compress: bool = False) -> str:
+    """Return the file suffix for published quiz data."""
+    return JSON_SUFFIX + GZIP_SUFFIX if compress else JSON_SUFFIX
+
+
+class Serialized(str):
+    """Question already serialized (by serialize in the same mode) that json_chunks passes through as is."""
+
+    __slots__ = ()
+
+
+@no_type_check
+def serialize(question: Any, compact: bool = False) -> str:
+    """Serialize one question as element of the JSON array written by json_chunks."""
+    if compact:
+        return json.dumps(question, separators=COMPACT_SEPARATORS)
+    return json.dumps(question, indent=2).replace('\n', '\n  ')
+
+
+@no_type_check
+def json_chunks(questions: Iterable[Any], compact: bool = False) -> Iterator[str]:
+    """Serialize the questions one at a time as chunks of a JSON array.
+
+    The pretty mode produces the same text as json.dump(questions, handle, indent=2) does.
+    """
+    if compact:
+        opening, separator, closing = '[', ',', ']'
+    else:
+        opening, separator, closing = '[\n  ', ',\n  ', '\n]'
+    empty = True
+    for question in questions:
+        text = question if isinstance(question, Serialized) else serialize(question, compact)
+        yield (opening if empty else separator) + text
+        empty = False
+    yield '[]' if empty else closing
+
+
+@staged('write', lambda written, *_, **__: {'bytes_written': written})
+@no_type_check
+def write_quiz(questions: Iterable[Any], path: PathLike, compact: bool = False, compress: bool = False) -> int:
+    """Write the questions as JSON array to path (atomically) while consuming them.
+
+    Returns the number of (uncompressed) bytes written.
+    """
+    written = 0
+    with atomic_target(path) as raw:
+        handle = gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) if compress else raw
+        try:
+            for chunk in json_chunks(questions, compact=compact):
+                written += handle.write(chunk.encode(ENCODING))
+        finally:
+            if compress:
+                handle.close()
+    return written
+
+
+class HashedFile(NamedTuple):
+    """Published file named by the digest of its content (path, size in bytes, and SHA-256 hex digest)."""
+
+    path: pathlib.Path
+    size: int
+    digest: str
+
+
+@staged('write', lambda written, *_, **__: {'bytes_written': written[0].size})
+@no_type_check
+def write_hashed(
+    questions: Iterable[Any], base: PathLike, compact: bool = False, level: int = HASHED_GZIP_LEVEL
+) -> tuple[HashedFile, HashedFile]:
+    """Write the questions as JSON array to base.<digest>.json with a precompressed sidecar (suffix .json.gz).
+
+    Both files are written while consuming the questions and only appear under their final names when complete.
+    Returns the plain and the compressed file.
+    """
+    from visailu.manifest import digest_of  # imported late as visailu.manifest builds on this module
+
+    base = pathlib.Path(base)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    plain_temp, packed_temp = _temp_sibling(base), _temp_sibling(base.with_name(base.name + GZIP_SUFFIX))
+    hasher = hashlib.sha256()
+    written = 0
+    try:
+        with plain_temp.open('xb') as plain, packed_temp.open('xb') as raw:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0, compresslevel=level) as packed:
+                for chunk in json_chunks(questions, compact=compact):
+                    data = chunk.encode(ENCODING)
+                    written += plain.write(data)
+                    packed.write(data)
+                    hasher.update(data)
+        digest = hasher.hexdigest()
+        plain_path = base.with_name(f'{base.name}.{digest[:HASHED_NAME_DIGITS]}{JSON_SUFFIX}')
+        packed_path = plain_path.with_name(plain_path.name + GZIP_SUFFIX)
+        os.replace(packed_temp, packed_path)  # The sidecar first, so that the plain file implies both
+        os.replace(plain_temp, plain_path)
+    except BaseException:
+        plain_temp.unlink(missing_ok=True)
+        packed_temp.unlink(missing_ok=True)
+        raise
+    return (
+        HashedFile(plain_path, written, digest),
+        HashedFile(packed_path, packed_path.stat().st_size, digest_of(packed_path)),
+    )